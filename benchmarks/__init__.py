@@ -0,0 +1,6 @@
+"""Performance benchmarks for the MDFU host stack
+
+Run the throughput benchmark with
+
+    python -m benchmarks.throughput
+"""
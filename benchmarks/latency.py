@@ -0,0 +1,106 @@
+"""Network tool latency benchmark
+
+Runs firmware updates between the network tool and a pymdfu client over the
+loopback interface for each transport, once with the default socket options
+and once with Nagle's algorithm and quick acknowledgements left at the
+operating system defaults, and reports the average time per MDFU command:
+
+    python -m benchmarks.latency
+    python -m benchmarks.latency --transport spi --image-size 16384
+"""
+import argparse
+import sys
+from pymdfu.mdfu import Mdfu
+from pymdfu.pymdfuclient import MdfuClient
+from pymdfu.tools.network import NetworkTool, NetworkClientTool
+
+TRANSPORTS = ["serial", "spi", "i2c"]
+# Socket option sets as network tool arguments
+SOCKET_OPTIONS = {
+    "default": [],
+    "no-nodelay-no-quickack": ["--no-nodelay", "--no-quickack"],
+}
+DEFAULT_IMAGE_SIZE = 8192
+DEFAULT_REPEAT = 3
+
+class LatencyResult():
+    """Result of a latency benchmark case"""
+    def __init__(self, transport, options, duration, commands):
+        """Class initialization
+
+        :param transport: Transport layer name
+        :type transport: str
+        :param options: Socket option set name, see SOCKET_OPTIONS
+        :type options: str
+        :param duration: Update duration in seconds
+        :type duration: float
+        :param commands: Number of MDFU commands of the update
+        :type commands: int
+        """
+        self.transport = transport
+        self.options = options
+        self.duration = duration
+        self.commands = commands
+
+    @property
+    def ms_per_command(self):
+        """Average time per MDFU command in milliseconds"""
+        return self.duration / self.commands * 1000
+
+def run_case(transport, options, image_size=DEFAULT_IMAGE_SIZE, repeat=DEFAULT_REPEAT):
+    """Run a latency benchmark case
+
+    :param transport: Transport layer name
+    :type transport: str
+    :param options: Socket option set name, see SOCKET_OPTIONS
+    :type options: str
+    :param image_size: Image size in bytes, defaults to DEFAULT_IMAGE_SIZE
+    :type image_size: int, optional
+    :param repeat: Number of updates, the fastest is reported, defaults to DEFAULT_REPEAT
+    :type repeat: int, optional
+    :return: Result of the fastest update
+    :rtype: LatencyResult
+    """
+    tool_args = ["--host", "localhost", "--transport", transport] + SOCKET_OPTIONS[options]
+    client_tool = NetworkClientTool(tool_args + ["--port", "0"])
+    # Open the client MAC here to get the port that was assigned by the OS
+    client_tool.mac.open()
+    port = client_tool.mac.sock.getsockname()[1]
+    client = MdfuClient(client_tool)
+    client.start()
+    image = bytes(range(256)) * (image_size // 256)
+    best = None
+    try:
+        for _ in range(repeat):
+            stats = Mdfu(NetworkTool(tool_args + ["--port", str(port)])).run_upgrade(image)
+            if best is None or stats.duration < best.duration:
+                best = LatencyResult(transport, options, stats.duration, stats.total("count"))
+    finally:
+        client.stop()
+        client_tool.close()
+    return best
+
+def main(argv=None):
+    """Benchmark entry point
+
+    :param argv: Command line arguments, defaults to None which uses sys.argv
+    :type argv: list, optional
+    :return: Exit code
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="pymdfu network tool latency benchmark")
+    parser.add_argument("--transport", choices=TRANSPORTS, action="append",
+                        help="Transport to benchmark, can be repeated, default is all transports")
+    parser.add_argument("--image-size", type=int, default=DEFAULT_IMAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+
+    print(f"{'transport':<10} {'options':<12} {'commands':>8} {'ms/command':>11}")
+    for transport in args.transport or TRANSPORTS:
+        for options in SOCKET_OPTIONS:
+            result = run_case(transport, options, args.image_size, args.repeat)
+            print(f"{transport:<10} {options:<12} {result.commands:>8} {result.ms_per_command:>11.3f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
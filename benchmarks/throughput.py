@@ -0,0 +1,351 @@
+"""Host stack throughput benchmark
+
+Runs firmware updates against the MDFU client simulator for every transport and
+MAC layer combination the simulator supports, across image sizes and client
+buffer sizes, and reports the effective payload throughput, commands per second
+and CPU time per MB.
+
+The results can be stored as a baseline and later runs compared against it so that
+performance regressions in the MDFU protocol, transport and MAC layers show up
+in review:
+
+    python -m benchmarks.throughput --save-baseline
+    python -m benchmarks.throughput --compare
+
+CPU time is measured for the whole process and therefore includes the simulated
+client thread.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pymdfu.mdfu import Mdfu
+from pymdfu.transport import Transport
+from pymdfu.tools.simulator import SimulatorTool, transport_mac_support
+from pymdfu.pymdfuclient import client_profiles
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_IMAGE_SIZES = [8192, 65536]
+DEFAULT_BUFFER_SIZES = [128, 512]
+DEFAULT_REPEAT = 3
+# Allowed relative throughput drop before a result is reported as regression
+DEFAULT_TOLERANCE = 0.25
+
+def configurations():
+    """Transport and MAC layer combinations supported by the simulator
+
+    :return: List of (transport, mac) tuples
+    :rtype: list(tuple(str, str))
+    """
+    return [(transport, mac) for transport, macs in transport_mac_support.items() for mac in macs]
+
+class SimulatorSession(Transport):
+    """Transport that keeps the simulator running across updates
+
+    Starting and stopping the simulated client thread takes up to the client read
+    timeout, which would dominate the results for small images. The benchmark
+    therefore opens the simulator once and only times the MDFU session.
+    """
+    def __init__(self, tool):
+        """Class initialization
+
+        :param tool: Opened simulator tool
+        :type tool: SimulatorTool
+        """
+        self.tool = tool
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, timeout):
+        return self.tool.read(timeout)
+
+    def write(self, data):
+        self.tool.write(data)
+
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for this transport
+
+        :return: Transport class or None
+        :rtype: type
+        """
+        return self.tool.frame_encoder
+
+    def write_frame(self, frame):
+        self.tool.write_frame(frame)
+
+    def write_vectored(self, buffers):
+        self.tool.write_vectored(buffers)
+
+    @property
+    def mac(self):
+        """MAC layer
+
+        :return: MAC layer of the simulator
+        :rtype: Mac
+        """
+        return self.tool.mac
+
+    @property
+    def counters(self):
+        """Transport layer counters
+
+        :return: Transport layer counters of the simulator
+        :rtype: TransportCounters
+        """
+        return self.tool.counters
+
+class BenchmarkResult():
+    """Result of a benchmark case"""
+    def __init__(self, transport, mac, image_size, buffer_size, wall_time, cpu_time, commands,
+                 profile="none"):
+        """Class initialization
+
+        :param transport: Transport layer name
+        :type transport: str
+        :param mac: MAC layer name
+        :type mac: str
+        :param image_size: Image size in bytes
+        :type image_size: int
+        :param buffer_size: Client buffer size in bytes
+        :type buffer_size: int
+        :param wall_time: Update duration in seconds
+        :type wall_time: float
+        :param cpu_time: Process CPU time in seconds used during the update
+        :type cpu_time: float
+        :param commands: Number of MDFU commands of the update
+        :type commands: int
+        :param profile: Simulator client profile, defaults to "none"
+        :type profile: str, optional
+        """
+        self.transport = transport
+        self.mac = mac
+        self.image_size = image_size
+        self.buffer_size = buffer_size
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.commands = commands
+        self.profile = profile
+
+    @property
+    def key(self):
+        """Unique benchmark case identifier
+
+        :return: Identifier in the form transport/mac/image size/buffer size with the
+        client profile appended when one is used
+        :rtype: str
+        """
+        key = f"{self.transport}/{self.mac}/{self.image_size}/{self.buffer_size}"
+        if self.profile != "none":
+            key += f"/{self.profile}"
+        return key
+
+    @property
+    def payload_mbps(self):
+        """Effective payload throughput in MB/s"""
+        return self.image_size / self.wall_time / 1e6
+
+    @property
+    def commands_per_second(self):
+        """MDFU commands per second"""
+        return self.commands / self.wall_time
+
+    @property
+    def cpu_per_mb(self):
+        """CPU time in seconds per MB of payload"""
+        return self.cpu_time / (self.image_size / 1e6)
+
+    def to_dict(self):
+        """Convert result into a dictionary
+
+        :return: Result
+        :rtype: dict
+        """
+        return {
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "commands": self.commands,
+            "payload_mbps": self.payload_mbps,
+            "commands_per_second": self.commands_per_second,
+            "cpu_per_mb": self.cpu_per_mb
+        }
+
+def run_case(transport, mac, image_size, buffer_size, repeat=DEFAULT_REPEAT, profile="none"):
+    """Run a benchmark case
+
+    The update is repeated and the fastest run is reported to reduce the
+    influence of other load on the system.
+
+    :param transport: Transport layer name
+    :type transport: str
+    :param mac: MAC layer name
+    :type mac: str
+    :param image_size: Image size in bytes
+    :type image_size: int
+    :param buffer_size: Client buffer size in bytes
+    :type buffer_size: int
+    :param repeat: Number of updates, defaults to DEFAULT_REPEAT
+    :type repeat: int, optional
+    :param profile: Simulator client profile, defaults to "none"
+    :type profile: str, optional
+    :return: Result of the fastest update
+    :rtype: BenchmarkResult
+    """
+    image = (bytes(range(256)) * (image_size // 256 + 1))[:image_size]
+    tool = SimulatorTool(["--transport", transport, "--mac", mac, "--buffer-size", str(buffer_size),
+                          "--profile", profile])
+    tool.open()
+    best = None
+    try:
+        for _ in range(repeat):
+            mdfu = Mdfu(SimulatorSession(tool))
+            cpu_start = time.process_time()
+            stats = mdfu.run_upgrade(image)
+            cpu_time = time.process_time() - cpu_start
+            if best is None or stats.duration < best.wall_time:
+                best = BenchmarkResult(transport, mac, image_size, buffer_size, stats.duration, cpu_time,
+                                       stats.total("count"), profile)
+    finally:
+        tool.close()
+    return best
+
+def run(configs=None, image_sizes=None, buffer_sizes=None, repeat=DEFAULT_REPEAT, profile="none"):
+    """Run all benchmark cases
+
+    :param configs: Transport and MAC layer combinations, defaults to all supported by the simulator
+    :type configs: list(tuple(str, str)), optional
+    :param image_sizes: Image sizes in bytes, defaults to DEFAULT_IMAGE_SIZES
+    :type image_sizes: list(int), optional
+    :param buffer_sizes: Client buffer sizes in bytes, defaults to DEFAULT_BUFFER_SIZES
+    :type buffer_sizes: list(int), optional
+    :param repeat: Number of updates per case, defaults to DEFAULT_REPEAT
+    :type repeat: int, optional
+    :param profile: Simulator client profile, defaults to "none"
+    :type profile: str, optional
+    :return: Benchmark results
+    :rtype: list(BenchmarkResult)
+    """
+    results = []
+    for transport, mac in configs or configurations():
+        for image_size in image_sizes or DEFAULT_IMAGE_SIZES:
+            for buffer_size in buffer_sizes or DEFAULT_BUFFER_SIZES:
+                results.append(run_case(transport, mac, image_size, buffer_size, repeat, profile))
+    return results
+
+def results_to_dict(results):
+    """Convert results into a dictionary that can be stored as baseline
+
+    :param results: Benchmark results
+    :type results: list(BenchmarkResult)
+    :return: Results with information about the benchmark environment
+    :rtype: dict
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {result.key: result.to_dict() for result in results}
+    }
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare results against a baseline
+
+    :param results: Benchmark results
+    :type results: list(BenchmarkResult)
+    :param baseline: Baseline created with results_to_dict
+    :type baseline: dict
+    :param tolerance: Allowed relative throughput drop, defaults to DEFAULT_TOLERANCE
+    :type tolerance: float, optional
+    :return: Descriptions of the cases with a throughput regression
+    :rtype: list(str)
+    """
+    regressions = []
+    for result in results:
+        reference = baseline["results"].get(result.key)
+        if reference is None:
+            continue
+        if result.payload_mbps < reference["payload_mbps"] * (1 - tolerance):
+            regressions.append(f"{result.key}: {result.payload_mbps:.4f} MB/s, "
+                               f"baseline {reference['payload_mbps']:.4f} MB/s")
+    return regressions
+
+def format_results(results, baseline=None):
+    """Create a table with benchmark results
+
+    :param results: Benchmark results
+    :type results: list(BenchmarkResult)
+    :param baseline: Baseline to show the relative throughput change, defaults to None
+    :type baseline: dict, optional
+    :return: Results table
+    :rtype: str
+    """
+    txt = f"{'Transport/MAC':<20}{'image':>9}{'buffer':>8}{'MB/s':>10}{'cmds/s':>10}{'CPU s/MB':>10}"
+    txt += f"{'change':>9}\n" if baseline else "\n"
+    for result in results:
+        txt += f"{result.transport + '/' + result.mac:<20}{result.image_size:>9}{result.buffer_size:>8}" \
+            f"{result.payload_mbps:>10.4f}{result.commands_per_second:>10.1f}{result.cpu_per_mb:>10.2f}"
+        if baseline:
+            reference = baseline["results"].get(result.key)
+            if reference:
+                change = result.payload_mbps / reference["payload_mbps"] - 1
+                txt += f"{change:>+9.0%}"
+            else:
+                txt += f"{'n/a':>9}"
+        txt += "\n"
+    return txt
+
+def main(argv=None):
+    """Benchmark command line interface
+
+    :param argv: Command line arguments, defaults to None which uses sys.argv
+    :type argv: list(str), optional
+    :return: Exit code, 1 when a regression against the baseline was detected
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="MDFU host stack throughput benchmark")
+    parser.add_argument("--config", action="append", choices=[f"{t}/{m}" for t, m in configurations()],
+                        help="Transport/MAC combination to run, defaults to all")
+    parser.add_argument("--image-sizes", type=int, nargs="+", default=DEFAULT_IMAGE_SIZES)
+    parser.add_argument("--buffer-sizes", type=int, nargs="+", default=DEFAULT_BUFFER_SIZES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--profile", choices=list(client_profiles), default="none",
+                        help="Timing profile of the simulated client")
+    parser.add_argument("--json", type=str, help="Write results in JSON format to file")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH, default=None,
+                        help="Store results as baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, default=None,
+                        help="Compare results against a baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative throughput drop when comparing against a baseline")
+    args = parser.parse_args(argv)
+
+    configs = [tuple(config.split("/")) for config in args.config] if args.config else None
+    results = run(configs, args.image_sizes, args.buffer_sizes, args.repeat, args.profile)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    print(format_results(results, baseline))
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(results_to_dict(results), file, indent=2)
+                file.write("\n")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Parallel firmware update of multiple MDFU clients
+"""
+import time
+from logging import getLogger
+from concurrent.futures import ThreadPoolExecutor
+from pymdfu.mac.exceptions import MacError
+from pymdfu.transport import TransportError
+from .tools.tools import ToolFactory
+from .mdfu import Mdfu, MdfuUpdateError
+from .image import ImageSource
+from .frame_cache import FrameCache
+
+class FleetDevice():
+    """MDFU client device configuration for a fleet update"""
+    def __init__(self, name, tool, tool_args=None, retries=None):
+        """Class initialization
+
+        :param name: Device name used in logs and result reports
+        :type name: str
+        :param tool: Tool name, see supported_tools
+        :type tool: str
+        :param tool_args: Tool specific CLI arguments, defaults to None
+        :type tool_args: list, optional
+        :param retries: Number of retries for this device, defaults to None which
+        uses the updater default
+        :type retries: int, optional
+        """
+        self.name = name
+        self.tool = tool
+        self.tool_args = tool_args if tool_args else []
+        self.retries = retries
+
+    @classmethod
+    def from_config(cls, config, index=0):
+        """Create a device from a configuration dictionary
+
+        The dictionary must contain the tool name in "tool". The optional "name"
+        and "retries" keys are device settings, all other keys are passed as
+        tool arguments e.g. {"tool": "serial", "port": "COM11"} results in
+        the tool arguments ["--port", "COM11"]. A true boolean value results in
+        a flag without value, e.g. {"windowed": True} in ["--windowed"], and a
+        false boolean value is left out.
+
+        :param config: Device configuration
+        :type config: dict
+        :param index: Device index used as default name, defaults to 0
+        :type index: int, optional
+        :raises ValueError: When no tool is specified or retries is not a non-negative integer
+        :return: Device
+        :rtype: FleetDevice
+        """
+        config = dict(config)
+        try:
+            tool = config.pop("tool")
+        except KeyError as exc:
+            raise ValueError(f"No tool specified for device {index}") from exc
+        name = str(config.pop("name", f"device{index}"))
+        retries = config.pop("retries", None)
+        if retries is not None and (isinstance(retries, bool) or not isinstance(retries, int) or retries < 0):
+            raise ValueError(f"Retries of device {name} must be a non-negative integer, got {retries!r}")
+        tool_args = []
+        for key, value in config.items():
+            if isinstance(value, bool):
+                if value:
+                    tool_args.append(f"--{key}")
+                continue
+            tool_args.append(f"--{key}")
+            tool_args.append(str(value))
+        return cls(name, tool, tool_args, retries)
+
+    def __repr__(self):
+        return f"FleetDevice(name={self.name}, tool={self.tool}, tool_args={self.tool_args})"
+
+class FleetUpdateResult():
+    """Firmware update result for a device"""
+    def __init__(self, device, success, error=None, duration=0.0, stats=None):
+        """Class initialization
+
+        :param device: Device that was updated
+        :type device: FleetDevice
+        :param success: True if the update was successful
+        :type success: bool
+        :param error: Error description for a failed update, defaults to None
+        :type error: str, optional
+        :param duration: Update duration in seconds, defaults to 0.0
+        :type duration: float, optional
+        :param stats: MDFU session statistics, defaults to None when the update
+        failed before the session started
+        :type stats: SessionStats, optional
+        """
+        self.device = device
+        self.success = success
+        self.error = error
+        self.duration = duration
+        self.stats = stats
+
+    def __str__(self):
+        status = "success" if self.success else f"failed ({self.error})"
+        return f"{self.device.name}: {status} in {self.duration:.2f}s"
+
+class MdfuFleetUpdater():
+    """Update multiple MDFU clients in parallel
+
+    Each device is updated by a worker of a bounded thread pool with its own
+    tool, transport and MDFU host instance. The image is shared between all
+    workers without copying it, and the encoded write chunk frames are shared
+    through a frame cache so that each image chunk is only encoded once per
+    client buffer size and transport.
+    """
+    def __init__(self, devices, max_workers=4, retries=5, windowed=False, frame_cache=None):
+        """Class initialization
+
+        :param devices: Devices to update
+        :type devices: list(FleetDevice)
+        :param max_workers: Maximum number of devices that are updated at the same time,
+        defaults to 4
+        :type max_workers: int, optional
+        :param retries: Default number of retries for devices without retries setting,
+        defaults to 5
+        :type retries: int, optional
+        :param windowed: Use windowed write chunk transfers, defaults to False
+        :type windowed: bool, optional
+        :param frame_cache: Cache for encoded write chunk frames, defaults to None
+        which creates an in-memory cache for the updater
+        :type frame_cache: FrameCache, optional
+        """
+        if max_workers < 1:
+            raise ValueError("Number of workers must be at least one")
+        self.devices = devices
+        self.max_workers = max_workers
+        self.retries = retries
+        self.windowed = windowed
+        self.frame_cache = frame_cache if frame_cache is not None else FrameCache()
+        self.logger = getLogger("pymdfu.MdfuFleetUpdater")
+
+    def run(self, image):
+        """Update all devices
+
+        :param image: Firmware image
+        :type image: Bytes like object or ImageSource
+        :return: Update results in the same order as the devices
+        :rtype: list(FleetUpdateResult)
+        """
+        if not isinstance(image, ImageSource):
+            image = ImageSource(image)
+        workers = min(self.max_workers, len(self.devices)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mdfu-fleet") as executor:
+            futures = [executor.submit(self._update_device, device, image) for device in self.devices]
+            return [future.result() for future in futures]
+
+    def _update_device(self, device, image):
+        """Update a single device
+
+        :param device: Device to update
+        :type device: FleetDevice
+        :param image: Firmware image
+        :type image: ImageSource
+        :return: Update result
+        :rtype: FleetUpdateResult
+        """
+        start = time.perf_counter()
+        retries = self.retries if device.retries is None else device.retries
+        mdfu = None
+        try:
+            tool = ToolFactory.get_tool(device.tool, tool_args=list(device.tool_args))
+            mdfu = Mdfu(tool, retries=retries, windowed=self.windowed, frame_cache=self.frame_cache)
+            mdfu.run_upgrade(image)
+        except (ValueError, OSError, MacError, TransportError, MdfuUpdateError) as exc:
+            result = FleetUpdateResult(device, False, str(exc), time.perf_counter() - start,
+                                       stats=mdfu.stats if mdfu else None)
+            self.logger.error("Upgrade of %s failed: %s", device.name, exc)
+        else:
+            result = FleetUpdateResult(device, True, duration=time.perf_counter() - start, stats=mdfu.stats)
+            self.logger.info("Upgrade of %s finished successfully", device.name)
+        return result
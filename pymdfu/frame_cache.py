@@ -0,0 +1,229 @@
+"""Cache for encoded Write Chunk transport frames
+
+Updating several devices with the same image, or updating a device again,
+splits the image into the same chunks and encodes the same transport frames
+each time. The frame cache keeps the encoded frames of an image as frame
+templates, so sending a chunk only needs a copy of the template with the
+sequence number and frame check sequence filled in.
+"""
+import os
+import hashlib
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from logging import getLogger
+from pymdfu.mdfu import MdfuCmd, MdfuCmdPacket
+from pymdfu.transport import FrameTemplate
+from pymdfu.transport.uart_transport import UartTransport
+from pymdfu.transport.spi_transport import SpiTransport
+from pymdfu.transport.i2c_transport import I2cTransport
+
+# Transport classes that can encode frame templates, by name as used in cache files
+frame_encoders = {encoder.__name__: encoder for encoder in [UartTransport, SpiTransport, I2cTransport]}
+
+class FrameStore():
+    """Write Chunk frame templates of an image for a buffer size and transport"""
+    def __init__(self, encoder, templates):
+        """Class initialization
+
+        :param encoder: Transport class that encoded the frames
+        :type encoder: type
+        :param templates: Frame templates in chunk order
+        :type templates: list(FrameTemplate)
+        """
+        self.encoder = encoder
+        self.templates = templates
+
+    def __len__(self):
+        return len(self.templates)
+
+    def __iter__(self):
+        return iter(self.templates)
+
+    @classmethod
+    def create(cls, image, buffer_size, encoder):
+        """Encode the Write Chunk frames of an image
+
+        :param image: Firmware image
+        :type image: ImageSource
+        :param buffer_size: Client buffer size, the image is split into chunks of this size
+        :type buffer_size: int
+        :param encoder: Transport class that encodes the frames
+        :type encoder: type
+        :return: Frame store
+        :rtype: FrameStore
+        """
+        templates = [FrameTemplate.create(encoder, MdfuCmdPacket(0, MdfuCmd.WRITE_CHUNK.value, chunk).to_binary())
+                     for chunk in image.chunks(buffer_size)]
+        return cls(encoder, templates)
+
+class FrameCache():
+    """Frame stores keyed by image digest, buffer size and transport
+
+    Frame stores are kept in memory and optionally in a cache directory so that
+    later runs can reuse them. The number of frame stores in memory can be
+    limited, the least recently used stores are then dropped from memory. The
+    cache can be shared between threads.
+    """
+    FILE_MAGIC = b"MDFUFRM2"
+    # SHA-256 digest of the data that follows it
+    DIGEST_SIZE = 32
+    # Number of frames, followed by head length, sequence field offset and checksum sum per frame
+    _COUNT = struct.Struct("<I")
+    _FRAME = struct.Struct("<IHH")
+
+    def __init__(self, directory=None, max_stores=None):
+        """Class initialization
+
+        :param directory: Directory for cache files, defaults to None which keeps
+        the frames in memory only
+        :type directory: str, optional
+        :param max_stores: Maximum number of frame stores kept in memory, defaults
+        to None for no limit
+        :type max_stores: int, optional
+        """
+        self.directory = directory
+        self.max_stores = max_stores
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = getLogger(__name__)
+
+    def get(self, image, buffer_size, encoder):
+        """Get the Write Chunk frames of an image
+
+        The frames are loaded from memory or the cache directory, or encoded
+        and added to the cache if they are not cached yet.
+
+        :param image: Firmware image
+        :type image: ImageSource
+        :param buffer_size: Client buffer size
+        :type buffer_size: int
+        :param encoder: Transport class that encodes the frames
+        :type encoder: type
+        :return: Frame store
+        :rtype: FrameStore
+        """
+        key = (image.sha256(), buffer_size, encoder.__name__)
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                store = self._load(key)
+                if store is None:
+                    store = FrameStore.create(image, buffer_size, encoder)
+                    self._save(key, store)
+                self._stores[key] = store
+                if self.max_stores is not None and len(self._stores) > self.max_stores:
+                    self._stores.popitem(last=False)
+            else:
+                self._stores.move_to_end(key)
+        return store
+
+    def _path(self, key):
+        digest, buffer_size, encoder_name = key
+        return os.path.join(self.directory, f"{digest}-{buffer_size}-{encoder_name}.frames")
+
+    def _load(self, key):
+        """Load a frame store from the cache directory
+
+        :param key: Cache key
+        :type key: tuple(str, int, str)
+        :return: Frame store or None if it is not in the cache directory or the file is invalid
+        :rtype: FrameStore or None
+        """
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            self.logger.debug("Reading frame cache file %s failed: %s", path, exc)
+            return None
+        try:
+            store = self.decode(data, frame_encoders[key[2]])
+        except (struct.error, ValueError) as exc:
+            self.logger.debug("Ignoring invalid frame cache file %s: %s", path, exc)
+            return None
+        self.logger.debug("Loaded %d frames from %s", len(store), path)
+        return store
+
+    def _save(self, key, store):
+        """Store a frame store in the cache directory
+
+        The file is written under a temporary name and then renamed so that
+        concurrent runs never read a partially written file.
+
+        :param key: Cache key
+        :type key: tuple(str, int, str)
+        :param store: Frame store
+        :type store: FrameStore
+        """
+        if self.directory is None or key[2] not in frame_encoders:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(self.encode(store))
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as exc:
+            self.logger.warning("Writing frame cache to %s failed: %s", self.directory, exc)
+
+    @classmethod
+    def encode(cls, store):
+        """Serialize a frame store
+
+        :param store: Frame store
+        :type store: FrameStore
+        :return: Serialized frame store
+        :rtype: bytes
+        """
+        parts = [cls._COUNT.pack(len(store))]
+        for template in store:
+            parts.append(cls._FRAME.pack(len(template.head), template.sequence_offset, template.checksum_sum))
+            parts.append(template.head)
+        data = b"".join(parts)
+        return cls.FILE_MAGIC + hashlib.sha256(data).digest() + data
+
+    @classmethod
+    def decode(cls, data, encoder):
+        """Deserialize a frame store
+
+        :param data: Serialized frame store
+        :type data: Bytes like object
+        :param encoder: Transport class that encoded the frames
+        :type encoder: type
+        :raises ValueError: For invalid data
+        :return: Frame store
+        :rtype: FrameStore
+        """
+        if data[:len(cls.FILE_MAGIC)] != cls.FILE_MAGIC:
+            raise ValueError("Invalid file header")
+        offset = len(cls.FILE_MAGIC)
+        # The stored checksum sums are used as is when sending frames, a corrupted
+        # file would otherwise result in frames with valid check sequences but wrong data
+        digest = data[offset:offset + cls.DIGEST_SIZE]
+        offset += cls.DIGEST_SIZE
+        if hashlib.sha256(data[offset:]).digest() != digest:
+            raise ValueError("Digest mismatch")
+        count, = cls._COUNT.unpack_from(data, offset)
+        offset += cls._COUNT.size
+        templates = []
+        for _ in range(count):
+            size, sequence_offset, checksum_sum = cls._FRAME.unpack_from(data, offset)
+            offset += cls._FRAME.size
+            head = bytes(data[offset:offset + size])
+            if len(head) != size or sequence_offset >= size:
+                raise ValueError("Truncated frame data")
+            offset += size
+            templates.append(FrameTemplate(encoder, head, sequence_offset, checksum_sum))
+        if offset != len(data):
+            raise ValueError("Unexpected data after last frame")
+        return FrameStore(encoder, templates)
@@ -0,0 +1,100 @@
+"""Firmware image source
+"""
+import hashlib
+import mmap
+
+class ImageSource():
+    """Firmware image source
+
+    Provides the image in chunks without copying the image data. The image
+    can either be a bytes like object or a file that is memory mapped so that
+    only the pages currently transferred are loaded into memory.
+    """
+    def __init__(self, data):
+        """Class initialization
+
+        :param data: Image data
+        :type data: Bytes like object
+        """
+        self._data = data
+        self._file = None
+        self._sha256 = None
+
+    @classmethod
+    def from_file(cls, path):
+        """Create an image source from a file
+
+        The file is memory mapped if possible, otherwise it is read into memory.
+
+        :param path: Path to the image file
+        :type path: str
+        :raises FileNotFoundError: When the file does not exist
+        :return: Image source
+        :rtype: ImageSource
+        """
+        file = open(path, "rb") #pylint: disable=consider-using-with
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and some special files can't be memory mapped
+            data = file.read()
+            file.close()
+            return cls(data)
+        source = cls(data)
+        source._file = file
+        return source
+
+    def __len__(self):
+        return len(self._data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close image source
+
+        Releases the memory map and the file if the image source was created from a file.
+        """
+        if self._file is not None:
+            try:
+                self._data.close()
+            except BufferError:
+                # Chunks of the image are still referenced, the memory map
+                # will be released when the last chunk is garbage collected.
+                pass
+            self._file.close()
+            self._file = None
+
+    def sha256(self):
+        """SHA-256 digest of the image
+
+        The digest is calculated on the first call and then reused.
+
+        :return: Hex digest
+        :rtype: str
+        """
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self._data).hexdigest()
+        return self._sha256
+
+    def chunks(self, chunk_size, padding=None):
+        """Iterate over the image in chunks
+
+        :param chunk_size: Chunk size
+        :type chunk_size: int
+        :param padding: Byte value to pad the last chunk with if the image size is not
+        a multiple of chunk_size, optional, default None = do not pad
+        :type padding: int
+        :return: Generator yielding chunks of the image
+        :rtype: Generator of memoryview (bytes for a padded last chunk)
+        """
+        view = memoryview(self._data)
+        size = len(view)
+        for i in range(0, size, chunk_size):
+            chunk = view[i:i + chunk_size]
+            if padding is not None and len(chunk) < chunk_size:
+                chunk = bytes(chunk) + bytes([padding]) * (chunk_size - len(chunk))
+            yield chunk
@@ -1,6 +1,6 @@
 """Common MAC layer functions"""
 import socket
-from collections import deque
+from .mac import MacBuffer
 from .network_mac import MacSocketPair, MacSocketClient, MacSocketHost
 from .packet_mac import MacPacket
 from .bytes_mac import MacBytes
@@ -20,8 +20,8 @@ class MacFactory():
         :return: Linked MAC objects that can be injected into host/client transport layer
         :rtype: (MacPacket, MacPacket)
         """
-        host_in = deque()
-        client_in = deque()
+        host_in = MacBuffer()
+        client_in = MacBuffer()
         host = MacPacket(host_in, client_in, timeout=timeout)
         client = MacPacket(client_in, host_in, timeout=timeout)
         return host, client
@@ -35,8 +35,8 @@ class MacFactory():
         :return: Linked MAC objects that can be injected into host/client transport layer
         :rtype: (MacPacket, MacPacket)
         """
-        host_in = deque()
-        client_in = deque()
+        host_in = MacBuffer()
+        client_in = MacBuffer()
         host = MacBytes(host_in, client_in, timeout=timeout)
         client = MacBytes(client_in, host_in, timeout=timeout)
         return host, client
@@ -61,7 +61,7 @@ class MacFactory():
         return host, client
 
     @classmethod
-    def get_socket_client_mac(cls, timeout=5, host="localhost", port=5557):
+    def get_socket_client_mac(cls, timeout=5, host="localhost", port=5557, connect_timeout=5, options=None):
         """Create a client socket based MAC (MDFU host)
 
         From a socket connection point of view this is a client socket but
@@ -73,14 +73,19 @@ class MacFactory():
         :type host: str, optional
         :param port: Host port, defaults to 5557
         :type port: int, optional
+        :param connect_timeout: Connection timeout in seconds, defaults to 5
+        :type connect_timeout: float, optional
+        :param options: Socket options, defaults to None which uses the SocketOptions defaults
+        :type options: SocketOptions, optional
         :return: MAC layer
         :rtype: MacSocketClient
         """
-        client = MacSocketClient(port, host=host, timeout=timeout)
+        client = MacSocketClient(port, host=host, timeout=timeout, connect_timeout=connect_timeout,
+                                 options=options)
         return client
 
     @classmethod
-    def get_socket_host_mac(cls, host="localhost", port=5557, timeout=3):
+    def get_socket_host_mac(cls, host="localhost", port=5557, timeout=3, options=None):
         """Create a host socket based MAC (MDFU client)
 
         From a socket connection point of view this is a host socket but
@@ -93,8 +98,10 @@ class MacFactory():
         :type host: str, optional
         :param port: Port to listen on for connections, defaults to 5557
         :type port: int, optional
+        :param options: Socket options, defaults to None which uses the SocketOptions defaults
+        :type options: SocketOptions, optional
         :return: Mac layer
         :rtype: MacSocketHost
         """
-        server = MacSocketHost(host, port, timeout=timeout)
+        server = MacSocketHost(host, port, timeout=timeout, options=options)
         return server
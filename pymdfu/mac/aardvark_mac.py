@@ -75,6 +75,8 @@ class MacAardvarkI2c(MacAardvark):
         self.clock_speed = clock_speed
         self._inter_transaction_delay = inter_transaction_delay
         self.itd_timer = Timer(0)
+        # Accumulated time in seconds spent waiting for the inter transaction delay
+        self.itd_wait_time = 0.0
         self.address = address
         self.pull_ups = pull_ups
         self.timeout_ms = timeout
@@ -129,8 +131,7 @@ class MacAardvarkI2c(MacAardvark):
         try:
             # Do not start a new transaction before the delay between this and
             # the last transaction has expired
-            while not self.itd_timer.expired():
-                pass
+            self.itd_wait_time += self.itd_timer.wait()
             self.dev.i2c_master_write(self.address, data)
         except (IOError) as exc:
             errno, *_ =  exc.args
@@ -156,8 +157,7 @@ class MacAardvarkI2c(MacAardvark):
         try:
             # Do not start a new transaction before the delay between this and
             # the last transaction has expired
-            while not self.itd_timer.expired():
-                pass
+            self.itd_wait_time += self.itd_timer.wait()
             data = self.dev.i2c_master_read(self.address, size)
         except IOError as exc:
             errno, *_ =  exc.args
@@ -196,6 +196,8 @@ class MacAardvarkSpi(MacAardvark):
         self.clock_speed = clock_speed
         self._inter_transaction_delay = inter_transaction_delay
         self.itd_timer = Timer(0)
+        # Accumulated time in seconds spent waiting for the inter transaction delay
+        self.itd_wait_time = 0.0
         if mode not in (0,3):
             raise ValueError(f"SPI mode {mode} not supported, use 0 or 3.")
         if cs_polarity == "low":
@@ -259,8 +261,7 @@ class MacAardvarkSpi(MacAardvark):
         try:
             # Do not start a new transaction before the delay between this and
             # the last transaction has expired
-            while not self.itd_timer.expired():
-                pass
+            self.itd_wait_time += self.itd_timer.wait()
             self.rx_data_buf = self.dev.spi_write(data)
             # Set inter transaction delay timer for next transaction
             self.itd_timer.set(self._inter_transaction_delay)
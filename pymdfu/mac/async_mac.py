@@ -0,0 +1,204 @@
+"""Asynchronous MAC layers for asyncio based transports
+
+The MAC layers in this module do not implement timeouts. A read waits until
+data is available and the transport layer limits the wait time by cancelling
+the read when its timeout expires.
+"""
+import asyncio
+from logging import getLogger
+from pymdfu.mac.exceptions import MacError
+from pymdfu.mac.serial_mac import MacSerialPort
+from pymdfu.mac.network_mac import MacSocketPacketClient
+
+class AsyncMacSocketClient():
+    """Asynchronous socket based MAC
+    """
+    def __init__(self, port, host='localhost', connect_timeout=5):
+        """Class initialization
+
+        :param port: Port to connect to
+        :type port: int
+        :param host: Host name or IP address to connect to, defaults to 'localhost'
+        :type host: str, optional
+        :param connect_timeout: Connection timeout in seconds, defaults to 5
+        :type connect_timeout: int, optional
+        """
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.reader = None
+        self.writer = None
+        self.opened = False
+        self.logger = getLogger("mac.AsyncMacSocketClient")
+
+    async def open(self):
+        """Open MAC layer
+
+        :raises MacError: When the connection can't be established
+        """
+        if not self.opened:
+            try:
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as exc:
+                raise MacError(f"Connection to {self.host}:{self.port} failed: {exc}") from exc
+            self.opened = True
+
+    async def close(self):
+        """Close MAC layer
+        """
+        if self.opened:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.opened = False
+
+    async def write(self, data):
+        """Write to MAC layer
+
+        :param data: Data to write.
+        :type data: Bytes like object
+        """
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def read(self, size):
+        """Read from MAC layer
+
+        Waits until data is available and returns up to size bytes.
+
+        :param size: Maximum number of bytes to read
+        :type size: int
+        :raises MacError: When the connection was closed by the peer
+        :return: Data read
+        :rtype: bytes
+        """
+        data = await self.reader.read(size)
+        if not data:
+            raise MacError("Connection closed by peer")
+        return data
+
+class AsyncMacSocketPacketClient(AsyncMacSocketClient):
+    """Asynchronous socket based MAC with packet framing
+
+    Uses the same framing as MacSocketPacketClient.
+    """
+    FRAME_HEADER = b"MDFU"
+    FRAME_HEADER_SIZE = MacSocketPacketClient.FRAME_HEADER_SIZE
+    FRAME_LENGTH_SIZE = MacSocketPacketClient.FRAME_LENGTH_SIZE
+
+    def __init__(self, host='localhost', port=5559, connect_timeout=5):
+        """Class initialization
+
+        :param host: Host name or IP address to connect to, defaults to 'localhost'
+        :type host: str, optional
+        :param port: Port to connect to, defaults to 5559
+        :type port: int, optional
+        :param connect_timeout: Connection timeout in seconds, defaults to 5
+        :type connect_timeout: int, optional
+        """
+        super().__init__(port, host=host, connect_timeout=connect_timeout)
+        self.logger = getLogger("mac.AsyncMacSocketPacketClient")
+
+    async def write(self, data):
+        """Write a packet to the MAC layer
+
+        :param data: Packet to send
+        :type data: Bytes like object
+        """
+        frame = self.FRAME_HEADER + len(data).to_bytes(self.FRAME_LENGTH_SIZE, byteorder="little") + data
+        await super().write(frame)
+
+    async def read(self, size=0): #pylint: disable=unused-argument
+        """Read a packet from the MAC layer
+
+        :param size: The size of the packet to read. This parameter is ignored
+        but kept for API compatibility with a stream based MAC layer.
+        :type size: int, optional
+        :raises MacError: When the connection was closed or the framing is out of sync
+        :return: Packet
+        :rtype: bytes
+        """
+        try:
+            header = await self.reader.readexactly(self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)
+            if header[:self.FRAME_HEADER_SIZE] != self.FRAME_HEADER:
+                raise MacError("Packet MAC out of sync")
+            size = int.from_bytes(header[self.FRAME_HEADER_SIZE:], byteorder="little")
+            return await self.reader.readexactly(size)
+        except asyncio.IncompleteReadError as exc:
+            raise MacError("Connection closed by peer") from exc
+
+class AsyncMacSerialPort():
+    """Asynchronous MAC for a serial port
+
+    Waits for incoming data with the event loop's reader callbacks where the
+    platform supports it (POSIX), otherwise the port is polled.
+    """
+    POLLING_INTERVAL = 0.001
+
+    def __init__(self, port, baudrate, bytesize=8, parity='N', stopbits=1):
+        """Class initialization
+
+        :param port: Serial port e.g. COM11 or /dev/ttyACMS0
+        :type port: str
+        :param baudrate: Baudrate
+        :type baudrate: int
+        """
+        # Non-blocking serial port, reads return immediately with available data
+        self.serial = MacSerialPort(port, baudrate, timeout=0, bytesize=bytesize, parity=parity,
+                                    stopbits=stopbits)
+
+    async def open(self):
+        """Open MAC layer
+
+        :raises MacError: When the serial port can't be opened
+        """
+        self.serial.open()
+
+    async def close(self):
+        """Close MAC layer
+        """
+        self.serial.close()
+
+    async def write(self, data):
+        """Write to MAC layer
+
+        :param data: Data to write.
+        :type data: Bytes like object
+        """
+        # Serial writes only block until the data is in the OS buffer
+        self.serial.write(data)
+
+    async def read(self, size):
+        """Read from MAC layer
+
+        Waits until data is available and returns up to size bytes.
+
+        :param size: Maximum number of bytes to read
+        :type size: int
+        :return: Data read
+        :rtype: bytes
+        """
+        while True:
+            data = self.serial.read(size)
+            if data:
+                return data
+            await self._wait_readable()
+
+    async def _wait_readable(self):
+        """Wait until the serial port has data available
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            fd = self.serial.fileno()
+            readable = loop.create_future()
+            loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        except (AttributeError, NotImplementedError):
+            await asyncio.sleep(self.POLLING_INTERVAL)
+            return
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
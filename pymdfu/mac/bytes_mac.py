@@ -1,18 +1,16 @@
 """Bytes based MAC"""
-from collections import deque
-from pymdfu.mac.mac import Mac
-from pymdfu.timeout import Timer
+from pymdfu.mac.mac import Mac, MacBuffer
 
 class MacBytes(Mac):
     """Bytes based MAC
     """
-    def __init__(self, buffer_in: deque, buffer_out: deque, timeout=1):
+    def __init__(self, buffer_in: MacBuffer, buffer_out: MacBuffer, timeout=1):
         """Class initialization
 
         :param buffer_in: MAC layer input buffer
-        :type buffer_in: deque
+        :type buffer_in: MacBuffer
         :param buffer_out: MAC layer output buffer
-        :type buffer_out: deque
+        :type buffer_out: MacBuffer
         :param timeout: Read timeout in seconds, defaults to 1
         timeout = None -> blocking read without timeout
         timeout = 0 -> non-blocking read, return immediately with up to the requested number of bytes
@@ -30,8 +28,7 @@ class MacBytes(Mac):
         :param data: Data to write.
         :type data: bytes, bytearray
         """
-        for byte in data:
-            self.buffer_in.appendleft(byte)
+        self.buffer_in.put(data)
 
     def read(self, size):
         """Read from MAC layer
@@ -48,23 +45,15 @@ class MacBytes(Mac):
         return_size = size
         available = len(self.buffer_out)
         if size > available:
-            if self.timeout is None:
-                while size > len(self.buffer_out):
-                    pass
-            elif self.timeout == 0:
+            if self.timeout == 0:
                 return_size = available
             else:
-                timer = Timer(self.timeout)
-                while not timer.expired() and (size > len(self.buffer_out)):
-                    pass
-                if timer.expired():
-                    available = len(self.buffer_out)
-                    return_size = size if available > size else available
+                # Block until enough data is available, timeout = None blocks without timeout
+                self.buffer_out.wait_for(lambda: len(self.buffer_out) >= size, self.timeout)
+                available = len(self.buffer_out)
+                return_size = size if available > size else available
 
-        data = bytearray()
-        for _ in range(return_size):
-            data.append(self.buffer_out.pop())
-        return data
+        return bytearray(self.buffer_out.pop() for _ in range(return_size))
 
     def __len__(self):
         """Get number of bytes available to read from MAC
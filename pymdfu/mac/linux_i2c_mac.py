@@ -9,6 +9,32 @@ from pymdfu.mac.mac import Mac
 from pymdfu.mac.exceptions import MacError, MacI2cNackError
 from pymdfu.timeout import Timer
 
+class I2cMsg(ctypes.Structure):
+    """I2C message, struct i2c_msg from <uapi/linux/i2c.h>"""
+    _fields_ = [
+        ("addr", ctypes.c_uint16),
+        ("flags", ctypes.c_uint16),
+        ("len", ctypes.c_uint16),
+        ("buf", ctypes.POINTER(ctypes.c_uint8))]
+
+class I2cRdwrIoctlData(ctypes.Structure):
+    """I2C_RDWR ioctl argument, struct i2c_rdwr_ioctl_data from <uapi/linux/i2c-dev.h>"""
+    _fields_ = [
+        ("msgs", ctypes.POINTER(I2cMsg)),
+        ("nmsgs", ctypes.c_uint32)]
+
+    def __init__(self, msgs, nmsgs=0):
+        """Class initialization
+
+        :param msgs: I2C messages
+        :type msgs: Array of I2cMsg
+        :param nmsgs: Number of messages in the transaction, defaults to 0
+        :type nmsgs: int, optional
+        """
+        super().__init__()
+        self.msgs = msgs
+        self.nmsgs = nmsgs
+
 class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
     """MAC layer for Linux I2C subsystem
     """
@@ -45,6 +71,9 @@ class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
 
     I2C_RDWR_IOCTL_MAX_MSGS	= 42
 
+    # Initial size of the transfer buffers, they grow when larger transfers are requested
+    INITIAL_BUFFER_SIZE = 64
+
     def __init__(self, dev_path, address, timeout=0.2, inter_transaction_delay=0.01):
         """Linux I2C MAC layer initialization
     
@@ -67,6 +96,19 @@ class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
         self.timeout = timeout
         self._inter_transaction_delay = inter_transaction_delay
         self.itd_timer = Timer(0)
+        # Accumulated time in seconds spent waiting for the inter transaction delay
+        self.itd_wait_time = 0.0
+        # Adapter functionality mask, read when the MAC is opened
+        self.funcs = 0
+        # Messages and ioctl argument are allocated once and reused for all I2C_RDWR transfers
+        self._msgs = (I2cMsg * 2)()
+        self._rdwr_data = I2cRdwrIoctlData(self._msgs, 0)
+        self._tx_buf = None
+        self._tx_cbuf = None
+        self._rx_buf = None
+        self._rx_cbuf = None
+        self._alloc_tx_buffer(self.INITIAL_BUFFER_SIZE)
+        self._alloc_rx_buffer(self.INITIAL_BUFFER_SIZE)
 
     def __del__(self):
         self.close()
@@ -89,6 +131,7 @@ class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
             # Get I2C adapter functionality
             buf = array.array('I', [0])
             fcntl.ioctl(self._fd, MacLinuxI2c.I2C_FUNCS, buf, True)
+            self.funcs = buf[0]
 
             # Set timeout is in units of 10 ms
             timeout = ctypes.c_ulong(int(self.timeout * 100))
@@ -125,6 +168,78 @@ class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
         """
         self._inter_transaction_delay = delay
 
+
+    @property
+    def rdwr_supported(self):
+        """Check if transfers are done with the I2C_RDWR ioctl
+
+        Adapters that only support SMBus transfers do not implement I2C_RDWR and
+        the plain read and write system calls are used instead.
+
+        :return: True if the adapter supports plain I2C transfers
+        :rtype: bool
+        """
+        return bool(self.funcs & self.I2C_FUNC_I2C)
+
+    def _alloc_tx_buffer(self, size):
+        self._tx_buf = bytearray(size)
+        self._tx_cbuf = (ctypes.c_uint8 * size).from_buffer(self._tx_buf)
+
+    def _alloc_rx_buffer(self, size):
+        self._rx_buf = bytearray(size)
+        self._rx_cbuf = (ctypes.c_uint8 * size).from_buffer(self._rx_buf)
+
+    def _set_write_msg(self, index, data):
+        """Copy data into the transmit buffer and set up a write message
+
+        :param index: Message index
+        :type index: int
+        :param data: Data to write, a list or tuple of buffers is written as one message
+        :type data: Bytes like object, list or tuple
+        """
+        buffers = data if isinstance(data, (list, tuple)) else (data,)
+        size = sum(len(buffer) for buffer in buffers)
+        if size > len(self._tx_buf):
+            self._alloc_tx_buffer(size)
+        offset = 0
+        for buffer in buffers:
+            self._tx_buf[offset:offset + len(buffer)] = buffer
+            offset += len(buffer)
+        msg = self._msgs[index]
+        msg.addr = self.address
+        msg.flags = 0
+        msg.len = size
+        msg.buf = self._tx_cbuf
+
+    def _set_read_msg(self, index, buf, size):
+        """Set up a read message that stores the data in a buffer
+
+        :param index: Message index
+        :type index: int
+        :param buf: Writable buffer that receives the data
+        :type buf: bytearray, memoryview
+        :param size: Number of bytes to read
+        :type size: int
+        """
+        msg = self._msgs[index]
+        msg.addr = self.address
+        msg.flags = self.I2C_M_RD
+        msg.len = size
+        if buf is self._rx_buf:
+            msg.buf = self._rx_cbuf
+        else:
+            msg.buf = (ctypes.c_uint8 * size).from_buffer(buf)
+
+    def _transfer(self, nmsgs):
+        """Run the prepared messages in a single I2C_RDWR transaction
+
+        :param nmsgs: Number of messages
+        :type nmsgs: int
+        :raises OSError: When the ioctl fails
+        """
+        self._rdwr_data.nmsgs = nmsgs
+        fcntl.ioctl(self._fd, self.I2C_RDWR, self._rdwr_data)
+
     def write(self, data):
         """I2C write transaction
 
@@ -132,12 +247,37 @@ class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
         :type data: bytes, bytearray
         :raises MacError: When transfer does not finish successfully
         """
+        self._write(data)
+
+    def write_vectored(self, buffers):
+        """I2C write transaction with data from several buffers
+
+        The buffers are copied directly into the transmit buffer of the I2C_RDWR
+        message. i2c-dev does not support vectored writes, os.writev would send each
+        buffer in its own transaction.
+
+        :param buffers: I2C data to send
+        :type buffers: Sequence of bytes like objects
+        :raises MacError: When transfer does not finish successfully
+        """
+        self._write(tuple(buffers))
+
+    def _write(self, data):
+        """I2C write transaction
+
+        :param data: I2C data to send, a tuple of buffers is sent in one transaction
+        :type data: Bytes like object or tuple
+        :raises MacError: When transfer does not finish successfully
+        """
         try:
             # Do not start a new transaction before the delay between this and
             # the last transaction has expired
-            while not self.itd_timer.expired():
-                pass
-            self._fs.write(data)
+            self.itd_wait_time += self.itd_timer.wait()
+            if self.rdwr_supported:
+                self._set_write_msg(0, data)
+                self._transfer(1)
+            else:
+                self._fs.write(b"".join(data) if isinstance(data, tuple) else data)
         except OSError as exc:
             # Most Linux I2C drivers seem to use -EREMOTEIO in the kernel space to indicate a device NACK. However,
             # this error code does not have an equivalent user space code so the syscall interface will translate
@@ -153,17 +293,29 @@ class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
             # Set inter transaction delay timer for next transaction
             self.itd_timer.set(self._inter_transaction_delay)
 
-    def read(self, size):
-        """I2C read transaction
+    def readinto(self, buf):
+        """I2C read transaction into a preallocated buffer
 
-        :param size: Number of bytes to read from I2C client
-        :type size: int
+        :param buf: Writable buffer that receives the data, its length determines the
+        number of bytes to read
+        :type buf: bytearray, memoryview
+        :raises MacI2cNackError: When the client NACKs the transaction
         :raises MacError: When transfer encounters an error
-        :return: Data read from I2C client
-        :rtype: bytearray
+        :return: Number of bytes read
+        :rtype: int
         """
+        return self._readinto(buf, len(buf))
+
+    def _readinto(self, buf, size):
         try:
-            data = self._fs.read(size)
+            if self.rdwr_supported:
+                self._set_read_msg(0, buf, size)
+                self._transfer(1)
+                return size
+            if size == len(buf):
+                return self._fs.readinto(buf)
+            with memoryview(buf) as view:
+                return self._fs.readinto(view[:size])
         except OSError as exc:
             # Most Linux I2C drivers seem to use -EREMOTEIO in the kernel space to indicate a device NACK. However,
             # this error code does not have an equivalent user space code so the syscall interface will translate
@@ -176,4 +328,72 @@ class MacLinuxI2c(Mac): # pylint: disable=too-many-instance-attributes
         finally:
             # Set inter transaction delay timer for next transaction
             self.itd_timer.set(self._inter_transaction_delay)
-        return data
+
+    def read(self, size):
+        """I2C read transaction
+
+        :param size: Number of bytes to read from I2C client
+        :type size: int
+        :raises MacError: When transfer encounters an error
+        :return: Data read from I2C client
+        :rtype: bytearray
+        """
+        if size > len(self._rx_buf):
+            self._alloc_rx_buffer(size)
+        size = self._readinto(self._rx_buf, size)
+        return self._rx_buf[:size]
+
+    def write_readinto(self, data, buf):
+        """Combined write and read transaction
+
+        The data is written and the read follows after a repeated start condition
+        without releasing the bus in between. Adapters without I2C_RDWR support
+        run a write and a read transaction instead.
+
+        :param data: Data to send
+        :type data: Bytes like object
+        :param buf: Writable buffer that receives the data, its length determines the
+        number of bytes to read
+        :type buf: bytearray, memoryview
+        :raises MacI2cNackError: When the client NACKs the transaction
+        :raises MacError: When transfer encounters an error
+        :return: Number of bytes read
+        :rtype: int
+        """
+        return self._write_readinto(data, buf, len(buf))
+
+    def _write_readinto(self, data, buf, size):
+        if not self.rdwr_supported:
+            self.write(data)
+            return self._readinto(buf, size)
+        try:
+            self.itd_wait_time += self.itd_timer.wait()
+            self._set_write_msg(0, data)
+            self._set_read_msg(1, buf, size)
+            self._transfer(2)
+            return size
+        except OSError as exc:
+            # A NACK of either the address or the data aborts the whole transaction so
+            # the transport layer has to poll again
+            if errno.EIO == exc.args[0]:
+                raise MacI2cNackError() from exc
+            raise MacError(f"ioctl returned error code {exc.args[0]} - {exc.args[1]}") from exc
+        finally:
+            self.itd_timer.set(self._inter_transaction_delay)
+
+    def write_read(self, data, size):
+        """Combined write and read transaction
+
+        :param data: Data to send
+        :type data: Bytes like object
+        :param size: Number of bytes to read from I2C client
+        :type size: int
+        :raises MacI2cNackError: When the client NACKs the transaction
+        :raises MacError: When transfer encounters an error
+        :return: Data read from I2C client
+        :rtype: bytearray
+        """
+        if size > len(self._rx_buf):
+            self._alloc_rx_buffer(size)
+        size = self._write_readinto(data, self._rx_buf, size)
+        return self._rx_buf[:size]
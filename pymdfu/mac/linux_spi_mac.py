@@ -56,6 +56,9 @@ class MacLinuxSpi(Mac):
     SPI_LSB_FIRST   = 1 << 3 # per-word bits-on-wire
     SPI_CS_WORD     = 1 << 12 # toggle cs after each word
 
+    # Initial size of the transfer buffer, it grows when larger transfers are requested
+    INITIAL_BUFFER_SIZE = 64
+
     def __init__(self, dev_path, mode, max_speed, bit_order="msb", extra_flags=0, inter_transaction_delay=10e-3):
         """Linux SPI MAC layer initialization
 
@@ -80,7 +83,15 @@ class MacLinuxSpi(Mac):
         self.logger = logging.getLogger(__name__)
         self._fd = None
         self._fs = None
-        self.rx_data = bytearray()
+        # Transfer descriptor and data buffer are allocated once and reused for all
+        # transfers, the received data overwrites the sent data in the buffer.
+        self._xfer = _CSpiIocTransfer()
+        self._buf = None
+        self._cbuf = None
+        self._buf_addr = 0
+        self._alloc_buffer(self.INITIAL_BUFFER_SIZE)
+        # Number of bytes received in the last transaction that were not read yet
+        self._rx_size = 0
         if not isinstance(dev_path, str):
             raise TypeError("Invalid devpath type, must be str.")
         if not isinstance(mode, int):
@@ -108,6 +119,8 @@ class MacLinuxSpi(Mac):
         # Create timer for inter transaction delay and set initial value to zero so
         # that there is no delay for the first transaction
         self.itd_timer = Timer(0)
+        # Accumulated time in seconds spent waiting for the inter transaction delay
+        self.itd_wait_time = 0.0
 
     @property
     def inter_transaction_delay(self):
@@ -170,32 +183,66 @@ class MacLinuxSpi(Mac):
             os.close(self._fd)
             self._fd = None
 
-    def write(self, data):
-        """SPI transaction
+    def _alloc_buffer(self, size):
+        self._buf = bytearray(size)
+        self._cbuf = (ctypes.c_uint8 * size).from_buffer(self._buf)
+        self._buf_addr = ctypes.addressof(self._cbuf)
 
-        :param data: SPI data to send. The received data must be obtained after the write with the read function.
-        :type data: bytes, bytearray
+    def _transfer(self, buffers):
+        """Run a SPI transaction
+
+        The data is copied into the transfer buffer where it is replaced with the
+        received data.
+
+        :param buffers: Data to send in the transaction
+        :type buffers: Sequence of bytes like objects
         :raises MacError: When transfer does not finish successfully
         """
-        # Create mutable array
-        buf = array.array('B', data)
-        buf_addr, buf_len = buf.buffer_info()
-
-        # Prepare transfer structure
+        size = sum(len(buffer) for buffer in buffers)
+        if size > len(self._buf):
+            self._alloc_buffer(size)
+        offset = 0
+        for buffer in buffers:
+            self._buf[offset:offset + len(buffer)] = buffer
+            offset += len(buffer)
         #pylint: disable=attribute-defined-outside-init
-        spi_xfer = _CSpiIocTransfer()
-        spi_xfer.tx_buf = buf_addr
-        spi_xfer.rx_buf = buf_addr
-        spi_xfer.len = buf_len
-
+        self._xfer.tx_buf = self._buf_addr
+        self._xfer.rx_buf = self._buf_addr
+        self._xfer.len = size
         try:
-            while not self.itd_timer.expired():
-                pass
-            fcntl.ioctl(self._fd, SpiIoctlRequest.SPI_IOC_MESSAGE_1.value, spi_xfer)
+            self.itd_wait_time += self.itd_timer.wait()
+            fcntl.ioctl(self._fd, SpiIoctlRequest.SPI_IOC_MESSAGE_1.value, self._xfer)
             self.itd_timer.set(self._inter_transaction_delay)
         except OSError as exc:
             raise MacError(f"ioctl returned error code {exc.args[0]} - {exc.args[1]}") from exc
-        self.rx_data = bytearray(buf)
+
+    def write(self, data):
+        """SPI transaction
+
+        :param data: SPI data to send. The received data must be obtained after the write with the read
+        or readinto function.
+        :type data: bytes, bytearray
+        :raises MacError: When transfer does not finish successfully
+        """
+        self._rx_size = 0
+        self._transfer((data,))
+        self._rx_size = len(data)
+
+    def write_vectored(self, buffers):
+        """SPI transaction with data from several buffers
+
+        The buffers are copied directly into the transfer buffer and sent in one
+        transaction. spidev does not support vectored writes, os.writev would send
+        each buffer in its own transaction.
+
+        :param buffers: SPI data to send. The received data must be obtained after the write with
+        the read or readinto function.
+        :type buffers: Sequence of bytes like objects
+        :raises MacError: When transfer does not finish successfully
+        """
+        self._rx_size = 0
+        self._transfer(buffers)
+        self._rx_size = sum(len(buffer) for buffer in buffers)
 
     def read(self, size): #pylint: disable=unused-argument
         """SPI read transaction
@@ -209,6 +256,23 @@ class MacLinuxSpi(Mac):
         :return: Data read from SPI client
         :rtype: bytearray
         """
-        data = self.rx_data
-        self.rx_data = bytearray()
+        data = self._buf[:self._rx_size]
+        self._rx_size = 0
         return data
+
+    def readinto(self, buf):
+        """SPI read transaction into a preallocated buffer
+
+        Same as read but the received data is copied into a buffer owned by the caller
+        instead of a newly allocated one.
+
+        :param buf: Writable buffer that receives the data
+        :type buf: bytearray, memoryview
+        :return: Number of bytes copied into the buffer
+        :rtype: int
+        """
+        size = min(len(buf), self._rx_size)
+        with memoryview(self._buf) as view:
+            buf[:size] = view[:size]
+        self._rx_size = 0
+        return size
@@ -1,4 +1,6 @@
 """Common MAC layer functions"""
+import threading
+from collections import deque
 
 class Mac():
     """Base class for MAC layer
@@ -11,3 +13,67 @@ class Mac():
 
     def close(self):
         """Close MAC layer"""
+
+def write_vectored(mac, buffers):
+    """Write several buffers to a MAC layer as one write
+
+    Uses the write_vectored method of MAC layers that can pass the buffers to
+    the operating system without joining them and joins the buffers for other
+    MAC layers.
+
+    :param mac: MAC layer
+    :type mac: Mac
+    :param buffers: Data to write
+    :type buffers: Sequence of bytes like objects
+    """
+    if len(buffers) == 1:
+        mac.write(buffers[0])
+        return
+    write = getattr(mac, "write_vectored", None)
+    if write is None:
+        mac.write(b"".join(buffers))
+    else:
+        write(buffers)
+
+class MacBuffer(deque):
+    """Buffer for linked MAC layers
+
+    A deque with a condition variable that is notified when data is added
+    so that a reader can block until data is available instead of polling.
+    """
+    def __init__(self, iterable=(), maxlen=None):
+        """Class initialization
+
+        :param iterable: Initial buffer content, defaults to empty
+        :type iterable: Iterable, optional
+        :param maxlen: Maximum buffer length, defaults to None (unbounded)
+        :type maxlen: int, optional
+        """
+        super().__init__(iterable, maxlen)
+        self.condition = threading.Condition()
+
+    def put(self, items):
+        """Add items to the buffer and wake up waiting readers
+
+        Items are added to the left side of the buffer and must be read from the
+        right side (pop) to maintain the order.
+
+        :param items: Items to add
+        :type items: Iterable
+        """
+        with self.condition:
+            self.extendleft(items)
+            self.condition.notify_all()
+
+    def wait_for(self, predicate, timeout=None):
+        """Wait until predicate is true
+
+        :param predicate: Callable that returns True when the wait condition is met
+        :type predicate: Callable
+        :param timeout: Timeout in seconds, defaults to None (wait forever)
+        :type timeout: float, optional
+        :return: Result of the predicate after waiting
+        :rtype: bool
+        """
+        with self.condition:
+            return self.condition.wait_for(predicate, timeout)
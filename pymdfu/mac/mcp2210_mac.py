@@ -28,6 +28,8 @@ class MacMcp2210(Mac):
         self.timeout_ms = timeout * 1000
         self._inter_transaction_delay = inter_transaction_delay
         self.itd_timer = Timer(0)
+        # Accumulated time in seconds spent waiting for the inter transaction delay
+        self.itd_wait_time = 0.0
         self.vid = 0x04d8
         self.pid = 0x00de
         mcp2210_devices = []
@@ -90,8 +92,7 @@ class MacMcp2210(Mac):
         try:
             # Do not start a new transaction before the delay between this and
             # the last transaction has expired
-            while not self.itd_timer.expired():
-                pass
+            self.itd_wait_time += self.itd_timer.wait()
             self.rx_data_buf = self.dev.spi_exchange(data, self.chip_select)
             # Set inter transaction delay timer for next transaction
             self.itd_timer.set(self._inter_transaction_delay)
@@ -40,6 +40,8 @@ class MacMcp2221a(Mac):
         self.dev.I2C_speed(self.clock_speed)
         self._inter_transaction_delay = inter_transaction_delay
         self.itd_timer = Timer(0)
+        # Accumulated time in seconds spent waiting for the inter transaction delay
+        self.itd_wait_time = 0.0
         self.logger = getLogger(__name__)
 
     def _calculate_timeout(self, clock_speed, system_latency=0.01, clock_stretch_delay=0.001):
@@ -115,8 +117,7 @@ class MacMcp2221a(Mac):
         try:
             # Do not start a new transaction before the delay between this and
             # the last transaction has expired
-            while not self.itd_timer.expired():
-                pass
+            self.itd_wait_time += self.itd_timer.wait()
             self.dev.I2C_write(self.address, data, kind="regular", timeout_ms=self.timeout_ms)
         # ValueError: if any parameter is not valid.
         # NotAckError: if the I2C slave didn't acknowledge.
@@ -150,8 +151,7 @@ class MacMcp2221a(Mac):
         try:
             # Do not start a new transaction before the delay between this and
             # the last transaction has expired
-            while not self.itd_timer.expired():
-                pass
+            self.itd_wait_time += self.itd_timer.wait()
             data = self.dev.I2C_read(self.address, size, kind="regular", timeout_ms=self.timeout_ms)
         # ValueError: if any parameter is not valid.
         # NotAckError: if the I2C slave didn't acknowledge.
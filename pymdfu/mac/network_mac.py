@@ -1,5 +1,6 @@
 """Networking MAC layer"""
 import socket
+import select
 import selectors
 import types
 import threading
@@ -8,10 +9,208 @@ from collections import deque
 from pymdfu.mac.mac import Mac
 from pymdfu.mac.exceptions import MacError
 from pymdfu.timeout import Timer
+from pymdfu.utils import LazyHex
+
+class SocketOptions():
+    """TCP socket options of the network MAC layers
+
+    MDFU sends small command and status frames and mostly waits for the answer
+    before the next frame is sent. Nagle's algorithm holds back a small segment
+    while a previous one is not acknowledged, and delayed acknowledgements hold
+    back that acknowledgement, which adds up to tens of milliseconds to a
+    command. Both are disabled by default.
+    """
+    def __init__(self, nodelay=True, quickack=True, send_buffer_size=None, recv_buffer_size=None):
+        """Class initialization
+
+        :param nodelay: Disable Nagle's algorithm (TCP_NODELAY), defaults to True
+        :type nodelay: bool, optional
+        :param quickack: Acknowledge received data immediately (TCP_QUICKACK), only
+        available on Linux and ignored on other platforms, defaults to True
+        :type quickack: bool, optional
+        :param send_buffer_size: Socket send buffer size in bytes (SO_SNDBUF), defaults to
+        None which keeps the operating system default
+        :type send_buffer_size: int, optional
+        :param recv_buffer_size: Socket receive buffer size in bytes (SO_RCVBUF), defaults to
+        None which keeps the operating system default
+        :type recv_buffer_size: int, optional
+        """
+        self.nodelay = nodelay
+        self.quickack = quickack and hasattr(socket, "TCP_QUICKACK")
+        self.send_buffer_size = send_buffer_size
+        self.recv_buffer_size = recv_buffer_size
+
+    def apply_buffer_sizes(self, sock):
+        """Set the socket buffer sizes
+
+        Buffer sizes set on a listening socket are inherited by the accepted connections.
+
+        :param sock: Socket
+        :type sock: socket.socket
+        """
+        if self.send_buffer_size:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer_size)
+        if self.recv_buffer_size:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer_size)
+
+    def apply(self, sock):
+        """Set the options on a connected socket
+
+        :param sock: Socket
+        :type sock: socket.socket
+        """
+        self.apply_buffer_sizes(sock)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self.nodelay))
+        self.rearm(sock)
+
+    def rearm(self, sock):
+        """Enable quick acknowledgements again
+
+        The kernel leaves the quick acknowledgement mode on its own, so it is
+        enabled again after data was received.
+
+        :param sock: Socket
+        :type sock: socket.socket
+        """
+        if self.quickack:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+class RingBuffer():
+    """Byte ring buffer for received data
+
+    Data is received directly into the free space of the buffer and read in
+    bulk. The buffer grows when it is full, so writes never drop data.
+    The buffer is not thread safe, callers must serialize the access.
+    """
+    def __init__(self, size=4096):
+        """Class initialization
+
+        :param size: Initial buffer size in bytes, defaults to 4096
+        :type size: int, optional
+        """
+        self._buf = bytearray(size)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def clear(self):
+        """Discard all data in the buffer"""
+        self._start = 0
+        self._len = 0
+
+    def _reserve(self, size):
+        """Make sure that the buffer has free space for size bytes
+
+        :param size: Number of bytes
+        :type size: int
+        """
+        capacity = len(self._buf)
+        if self._len + size <= capacity:
+            return
+        new_capacity = max(2 * capacity, self._len + size)
+        buf = bytearray(new_capacity)
+        view = memoryview(buf)
+        self._copy_into(view, self._len)
+        self._buf = buf
+        self._view = view
+        self._start = 0
+
+    def _copy_into(self, view, size, offset=0):
+        """Copy data from the buffer without removing it
+
+        :param view: Destination
+        :type view: memoryview
+        :param size: Number of bytes to copy
+        :type size: int
+        :param offset: Offset of the first byte to copy from the start of the data, defaults to 0
+        :type offset: int, optional
+        """
+        capacity = len(self._buf)
+        start = (self._start + offset) % capacity
+        first = min(size, capacity - start)
+        view[:first] = self._view[start:start + first]
+        view[first:size] = self._view[:size - first]
+
+    def write(self, data):
+        """Append data to the buffer
+
+        :param data: Data
+        :type data: Bytes like object
+        """
+        size = len(data)
+        self._reserve(size)
+        capacity = len(self._buf)
+        end = (self._start + self._len) % capacity
+        first = min(size, capacity - end)
+        data = memoryview(data).cast("B")
+        self._view[end:end + first] = data[:first]
+        self._view[:size - first] = data[first:]
+        self._len += size
+
+    def recv_into(self, sock, size=4096):
+        """Receive data from a socket into the buffer
+
+        :param sock: Socket
+        :type sock: socket.socket
+        :param size: Maximum number of bytes to receive, defaults to 4096
+        :type size: int, optional
+        :return: View of the received data, empty when the connection was closed.
+        The view is only valid until the buffer is modified.
+        :rtype: memoryview
+        """
+        # Only grow the buffer when it is close to full, otherwise receive into the free space
+        self._reserve(min(size, 1024))
+        capacity = len(self._buf)
+        end = (self._start + self._len) % capacity
+        # Receive into the contiguous free space after the data
+        size = min(size, capacity - end, capacity - self._len)
+        received = sock.recv_into(self._view[end:end + size])
+        self._len += received
+        return self._view[end:end + received]
+
+    def peek(self, size, offset=0):
+        """Get data from the buffer without removing it
+
+        :param size: Number of bytes
+        :type size: int
+        :param offset: Offset of the first byte from the start of the data, defaults to 0
+        :type offset: int, optional
+        :return: Data, shorter than size if the buffer does not contain enough data
+        :rtype: bytearray
+        """
+        size = max(0, min(size, self._len - offset))
+        data = bytearray(size)
+        self._copy_into(memoryview(data), size, offset)
+        return data
+
+    def skip(self, size):
+        """Remove data from the start of the buffer
+
+        :param size: Number of bytes
+        :type size: int
+        """
+        size = min(size, self._len)
+        self._len -= size
+        self._start = (self._start + size) % len(self._buf) if self._len else 0
+
+    def read(self, size):
+        """Remove and return data from the start of the buffer
+
+        :param size: Number of bytes
+        :type size: int
+        :return: Data, shorter than size if the buffer does not contain enough data
+        :rtype: bytearray
+        """
+        data = self.peek(size)
+        self.skip(len(data))
+        return data
 
 class MacSocketHost(threading.Thread):
     """Host MAC layer for a network connection"""
-    def __init__(self, host, port, timeout=3):
+    def __init__(self, host, port, timeout=3, options=None):
         """Class initialization
 
         :param host: Host interface to listen on
@@ -25,18 +224,25 @@ class MacSocketHost(threading.Thread):
         case of timeout.
         :type timeout: int or None, optional
         :type timeout: int
+        :param options: Socket options, defaults to None which uses the SocketOptions defaults
+        :type options: SocketOptions, optional
         """
         self.logger = getLogger("mac.MacSocketHost")
         self.host = host
         self.port = port
         self.timeout = timeout
-        self.rx_buf = deque()
-        self.tx_buf = deque()
+        self.options = options if options is not None else SocketOptions()
+        self.rx_buf = RingBuffer()
+        self.rx_cond = threading.Condition()
+        self.tx_buf = bytearray()
+        self.tx_lock = threading.Lock()
         self.stop_event = threading.Event()
         self.sel = selectors.DefaultSelector()
         self.conn = None
         self.opened = False
         self.sock = None
+        self.wakeup_recv = None
+        self.wakeup_send = None
 
         super().__init__(name="Socket connection manager")
 
@@ -48,9 +254,12 @@ class MacSocketHost(threading.Thread):
             # otherwise this will block until a socket event happens
             events = self.sel.select(timeout=1)
             for key, mask in events:
+                if key.fileobj is self.wakeup_recv:
+                    self.wakeup_recv.recv(1024)
+                    self.send_pending()
                 # if we have not attached any data to this thread it is
                 # a new thread
-                if key.data is None:
+                elif key.data is None:
                     self.accept()
                 else:
                     self.service_connection(key, mask)
@@ -63,9 +272,11 @@ class MacSocketHost(threading.Thread):
         self.conn, addr = self.sock.accept()
         self.logger.debug("Accepted connection from %s", addr)
         self.conn.setblocking(False)
+        self.options.apply(self.conn)
         data = types.SimpleNamespace(addr=addr, connected=False)
-        events = selectors.EVENT_READ | selectors.EVENT_WRITE
-        self.sel.register(self.conn, events, data=data)
+        # Only wait for incoming data, pending writes are signaled through the wakeup socket
+        self.sel.register(self.conn, selectors.EVENT_READ, data=data)
+        self.send_pending()
 
     def service_connection(self, key, mask):
         """Service connected client
@@ -77,38 +288,52 @@ class MacSocketHost(threading.Thread):
         """
         data = key.data
         if mask & selectors.EVENT_READ:
-            try:
-                recv_data = self.conn.recv(1024)
-            except ConnectionError:
-                recv_data = 0
-
+            with self.rx_cond:
+                try:
+                    recv_data = self.rx_buf.recv_into(self.conn)
+                except ConnectionError:
+                    recv_data = None
+                if recv_data:
+                    self.logger.debug("Received data 0x%s from %s", LazyHex(recv_data), data.addr)
+                    self.rx_cond.notify_all()
             if recv_data:
-                self.logger.debug("Received data %s from %s", str(recv_data), data.addr)
-                self.rx_buf.extendleft(recv_data)
+                self.options.rearm(self.conn)
             else:
                 self.logger.debug("Closing connection to %s", data.addr)
                 self.sel.unregister(self.conn)
                 self.conn.close()
-        if mask & selectors.EVENT_WRITE:
-            if len(self.tx_buf):
-                buf = bytearray()
-                for _ in range(len(self.tx_buf)):
-                    buf.append(self.tx_buf.pop())
-                self.logger.debug("Sending %s to %s", str(bytes(buf)), data.addr)
-                self.conn.sendall(buf)
+                self.conn = None
+
+    def send_pending(self):
+        """Send data that is pending in the transmit buffer to the connected client
+        """
+        if self.conn is None:
+            return
+        with self.tx_lock:
+            if not self.tx_buf:
+                return
+            buf = self.tx_buf
+            self.tx_buf = bytearray()
+        self.logger.debug("Sending 0x%s", LazyHex(buf))
+        self.conn.sendall(buf)
 
     def open(self):
         """Open MAC layer
         """
         if not self.opened:
             self.rx_buf.clear()
-            self.tx_buf.clear()
+            self.tx_buf = bytearray()
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.options.apply_buffer_sizes(self.sock)
             self.sock.bind((self.host, self.port))
             self.sock.listen()
             self.sock.setblocking(False)
             # Register selector for listening socket
             self.sel.register(self.sock, selectors.EVENT_READ, data=None)
+            # Socket pair to wake up the selector when data is written or the MAC is closed
+            self.wakeup_recv, self.wakeup_send = socket.socketpair()
+            self.wakeup_recv.setblocking(False)
+            self.sel.register(self.wakeup_recv, selectors.EVENT_READ)
             self.start()
             self.opened = True
             self.logger.debug("Socket MAC started")
@@ -118,9 +343,19 @@ class MacSocketHost(threading.Thread):
         """
         if self.opened:
             self.stop_event.set()
+            self.wakeup_send.send(b"\x00")
             self.join()
+            # The thread stops without waiting for the client to close the connection
+            if self.conn is not None:
+                self.sel.unregister(self.conn)
+                self.conn.close()
+                self.conn = None
             self.sel.unregister(self.sock)
             self.sock.close()
+            self.sel.unregister(self.wakeup_recv)
+            self.wakeup_recv.close()
+            self.wakeup_send.close()
+            self.wakeup_recv = self.wakeup_send = None
             self.logger.debug("Socket MAC stopped")
             self.opened = False
 
@@ -136,24 +371,10 @@ class MacSocketHost(threading.Thread):
         :return: Read data
         :rtype: bytearray
         """
-        return_size = size
-        if size > len(self.rx_buf):
-            if self.timeout is None:
-                while size > len(self.rx_buf):
-                    pass
-            elif self.timeout == 0:
-                return_size = len(self.rx_buf)
-            else:
-                timer = Timer(self.timeout)
-                while not timer.expired() and (size > len(self.rx_buf)):
-                    pass
-                if timer.expired():
-                    return_size = len(self.rx_buf)
-
-        data = bytearray()
-        for _ in range(return_size):
-            data.append(self.rx_buf.pop())
-        return data
+        with self.rx_cond:
+            if size > len(self.rx_buf) and self.timeout != 0:
+                self.rx_cond.wait_for(lambda: size <= len(self.rx_buf), self.timeout)
+            return self.rx_buf.read(size)
 
     def write(self, data):
         """Write data to MAC
@@ -161,12 +382,77 @@ class MacSocketHost(threading.Thread):
         :param data: Data to write
         :type data: Bytes like object
         """
-        self.tx_buf.extendleft(data)
+        with self.tx_lock:
+            self.tx_buf += data
+        if self.opened:
+            self.wakeup_send.send(b"\x00")
+
+    def __len__(self):
+        """Get number of bytes available to read from MAC
+
+        :return: Number of bytes
+        :rtype: int
+        """
+        return len(self.rx_buf)
+
+def connect(host, port, timeout, options):
+    """Connect a TCP socket
+
+    :param host: Host name or address
+    :type host: str
+    :param port: Port
+    :type port: int
+    :param timeout: Connection timeout in seconds
+    :type timeout: float
+    :param options: Socket options
+    :type options: SocketOptions
+    :raises MacError: When the connection fails or times out
+    :return: Connected socket
+    :rtype: socket.socket
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        # Buffer sizes must be set before connecting to take effect on the TCP window
+        options.apply_buffer_sizes(sock)
+        sock.settimeout(timeout)
+        sock.connect((host, port))
+        options.apply(sock)
+    except OSError as exc:
+        sock.close()
+        raise MacError(f"Connecting to {host}:{port} failed: {exc}") from exc
+    return sock
+
+def sendmsg_all(sock, buffers):
+    """Send several buffers with scatter-gather I/O
+
+    Like socket.sendall for the concatenation of the buffers, but the buffers
+    are passed to the kernel without joining them. Platforms without
+    socket.sendmsg fall back to joining the buffers.
+
+    :param sock: Connected socket
+    :type sock: socket.socket
+    :param buffers: Data to send
+    :type buffers: Sequence of bytes like objects
+    :raises OSError: When sending fails or times out
+    """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(buffers))
+        return
+    views = [memoryview(buffer).cast("B") for buffer in buffers if len(buffer)]
+    index = 0
+    while index < len(views):
+        sent = sock.sendmsg(views[index:])
+        # Skip the buffers that were sent completely and continue with the rest of a partially sent one
+        while index < len(views) and sent >= len(views[index]):
+            sent -= len(views[index])
+            index += 1
+        if sent:
+            views[index] = views[index][sent:]
 
 class MacSocketClient(Mac):
     """Socket based transport
     """
-    def __init__(self, port, host='localhost', timeout=5):
+    def __init__(self, port, host='localhost', timeout=5, connect_timeout=5, options=None):
         """Class initialization
 
         :param buffer_in: MAC layer input buffer
@@ -179,11 +465,16 @@ class MacSocketClient(Mac):
         timeout > 0 -> blocking read with timeout, return with requested number of bytes or less in
         case of timeout.
         :type timeout: int or None, optional
+        :param connect_timeout: Timeout for establishing the connection in seconds, defaults to 5
+        :type connect_timeout: float, optional
+        :param options: Socket options, defaults to None which uses the SocketOptions defaults
+        :type options: SocketOptions, optional
         """
         self.host = host
         self.port = port
         self.timeout = timeout
-        self.connect_timeout = 5
+        self.connect_timeout = connect_timeout
+        self.options = options if options is not None else SocketOptions()
         self.buf = bytearray()
         self.opened = False
         self.sock = None
@@ -192,18 +483,12 @@ class MacSocketClient(Mac):
         """Open MAC layer
         """
         if not self.opened:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            # TODO Timeouts are also valid for connect but the timeout requirements here
-            # might be different
-            # self.sock.settimeout(5)
-            try:
-                self.sock.connect((self.host, self.port))
-            except ConnectionRefusedError as exc:
-                raise MacError(f"{exc}") from exc
+            self.sock = connect(self.host, self.port, self.connect_timeout, self.options)
             # timeout = None -> blocking
             # timeout = 0 -> non-blocking
             # timeout > 0 -> blocking with timeout
             self.sock.settimeout(self.timeout)
+            self.buf = bytearray()
             self.opened = True
 
     def close(self):
@@ -221,6 +506,14 @@ class MacSocketClient(Mac):
         """
         self.sock.sendall(data)
 
+    def write_vectored(self, buffers):
+        """Write the concatenation of several buffers without joining them
+
+        :param buffers: Data to write
+        :type buffers: Sequence of bytes like objects
+        """
+        sendmsg_all(self.sock, buffers)
+
     def read(self, size):
         """Read from MAC layer
 
@@ -231,26 +524,45 @@ class MacSocketClient(Mac):
         :param size: Number of bytes to read
         :type size: int
         """
-        buf = bytearray()
+        # Data that was already received when checking for available bytes
+        buf = self.buf[:size]
+        del self.buf[:size]
         if self.timeout is None:
             while size > len(buf):
                 buf.extend(self.sock.recv(size - len(buf)))
         elif self.timeout == 0:
-            try:
-                buf = self.sock.recv(size)
-            except BlockingIOError:
-                pass
+            if size > len(buf):
+                try:
+                    buf.extend(self.sock.recv(size - len(buf)))
+                except BlockingIOError:
+                    pass
         else:
             timer = Timer(self.timeout)
             while not timer.expired() and (size > len(buf)):
                 buf.extend(self.sock.recv(size - len(buf)))
+        if buf:
+            self.options.rearm(self.sock)
         return buf
 
+    def __len__(self):
+        """Get number of bytes available to read from MAC
+
+        Fetches data that is pending on the socket without blocking.
+
+        :return: Number of bytes
+        :rtype: int
+        """
+        if self.opened:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if readable:
+                self.buf.extend(self.sock.recv(4096))
+        return len(self.buf)
+
 class MacSocketPacketHost(threading.Thread):
     """Host MAC layer for a network connection"""
     FRAME_HEADER_SIZE = 4
     FRAME_LENGTH_SIZE = 4
-    def __init__(self, host, port, timeout=3):
+    def __init__(self, host, port, timeout=3, options=None):
         """Class initialization
 
         :param host: Host interface to listen on
@@ -264,18 +576,26 @@ class MacSocketPacketHost(threading.Thread):
         case of timeout.
         :type timeout: int or None, optional
         :type timeout: int
+        :param options: Socket options, defaults to None which uses the SocketOptions defaults
+        :type options: SocketOptions, optional
         """
         self.logger = getLogger("mac.MacSocketPacketHost")
         self.host = host
         self.port = port
         self.timeout = timeout
-        self.rx_buf = deque()
+        self.options = options if options is not None else SocketOptions()
+        self.rx_buf = RingBuffer()
+        self.rx_cond = threading.Condition()
         self.tx_buf = deque()
+        # Size of the packet at the start of the receive buffer, None until its header is received
+        self._packet_size = None
         self.stop_event = threading.Event()
         self.sel = selectors.DefaultSelector()
         self.conn = None
         self.opened = False
         self.sock = None
+        self.wakeup_recv = None
+        self.wakeup_send = None
 
         super().__init__(name="Socket connection manager")
 
@@ -287,9 +607,12 @@ class MacSocketPacketHost(threading.Thread):
             # otherwise this will block until a socket event happens
             events = self.sel.select(timeout=1)
             for key, mask in events:
+                if key.fileobj is self.wakeup_recv:
+                    self.wakeup_recv.recv(1024)
+                    self.send_pending()
                 # if we have not attached any data to this thread it is
                 # a new thread
-                if key.data is None:
+                elif key.data is None:
                     self.accept()
                 else:
                     self.service_connection(key, mask)
@@ -302,9 +625,11 @@ class MacSocketPacketHost(threading.Thread):
         self.conn, addr = self.sock.accept()
         self.logger.debug("Accepted connection from %s", addr)
         self.conn.setblocking(False)
+        self.options.apply(self.conn)
         data = types.SimpleNamespace(addr=addr, connected=False)
-        events = selectors.EVENT_READ | selectors.EVENT_WRITE
-        self.sel.register(self.conn, events, data=data)
+        # Only wait for incoming data, pending writes are signaled through the wakeup socket
+        self.sel.register(self.conn, selectors.EVENT_READ, data=data)
+        self.send_pending()
 
     def service_connection(self, key, mask):
         """Service connected client
@@ -316,36 +641,50 @@ class MacSocketPacketHost(threading.Thread):
         """
         data = key.data
         if mask & selectors.EVENT_READ:
-            try:
-                recv_data = self.conn.recv(1024)
-            except ConnectionError:
-                recv_data = 0
-
+            with self.rx_cond:
+                try:
+                    recv_data = self.rx_buf.recv_into(self.conn)
+                except ConnectionError:
+                    recv_data = None
+                if recv_data:
+                    self.logger.debug("Received data 0x%s from %s", LazyHex(recv_data), data.addr)
+                    self.rx_cond.notify_all()
             if recv_data:
-                self.logger.debug("Received data 0x%s from %s", recv_data.hex(), data.addr)
-                self.rx_buf.extendleft(recv_data)
+                self.options.rearm(self.conn)
             else:
                 self.logger.debug("Closing connection to %s", data.addr)
                 self.sel.unregister(self.conn)
                 self.conn.close()
-        if mask & selectors.EVENT_WRITE:
-            if len(self.tx_buf):
-                frame = self.tx_buf.pop()
-                self.logger.debug("Sending 0x%s to %s", bytes(frame).hex(), data.addr)
-                self.conn.sendall(frame)
+                self.conn = None
+
+    def send_pending(self):
+        """Send frames that are pending in the transmit buffer to the connected client
+        """
+        if self.conn is None:
+            return
+        while len(self.tx_buf):
+            frame = self.tx_buf.pop()
+            self.logger.debug("Sending 0x%s", LazyHex(frame))
+            self.conn.sendall(frame)
 
     def open(self):
         """Open MAC layer
         """
         if not self.opened:
             self.rx_buf.clear()
+            self._packet_size = None
             self.tx_buf.clear()
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.options.apply_buffer_sizes(self.sock)
             self.sock.bind((self.host, self.port))
             self.sock.listen()
             self.sock.setblocking(False)
             # Register selector for listening socket
             self.sel.register(self.sock, selectors.EVENT_READ, data=None)
+            # Socket pair to wake up the selector when data is written or the MAC is closed
+            self.wakeup_recv, self.wakeup_send = socket.socketpair()
+            self.wakeup_recv.setblocking(False)
+            self.sel.register(self.wakeup_recv, selectors.EVENT_READ)
             self.start()
             self.opened = True
             self.logger.debug("Socket MAC started")
@@ -355,27 +694,40 @@ class MacSocketPacketHost(threading.Thread):
         """
         if self.opened:
             self.stop_event.set()
+            self.wakeup_send.send(b"\x00")
             self.join()
+            # The thread stops without waiting for the client to close the connection
+            if self.conn is not None:
+                self.sel.unregister(self.conn)
+                self.conn.close()
+                self.conn = None
             self.sel.unregister(self.sock)
             self.sock.close()
+            self.sel.unregister(self.wakeup_recv)
+            self.wakeup_recv.close()
+            self.wakeup_send.close()
+            self.wakeup_recv = self.wakeup_send = None
             self.logger.debug("Socket MAC stopped")
             self.opened = False
 
     def _is_packet_complete(self):
-        if len(self.rx_buf) >= 8:
-            tmp = bytearray()
-            # peek into the first 8 bytes of the queue to get header and frame size
-            for i in range(1,9):
-                tmp.append(self.rx_buf[-i])
-            if tmp[0:self.FRAME_HEADER_SIZE] == b"MDFU":
-                size = int.from_bytes(
-                    tmp[self.FRAME_HEADER_SIZE:self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE],
-                    byteorder="little")
-                if size <= (len(self.rx_buf) - (self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)):
-                    return True
-            else:
+        """Check if a complete packet is in the receive buffer
+
+        The frame header is only parsed once per packet, after that the check
+        only compares the amount of received data with the packet size.
+
+        :raises ValueError: If the receive buffer does not start with a frame header
+        :return: True if a complete packet is available, False otherwise.
+        :rtype: bool
+        """
+        if self._packet_size is None:
+            if len(self.rx_buf) < self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE:
+                return False
+            header = self.rx_buf.peek(self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)
+            if header[0:self.FRAME_HEADER_SIZE] != b"MDFU":
                 raise ValueError("Packet MAC out of sync")
-        return False
+            self._packet_size = int.from_bytes(header[self.FRAME_HEADER_SIZE:], byteorder="little")
+        return len(self.rx_buf) >= self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE + self._packet_size
 
     def read(self, size=0): #pylint: disable=unused-argument
         """
@@ -391,19 +743,12 @@ class MacSocketPacketHost(threading.Thread):
         :return: The packet read from the buffer.
         :rtype: bytearray
         """
-        timer = Timer(self.timeout)
-        while not self._is_packet_complete():
-            if timer.expired():
+        with self.rx_cond:
+            if not self.rx_cond.wait_for(self._is_packet_complete, self.timeout):
                 raise MacError("Timeout while waiting for packet")
-        for _ in range(self.FRAME_HEADER_SIZE):
-            self.rx_buf.pop()
-        packet_size = bytearray()
-        for _ in range(self.FRAME_LENGTH_SIZE):
-            packet_size.append(self.rx_buf.pop())
-        packet_size = int.from_bytes(packet_size, byteorder="little")
-        packet = bytearray()
-        for _ in range(packet_size):
-            packet.append(self.rx_buf.pop())
+            self.rx_buf.skip(self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)
+            packet = self.rx_buf.read(self._packet_size)
+            self._packet_size = None
         return packet
 
     def write(self, data):
@@ -419,6 +764,8 @@ class MacSocketPacketHost(threading.Thread):
         """
         frame = b"MDFU" + len(data).to_bytes(4, byteorder="little") + data
         self.tx_buf.appendleft(frame)
+        if self.opened:
+            self.wakeup_send.send(b"\x00")
 
 class MacSocketPacketClient(Mac):
     """
@@ -431,7 +778,7 @@ class MacSocketPacketClient(Mac):
     """
     FRAME_HEADER_SIZE = 4
     FRAME_LENGTH_SIZE = 4
-    def __init__(self, host='localhost', port=5559, timeout=5):
+    def __init__(self, host='localhost', port=5559, timeout=5, connect_timeout=5, options=None):
         """
         Initialize the MacSocketPacketClient.
 
@@ -440,12 +787,21 @@ class MacSocketPacketClient(Mac):
         :param port: The port number of the server to connect to.
         :type port: int
         :param timeout: Read timeout in seconds. Defaults to 5.
+        timeout = None -> blocking read without timeout
         :type timeout: int, optional
+        :param connect_timeout: Timeout for establishing the connection in seconds, defaults to 5
+        :type connect_timeout: float, optional
+        :param options: Socket options, defaults to None which uses the SocketOptions defaults
+        :type options: SocketOptions, optional
         """
         self.host = host
         self.port = port
         self.timeout = timeout
-        self.buf = bytearray()
+        self.connect_timeout = connect_timeout
+        self.options = options if options is not None else SocketOptions()
+        self.buf = RingBuffer()
+        # Size of the packet at the start of the receive buffer, None until its header is received
+        self._packet_size = None
         self.opened = False
         self.sock = None
 
@@ -453,20 +809,16 @@ class MacSocketPacketClient(Mac):
         """
         Open the MAC layer connection.
 
-        This method establishes a TCP connection to the specified host and port.
-        It sets the socket to non-blocking mode and initializes the internal buffer.
+        This method establishes a TCP connection to the specified host and port
+        and initializes the internal buffer.
 
-        :raises MacError: If the connection to the server is refused.
+        :raises MacError: If the connection to the server fails or times out.
         """
         if not self.opened:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            try:
-                self.sock.connect((self.host, self.port))
-            except ConnectionRefusedError as exc:
-                raise MacError(f"{exc}") from exc
-            self.sock.setblocking(False)
+            self.sock = connect(self.host, self.port, self.connect_timeout, self.options)
             self.opened = True
-            self.buf = bytearray()
+            self.buf.clear()
+            self._packet_size = None
 
     def close(self):
         """
@@ -483,23 +835,22 @@ class MacSocketPacketClient(Mac):
         Check if the current buffer contains a complete packet.
 
         A complete packet starts with the header 'MDFU' followed by the packet size (4 bytes in little endian format).
-        The method checks if the buffer contains enough data to form a complete packet.
+        The header is only parsed once per packet, after that the check only compares the amount of
+        received data with the packet size.
 
         :return: True if a complete packet is available, False otherwise.
         :rtype: bool
         :raises MacError: If the packet header is out of sync, meaning first bytes in buffer do not contain the
         header 'MDFU'.
         """
-        if len(self.buf) >= self.FRAME_HEADER_SIZE:
-            if self.buf[0:self.FRAME_HEADER_SIZE] == b"MDFU":
-                size = int.from_bytes(
-                    self.buf[self.FRAME_HEADER_SIZE:self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE],
-                    byteorder="little")
-                if size == len(self.buf) - (self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE):
-                    return True
-            else:
+        if self._packet_size is None:
+            if len(self.buf) < self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE:
+                return False
+            header = self.buf.peek(self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)
+            if header[0:self.FRAME_HEADER_SIZE] != b"MDFU":
                 raise MacError("Packet MAC out of sync")
-        return False
+            self._packet_size = int.from_bytes(header[self.FRAME_HEADER_SIZE:], byteorder="little")
+        return len(self.buf) >= self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE + self._packet_size
 
     def write(self, data):
         """
@@ -512,39 +863,456 @@ class MacSocketPacketClient(Mac):
         :type data: bytes
         :return: None
         """
-        frame = b"MDFU" + len(data).to_bytes(4, byteorder="little") + data
-        return self.sock.sendall(frame)
+        self.write_vectored((data,))
+
+    def write_vectored(self, buffers):
+        """
+        Write the concatenation of several buffers as one packet.
+
+        The frame header and the buffers are passed to the kernel in one scatter-gather
+        send instead of being joined into a frame.
+
+        :param buffers: The data to be sent.
+        :type buffers: Sequence of bytes like objects
+        """
+        size = sum(len(buffer) for buffer in buffers)
+        header = b"MDFU" + size.to_bytes(self.FRAME_LENGTH_SIZE, byteorder="little")
+        # Reads change the socket timeout, writes block up to the MAC timeout
+        self.sock.settimeout(self.timeout if self.timeout else None)
+        sendmsg_all(self.sock, (header,) + tuple(buffers))
 
     def read(self, size=0): #pylint: disable=unused-argument
         """
         Read data from the socket.
 
-        This method reads data from the socket based on the specified timeout.
-        It ensures that a complete packet is read before returning the data.
+        This method waits for data on the socket until a complete packet is received
+        or the timeout expires. Data following the packet stays in the buffer for the
+        next read.
 
         :param size: The number of bytes to read. This is ignored but kept here to keep
         a common API for all MAC layers.
         :type size: int, optional
         :return: The complete packet data.
-        :rtype: bytes
-        :raises MacError: If the read operation times out.
+        :rtype: bytearray
+        :raises MacError: If the read operation times out or the connection is closed.
         """
-        timer = Timer(self.timeout)
+        timer = Timer(self.timeout) if self.timeout is not None else None
         while not self._is_packet_complete():
+            # Block in the socket until data arrives or the remaining time is over,
+            # a zero timeout makes a last non-blocking attempt.
+            self.sock.settimeout(timer.remaining() if timer else None)
             try:
-                self.buf.extend(self.sock.recv(256))
+                received = self.buf.recv_into(self.sock)
+            except (BlockingIOError, TimeoutError, socket.timeout) as exc:
+                raise MacError("Timeout while waiting for data") from exc
+            if not received:
+                raise MacError("Connection closed while waiting for data")
+        self.options.rearm(self.sock)
+        self.buf.skip(self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)
+        packet = self.buf.read(self._packet_size)
+        self._packet_size = None
+        return packet
+
+class MacSocketConnection(Mac):
+    """MAC layer for a connection accepted by a MacSocketServer
+
+    The selector loop of the server receives the data into the receive buffer
+    and sends the data of the transmit buffer, reads block on a condition
+    variable until enough data was received.
+    """
+    def __init__(self, server, conn, addr, timeout=3):
+        """Class initialization
+
+        :param server: Server that accepted the connection
+        :type server: MacSocketServer
+        :param conn: Connected socket
+        :type conn: socket.socket
+        :param addr: Address of the peer
+        :type addr: tuple
+        :param timeout: Read timeout in seconds, defaults to 3
+        timeout = None -> blocking read without timeout
+        timeout = 0 -> non-blocking read, return immediately with up to the requested number of bytes
+        timeout > 0 -> blocking read with timeout, return with requested number of bytes or less in
+        case of timeout.
+        :type timeout: int or None, optional
+        """
+        self.server = server
+        self.conn = conn
+        self.addr = addr
+        self.timeout = timeout
+        self.connected = True
+        self.rx_buf = RingBuffer()
+        self.rx_cond = threading.Condition()
+        self.tx_buf = bytearray()
+        self.tx_lock = threading.Lock()
+
+    def open(self):
+        """Open MAC layer, the connection is already established"""
+
+    def close(self):
+        """Close the connection"""
+        self.server.disconnect(self)
+
+    def read(self, size):
+        """Read received data
+
+        Read size bytes from the MAC layer. If no timeout is set (None) it is a blocking
+        read. Non-blocking operation (timeout > 0 or timeout = 0) can return
+        less bytes than requested.
+
+        :param size: Number of bytes to read
+        :type size: int
+        :return: Read data
+        :rtype: bytearray
+        """
+        with self.rx_cond:
+            if size > len(self.rx_buf) and self.timeout != 0:
+                self.rx_cond.wait_for(lambda: size <= len(self.rx_buf), self.timeout)
+            return self.rx_buf.read(size)
+
+    def write(self, data):
+        """Write data to MAC
+
+        :param data: Data to write
+        :type data: Bytes like object
+        """
+        self.write_vectored((data,))
+
+    def write_vectored(self, buffers):
+        """Write the concatenation of several buffers
+
+        :param buffers: Data to write
+        :type buffers: Sequence of bytes like objects
+        """
+        with self.tx_lock:
+            for buffer in buffers:
+                self.tx_buf += buffer
+        self.server.request_send(self)
+
+    def __len__(self):
+        """Get number of bytes available to read from MAC
+
+        :return: Number of bytes
+        :rtype: int
+        """
+        return len(self.rx_buf)
+
+    def receive(self):
+        """Receive pending data from the socket, called by the selector loop
+
+        :return: False when the connection was closed by the peer
+        :rtype: bool
+        """
+        with self.rx_cond:
+            try:
+                recv_data = self.rx_buf.recv_into(self.conn)
             except BlockingIOError:
-                pass
-            if timer.expired():
-                raise MacError("Timeout while waiting for data")
-        packet_size = int.from_bytes(self.buf[4:8], byteorder="little")
-        packet = self.buf[8:8+packet_size]
-        if len(self.buf) > 8 + packet_size:
-            self.buf = self.buf[8+packet_size:]
-        else:
-            self.buf = bytearray()
+                return True
+            except ConnectionError:
+                return False
+            if recv_data:
+                self.rx_cond.notify_all()
+        if recv_data:
+            self.server.options.rearm(self.conn)
+        return bool(recv_data)
+
+    def send_pending(self):
+        """Send data from the transmit buffer, called by the selector loop
+
+        :raises ConnectionError: When the connection is broken
+        :return: True if data is left in the transmit buffer because the socket buffer is full
+        :rtype: bool
+        """
+        with self.tx_lock:
+            if not self.tx_buf:
+                return False
+            try:
+                sent = self.conn.send(self.tx_buf)
+            except BlockingIOError:
+                sent = 0
+            del self.tx_buf[:sent]
+            return bool(self.tx_buf)
+
+    def disconnected(self):
+        """Mark the connection as closed, called by the selector loop"""
+        with self.rx_cond:
+            self.connected = False
+            self.rx_cond.notify_all()
+
+class MacSocketPacketConnection(MacSocketConnection):
+    """Packet MAC layer for a connection accepted by a MacSocketServer
+
+    Uses the same framing as MacSocketPacketHost.
+    """
+    FRAME_HEADER_SIZE = 4
+    FRAME_LENGTH_SIZE = 4
+    def __init__(self, server, conn, addr, timeout=3):
+        super().__init__(server, conn, addr, timeout)
+        # Size of the packet at the start of the receive buffer, None until its header is received
+        self._packet_size = None
+
+    def _is_packet_complete(self):
+        """Check if a complete packet is in the receive buffer
+
+        :raises MacError: If the receive buffer does not start with a frame header
+        :return: True if a complete packet is available, False otherwise.
+        :rtype: bool
+        """
+        if self._packet_size is None:
+            if len(self.rx_buf) < self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE:
+                return False
+            header = self.rx_buf.peek(self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)
+            if header[0:self.FRAME_HEADER_SIZE] != b"MDFU":
+                raise MacError("Packet MAC out of sync")
+            self._packet_size = int.from_bytes(header[self.FRAME_HEADER_SIZE:], byteorder="little")
+        return len(self.rx_buf) >= self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE + self._packet_size
+
+    def read(self, size=0): #pylint: disable=unused-argument
+        """Read a packet
+
+        :param int size: The size of the packet to read. This parameter is ignored
+        but kept for API compatibility with a stream based MAC layer.
+        :raises MacError: If no packet is available within the timeout period or the
+        connection was closed.
+        :return: The packet read from the buffer.
+        :rtype: bytearray
+        """
+        with self.rx_cond:
+            if not self.rx_cond.wait_for(lambda: self._is_packet_complete() or not self.connected, self.timeout):
+                raise MacError("Timeout while waiting for packet")
+            if not self._is_packet_complete():
+                raise MacError("Connection closed")
+            self.rx_buf.skip(self.FRAME_HEADER_SIZE + self.FRAME_LENGTH_SIZE)
+            packet = self.rx_buf.read(self._packet_size)
+            self._packet_size = None
         return packet
 
+    def write(self, data):
+        """Write a packet
+
+        :param data: The data to be sent.
+        :type data: bytes
+        """
+        self.write_vectored((data,))
+
+    def write_vectored(self, buffers):
+        """Write the concatenation of several buffers as one packet
+
+        :param buffers: The data to be sent.
+        :type buffers: Sequence of bytes like objects
+        """
+        size = sum(len(buffer) for buffer in buffers)
+        header = b"MDFU" + size.to_bytes(self.FRAME_LENGTH_SIZE, byteorder="little")
+        super().write_vectored((header,) + tuple(buffers))
+
+class MacSocketServer(threading.Thread):
+    """Socket server for many connections
+
+    Listens on one or more ports and services all accepted connections in one
+    selector loop. Each connection gets its own MAC layer, the on_connect
+    callback is called with the MAC layer of a new connection and on_disconnect
+    when the connection was closed.
+    """
+    def __init__(self, host, ports, timeout=3, packet=False, options=None):
+        """Class initialization
+
+        :param host: Host interface to listen on
+        :type host: str
+        :param ports: Ports to listen on for connections
+        :type ports: Iterable of int
+        :param timeout: Read timeout of the connection MAC layers, defaults to 3
+        :type timeout: int or None, optional
+        :param packet: Create packet MAC layers (MacSocketPacketConnection) instead of
+        stream MAC layers (MacSocketConnection), defaults to False
+        :type packet: bool, optional
+        :param options: Socket options, defaults to None which uses the SocketOptions defaults
+        :type options: SocketOptions, optional
+        """
+        self.logger = getLogger("mac.MacSocketServer")
+        self.host = host
+        self.ports = list(ports)
+        self.timeout = timeout
+        self.mac_class = MacSocketPacketConnection if packet else MacSocketConnection
+        self.options = options if options is not None else SocketOptions()
+        self.on_connect = None
+        self.on_disconnect = None
+        self.connections = {}
+        self.listeners = []
+        self.sel = selectors.DefaultSelector()
+        self.stop_event = threading.Event()
+        # Connections with data to send or to close, handled by the selector loop
+        self._send_requests = set()
+        self._close_requests = set()
+        self._requests_lock = threading.Lock()
+        self.wakeup_recv = None
+        self.wakeup_send = None
+        self.opened = False
+        super().__init__(name="Socket server", daemon=True)
+
+    @property
+    def addresses(self):
+        """Addresses of the listening sockets
+
+        :return: Addresses, useful to get the ports when listening on port 0
+        :rtype: list(tuple)
+        """
+        return [listener.getsockname() for listener in self.listeners]
+
+    def open(self):
+        """Start listening and servicing connections
+
+        :raises OSError: When listening on a port fails
+        """
+        if self.opened:
+            return
+        try:
+            for port in self.ports:
+                listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.listeners.append(listener)
+                self.options.apply_buffer_sizes(listener)
+                listener.bind((self.host, port))
+                listener.listen()
+                listener.setblocking(False)
+                self.sel.register(listener, selectors.EVENT_READ, data=None)
+        except OSError:
+            for listener in self.listeners:
+                listener.close()
+            self.listeners = []
+            raise
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.sel.register(self.wakeup_recv, selectors.EVENT_READ, data=self.wakeup_recv)
+        self.opened = True
+        self.start()
+
+    def close(self):
+        """Stop the server and close all connections"""
+        if not self.opened:
+            return
+        self.stop_event.set()
+        self._wakeup()
+        self.join()
+        for mac in list(self.connections.values()):
+            self._drop(mac)
+        for listener in self.listeners:
+            self.sel.unregister(listener)
+            listener.close()
+        self.listeners = []
+        self.sel.unregister(self.wakeup_recv)
+        self.wakeup_recv.close()
+        self.wakeup_send.close()
+        self.opened = False
+
+    def request_send(self, mac):
+        """Request sending the transmit buffer of a connection
+
+        :param mac: Connection MAC layer
+        :type mac: MacSocketConnection
+        """
+        with self._requests_lock:
+            wakeup = not self._send_requests
+            self._send_requests.add(mac)
+        if wakeup:
+            self._wakeup()
+
+    def disconnect(self, mac):
+        """Request closing a connection
+
+        :param mac: Connection MAC layer
+        :type mac: MacSocketConnection
+        """
+        with self._requests_lock:
+            self._close_requests.add(mac)
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            self.wakeup_send.send(b"\x00")
+        except (AttributeError, OSError):
+            # Server is not running
+            pass
+
+    def run(self):
+        """Selector loop"""
+        while not self.stop_event.is_set():
+            # Timeout is to check for thread stop event every second
+            for key, mask in self.sel.select(timeout=1):
+                if key.data is None:
+                    self._accept(key.fileobj)
+                elif key.data is self.wakeup_recv:
+                    self.wakeup_recv.recv(1024)
+                    self._handle_requests()
+                else:
+                    self._service(key.data, mask)
+
+    def _accept(self, listener):
+        try:
+            conn, addr = listener.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        self.options.apply(conn)
+        mac = self.mac_class(self, conn, addr, timeout=self.timeout)
+        self.connections[conn] = mac
+        self.sel.register(conn, selectors.EVENT_READ, data=mac)
+        self.logger.debug("Accepted connection from %s on port %d", addr, listener.getsockname()[1])
+        if self.on_connect:
+            self.on_connect(mac)
+
+    def _service(self, mac, mask):
+        try:
+            if mask & selectors.EVENT_READ and not mac.receive():
+                self._drop(mac)
+                return
+            if mask & selectors.EVENT_WRITE:
+                self._send(mac)
+        except OSError as exc:
+            self.logger.debug("Connection to %s failed: %s", mac.addr, exc)
+            self._drop(mac)
+
+    def _handle_requests(self):
+        with self._requests_lock:
+            send_requests = self._send_requests
+            close_requests = self._close_requests
+            self._send_requests = set()
+            self._close_requests = set()
+        for mac in send_requests:
+            if mac.conn in self.connections:
+                try:
+                    self._send(mac)
+                except OSError as exc:
+                    self.logger.debug("Connection to %s failed: %s", mac.addr, exc)
+                    self._drop(mac)
+        for mac in close_requests:
+            self._drop(mac)
+
+    def _send(self, mac):
+        """Send pending data and wait for the socket to become writable if data is left
+
+        :param mac: Connection MAC layer
+        :type mac: MacSocketConnection
+        """
+        events = selectors.EVENT_READ
+        if mac.send_pending():
+            events |= selectors.EVENT_WRITE
+        if self.sel.get_key(mac.conn).events != events:
+            self.sel.modify(mac.conn, events, data=mac)
+
+    def _drop(self, mac):
+        """Close a connection
+
+        :param mac: Connection MAC layer
+        :type mac: MacSocketConnection
+        """
+        if self.connections.pop(mac.conn, None) is None:
+            return
+        self.logger.debug("Closing connection to %s", mac.addr)
+        self.sel.unregister(mac.conn)
+        mac.conn.close()
+        mac.disconnected()
+        if self.on_disconnect:
+            self.on_disconnect(mac)
+
 class MacSocketPair(Mac):
     """Socket based MAC
     """
@@ -601,8 +1369,8 @@ class MacSocketPair(Mac):
         :return: Number of bytes
         :rtype: int
         """
-        try:
-            self.buf.extend(self.sock.recv(256))
-        except BlockingIOError:
-            pass
+        # Only fetch pending data so that this does not block for sockets with a timeout
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        if readable:
+            self.buf.extend(self.sock.recv(4096))
         return len(self.buf)
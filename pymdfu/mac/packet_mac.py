@@ -1,18 +1,16 @@
 """Packet based MAC layer"""
-from collections import deque
-from pymdfu.mac.mac import Mac
-from pymdfu.timeout import Timer
+from pymdfu.mac.mac import Mac, MacBuffer
 
 class MacPacket(Mac):
     """Packet based MAC
     """
-    def __init__(self, buffer_in: deque, buffer_out: deque, timeout=1):
+    def __init__(self, buffer_in: MacBuffer, buffer_out: MacBuffer, timeout=1):
         """Class initialization
 
         :param buffer_in: Buffer for storing incoming packets
-        :type buffer_in: deque
+        :type buffer_in: MacBuffer
         :param buffer_out: Buffer for storing outgoing packets
-        :type buffer_out: deque
+        :type buffer_out: MacBuffer
         :param timeout: Read timeout in seconds, defaults to 1
         timeout = None -> blocking read without timeout
         timeout = 0 -> non-blocking read, return immediately with up to the requested number of bytes
@@ -30,7 +28,7 @@ class MacPacket(Mac):
         :param packet: Packet to send to MAC layer
         :type packet: any
         """
-        self.buffer_in.appendleft(packet)
+        self.buffer_in.put((packet,))
 
     def read(self, size=0):#pylint: disable=unused-argument
         """Read a packet from MAC layer
@@ -41,26 +39,15 @@ class MacPacket(Mac):
         :return: Packet from MAC layer or None if no packet was received or timeout expired
         :rtype: any
         """
-        if self.timeout is None:
-            while len(self.buffer_out) == 0:
-                pass
+        if self.timeout != 0:
+            # Block until a packet is available, timeout = None blocks without timeout
+            self.buffer_out.wait_for(lambda: len(self.buffer_out) > 0, self.timeout)
+        if len(self.buffer_out):
             packet = self.buffer_out.pop()
-        elif self.timeout == 0:
-            if len(self.buffer_out):
-                packet = self.buffer_out.pop()
-            else:
-                packet = None
         else:
-            timer = Timer(self.timeout)
-            while len(self.buffer_out) == 0 and not timer.expired():
-                pass
-            if timer.expired():
-                packet = None
-            else:
-                packet = self.buffer_out.pop()
+            packet = None
         return packet
 
-
     def __len__(self):
         """Number of packets in read queue"""
         return len(self.buffer_out)
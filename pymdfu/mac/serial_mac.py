@@ -28,3 +28,13 @@ class MacSerialPort(Serial):
             super().open()
         except SerialException as exc:
             raise MacError(exc) from exc
+
+    def __len__(self):
+        """Get number of bytes available to read from MAC
+
+        :return: Number of bytes
+        :rtype: int
+        """
+        if not self.is_open:
+            return 0
+        return self.in_waiting
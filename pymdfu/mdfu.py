@@ -1,10 +1,14 @@
 """MDFU protocol
 """
+import time
 from enum import Enum
+from collections import OrderedDict
 from logging import getLogger
 from packaging.version import Version
-from pymdfu.utils import EnumDescription
-from .transport import Transport, TransportError
+from pymdfu.utils import EnumDescription, LazyHex
+from pymdfu.image import ImageSource
+from pymdfu.stats import SessionStats
+from .transport import Transport, AsyncTransport, TransportError, TransportCounters
 
 
 mdfu_protocol_version = Version("1.2.0")
@@ -27,6 +31,10 @@ class MdfuCmd(Enum):
     GET_IMAGE_STATE = 4
     END_TRANSFER = 5
 
+# Valid command and status codes, looked up for every packet
+MDFU_CMD_VALUES = frozenset(item.value for item in MdfuCmd)
+MDFU_STATUS_VALUES = frozenset(item.value for item in MdfuStatus)
+
 class ClientInfoType(Enum):
     """MDFU data types for GetClientInfo command response"""
     PROTOCOL_VERSION = 1
@@ -100,6 +108,9 @@ class MdfuUpdateError(MdfuProtocolError):
 class MdfuPacket():
     """MDFU packet class
     """
+    __slots__ = ()
+    # Size of the sequence field and the command or status field
+    HEADER_SIZE = 2
 
 class InterTransactionDelay(object):
     """
@@ -180,6 +191,8 @@ class InterTransactionDelay(object):
 class MdfuCmdPacket(MdfuPacket):
     """MDFU command packet
     """
+    __slots__ = ("sequence_number", "command", "data", "sync")
+
     def __init__(self, sequence_number: int, command: int, data: bytes, sync=False):
         """MDFU command packet initialization
 
@@ -199,17 +212,15 @@ class MdfuCmdPacket(MdfuPacket):
         if sequence_number > 31 or sequence_number < 0:
             raise ValueError("Valid values for MDFU packet sequence number are 0...31", sequence_number)
         self.sequence_number = sequence_number
-        cmd_values = set(item.value for item in MdfuCmd)
-        if command not in cmd_values:
+        if command not in MDFU_CMD_VALUES:
             raise MdfuCmdNotSupportedError(f"{hex(command)} is not a valid MDFU command")
 
-
     def __repr__(self) -> str:
         return f"""\
 Command:         {MdfuCmd(self.command).name} ({hex(self.command)})
 Sequence Number: {self.sequence_number}
 Sync:            {self.sync}
-Data:            {self.data}
+Data:            {bytes(self.data)}
 """
 
     @staticmethod
@@ -224,7 +235,8 @@ Data:            {self.data}
         sequence_field = packet[0]
         sequence_number = sequence_field & 0x1f
         sync = bool(sequence_field & 0x80)
-        command = int.from_bytes(packet[1:2], byteorder="little")
+        # A packet without command field is decoded as invalid command zero
+        command = packet[1] if len(packet) > 1 else 0
         data = packet[2:]
         return sequence_number, command, data, sync
 
@@ -241,21 +253,28 @@ Data:            {self.data}
         pack = cls(sequence_number, command, data, sync=sync)
         return pack
 
+    def to_buffers(self):
+        """Create binary MDFU packet as header and data without joining them
+
+        :return: Sequence and command fields, and packet data
+        :rtype: tuple(bytes, Bytes like object)
+        """
+        return bytes((self.sequence_number | (0x80 if self.sync else 0x00), self.command)), self.data
+
     def to_binary(self):
         """Create binary MDFU packet
 
         :return: MDFU packet in binary form
         :rtype: Bytes
         """
-        sequence_field = self.sequence_number | ((1 << 7) if self.sync else 0x00)
-        packet =  sequence_field.to_bytes(1, byteorder="little") \
-            + self.command.to_bytes(1, byteorder="little") \
-            + self.data
-        return packet
+        header, data = self.to_buffers()
+        return header + data
 
 class MdfuStatusPacket(MdfuPacket):
     """MDFU status packet
     """
+    __slots__ = ("sequence_number", "status", "data", "resend")
+
     def __init__(self, sequence_number, status, data=bytes(), resend=False):
         """MDFU packet initialization
 
@@ -272,8 +291,7 @@ class MdfuStatusPacket(MdfuPacket):
             raise ValueError("Valid values for MDFU packet sequence number are 0...31")
         self.sequence_number = sequence_number
 
-        status_values = set(item.value for item in MdfuStatus)
-        if status not in status_values:
+        if status not in MDFU_STATUS_VALUES:
             raise MdfuStatusInvalidError(f"{hex(status)} is not a valid MDFU status")
         self.status = status
         self.resend = resend
@@ -298,7 +316,8 @@ Data:            0x{self.data.hex()}
         sequence_field = packet[0]
         sequence_number = sequence_field & 0x1f
         resend = bool(sequence_field & 0x40)
-        status = int.from_bytes(packet[1:2], byteorder="little")
+        # A packet without status field is decoded as invalid status zero
+        status = packet[1] if len(packet) > 1 else 0
         data = packet[2:]
         return sequence_number, status, data, resend
 
@@ -321,11 +340,7 @@ Data:            0x{self.data.hex()}
         :return: MDFU packet in binary form
         :rtype: Bytes
         """
-        sequence_field = self.sequence_number | ((1 << 6) if self.resend else 0x00)
-        packet =  sequence_field.to_bytes(1, byteorder="little") \
-            + self.status.to_bytes(1, byteorder="little") \
-            + self.data
-        return packet
+        return bytes((self.sequence_number | (0x40 if self.resend else 0x00), self.status)) + self.data
 
 class ClientInfo():
     """Class to handle MDFU client information
@@ -576,16 +591,17 @@ Command timeouts
             if cmd not in self.timeouts:
                 self.timeouts[cmd] = self.default_timeout
 
-class Mdfu():
-    """MDFU protocol
+class MdfuHostBase():
+    """MDFU host protocol functions shared by the synchronous and asynchronous hosts
+
+    Contains everything that does not involve transport layer I/O, so that
+    both host implementations create and evaluate packets the same way.
     """
-    def __init__(self, transport: Transport, retries=5):
+    def __init__(self, transport, retries=5):
         """Class initialization
 
         :param transport: Defines wich transport layer the MDFU protocol uses
-        :type transport: Transport
-        :param timeout: Communication timeout in seconds
-        :type timeout: Int, defaults to 5
+        :type transport: Transport or AsyncTransport
         :param retries: How often a failed command should be retried.
         :type retries: Int, defaults to 5
         """
@@ -595,15 +611,267 @@ class Mdfu():
         self.initial_default_command_timeout = 1
         self.client = None
         self.opened = False
+        self.stats = SessionStats()
         self.logger = getLogger("pymdfu.MdfuHost")
 
+    def _io_snapshot(self):
+        """Take a snapshot of the transport and MAC layer counters
+
+        Transports and MAC layers that do not provide counters are reported as zero.
+
+        :return: Tuple of (transmitted bytes, received bytes, inter transaction delay wait time)
+        :rtype: tuple(int, int, float)
+        """
+        counters = getattr(self.transport, "counters", None)
+        if isinstance(counters, TransportCounters):
+            tx_bytes, rx_bytes = counters.tx_bytes, counters.rx_bytes
+        else:
+            tx_bytes = rx_bytes = 0
+        itd_wait_time = getattr(self.transport.mac, "itd_wait_time", 0.0)
+        if not isinstance(itd_wait_time, float):
+            itd_wait_time = 0.0
+        return tx_bytes, rx_bytes, itd_wait_time
+
+    def _record_io(self, cmd_stats, snapshot):
+        """Add the transport and MAC layer counter changes since a snapshot to command statistics
+
+        :param cmd_stats: Command statistics
+        :type cmd_stats: CommandStats
+        :param snapshot: Snapshot taken with _io_snapshot
+        :type snapshot: tuple
+        """
+        tx_bytes, rx_bytes, itd_wait_time = self._io_snapshot()
+        cmd_stats.tx_bytes += tx_bytes - snapshot[0]
+        cmd_stats.rx_bytes += rx_bytes - snapshot[1]
+        cmd_stats.itd_wait_time += itd_wait_time - snapshot[2]
+
+    def _record_response(self, cmd_stats, request_end):
+        """Add the response timing of a received status packet to command statistics
+
+        :param cmd_stats: Command statistics
+        :type cmd_stats: CommandStats
+        :param request_end: time.perf_counter_ns() value after the command was written
+        :type request_end: int
+        """
+        now = time.perf_counter_ns()
+        counters = getattr(self.transport, "counters", None)
+        response_start = counters.response_start if isinstance(counters, TransportCounters) else None
+        if response_start is None or response_start < request_end:
+            # Transport does not report when the response started
+            response_start = now
+        cmd_stats.first_byte_time += (response_start - request_end) / 1e9
+        cmd_stats.response_time += (now - request_end) / 1e9
+
+    def _set_client_info(self, response):
+        """Store client information from a Get Client Info status packet
+
+        :param response: Get Client Info status packet
+        :type response: MdfuStatusPacket
+        :raises MdfuProtocolError: For invalid client information
+        """
+        try:
+            self.client = ClientInfo.from_bytes(response.data)
+            # If the client provides the inter transaction delay we apply it to the
+            # MAC layer if it offers this feature
+            if hasattr(self.transport.mac, "inter_transaction_delay"):
+                if self.client.inter_transaction_delay is None:
+                    raise MdfuClientInfoError("Client did not provide mandatory inter transaction delay parameter.")
+                self.transport.mac.inter_transaction_delay = self.client.inter_transaction_delay
+
+        except (ValueError, MdfuClientInfoError) as err:
+            self.logger.error(err)
+            self.logger.error("Received invalid MDFU Client Info")
+            self.logger.debug("Raw Client Info 0x%s", LazyHex(response.data))
+            raise MdfuProtocolError from err
+
+    def _check_protocol_version(self):
+        """Check that the client protocol version is supported by this host
+
+        :raises MdfuProtocolError: When the client protocol version is not supported
+        """
+        if self.client.protocol_version > mdfu_protocol_version:
+            msg = f"MDFU client protocol version {self.client.protocol_version} not supported. " +\
+                f"This MDFU host implements MDFU protocol version {mdfu_protocol_version}. " +\
+                "Please update pymdfu to the latest version."
+            raise MdfuProtocolError(msg)
+
+    @staticmethod
+    def _parse_image_state(response):
+        """Get the image state from a Get Image State status packet
+
+        :param response: Get Image State status packet
+        :type response: MdfuStatusPacket
+        :raises MdfuProtocolError: For invalid payload in command response.
+        :return: Client image state
+        :rtype: ImageState
+        """
+        payload_length = len(response.data)
+        if payload_length > 1:
+            raise MdfuProtocolError("Get image state command returned with more data than expected." +\
+                                    f"Expected 1 byte but got {payload_length}")
+        if payload_length < 1:
+            raise MdfuProtocolError("Get image state command returned with less data than expected." + \
+                                    f"Expected 1 byte but got {payload_length}.")
+        try:
+            image_state = ImageState(response.data[0])
+        except ValueError as exc:
+            raise MdfuProtocolError("Invalid image state {response.data[0]} received from client.") from exc
+        return image_state
+
+    @staticmethod
+    def _check_image_state(image_state):
+        """Check that the transferred image is valid
+
+        :param image_state: Client image state
+        :type image_state: ImageState
+        :raises MdfuUpdateError: When the image is not valid
+        """
+        if image_state != ImageState.VALID:
+            raise MdfuUpdateError(f"Get image state command returned with image state {image_state.name}.")
+
+    def _command_timeout(self, command):
+        """Get the timeout for a command
+
+        :param command: MDFU command
+        :type command: MdfuCmd
+        :return: Command timeout in seconds
+        :rtype: float
+        """
+        try:
+            # Check if there is a specific timeout for the command
+            timeout = self.client.timeouts[command]
+        except KeyError:
+            # No specific timeout found, use client default
+            timeout = self.client.default_timeout
+        except AttributeError:
+            # No client provided timeouts found, use host default
+            timeout = self.initial_default_command_timeout
+        return timeout
+
+    def _decode_status_packet(self, data):
+        """Decode a status packet received from the client
+
+        :param data: Status packet received from the transport layer
+        :type data: Bytes like object
+        :raises MdfuProtocolError: For an invalid status packet
+        :return: MDFU status packet
+        :rtype: MdfuStatusPacket
+        """
+        try:
+            status_packet = MdfuStatusPacket.from_binary(data)
+        except (MdfuStatusInvalidError, MdfuCmdNotSupportedError) as exc:
+            self.logger.error(exc)
+            raise MdfuProtocolError(exc) from exc
+        self.logger.debug("Received a MDFU status packet\n%s\n", status_packet)
+        return status_packet
+
+    def _process_status_packet(self, status_packet):
+        """Process the status packet of a command
+
+        :param status_packet: MDFU status packet
+        :type status_packet: MdfuStatusPacket
+        :raises MdfuProtocolError: When the client reports an error
+        :return: True when the command was executed, False when the client requested a resend
+        :rtype: bool
+        """
+        if status_packet.resend:
+            self.logger.debug("Resending MDFU packet. Packet status was %s",\
+                    MdfuStatus(status_packet.status).name)
+            return False
+        self._increment_sequence_number()
+        if status_packet.status != MdfuStatus.SUCCESS.value:
+            self.log_error_cause(status_packet)
+            raise MdfuProtocolError()
+        return True
+
+    def _raise_retries_exhausted(self, cmd_packet):
+        """Raise an error for a command that failed after all retries
+
+        :param cmd_packet: Command packet
+        :type cmd_packet: MdfuCmdPacket
+        :raises MdfuProtocolError: Always
+        """
+        msg = f"Tried {1 + self.retries} times to send command " + \
+                f"{MdfuCmd(cmd_packet.command).name} without success"
+        self.logger.error(msg)
+        raise MdfuProtocolError(msg)
+
+    def _increment_sequence_number(self):
+        self.sequence_number = (self.sequence_number + 1) & 0x1f
+
+    def log_error_cause(self, status_packet: MdfuStatusPacket):
+        """Log MDFU client repsonse error cause
+
+        :param status_packet: Mdfu status packet with error response status
+        :type status_packet: MdfuStatusPacket
+        """
+        error = MdfuStatus(status_packet.status)
+        self.logger.error("Received MDFU status packet with %s", error.name)
+
+        error_cause = None
+        if error == MdfuStatus.COMMAND_NOT_EXECUTED and len(status_packet.data):
+            try:
+                cause = CmdNotExecutedCause(status_packet.data[0])
+                error_cause = f"Command not executed cause: {cause.description}"
+            except ValueError:
+                error_cause = f"Invalid command not executed cause {status_packet.data[0]}"
+        elif error == MdfuStatus.ABORT_FILE_TRANSFER and len(status_packet.data):
+            try:
+                cause = FileTransferAbortCause(status_packet.data[0])
+                error_cause = f"File transfer abort cause: {cause.description}"
+            except ValueError:
+                error_cause = f"Invalid file abort cause {status_packet.data[0]}"
+
+        if error_cause:
+            self.logger.error(error_cause)
+
+class Mdfu(MdfuHostBase):
+    """MDFU protocol
+    """
+    # Upper limit for commands in flight in windowed mode. This is half of the
+    # sequence number space so that a stale status packet can never be mistaken
+    # for a response to a command that is currently in flight.
+    MAX_COMMANDS_IN_FLIGHT = 16
+
+    def __init__(self, transport: Transport, retries=5, windowed=False, frame_cache=None, progress=None):
+        """Class initialization
+
+        :param transport: Defines wich transport layer the MDFU protocol uses
+        :type transport: Transport
+        :param retries: How often a failed command should be retried.
+        :type retries: Int, defaults to 5
+        :param windowed: Send write chunk commands in windowed mode where up to
+        the client's number of command buffers are in flight before the host waits
+        for the corresponding status packets. This only helps with stream based
+        transports (UART), SPI and I2C clients have a single response buffer.
+        :type windowed: bool, defaults to False
+        :param frame_cache: Cache for encoded write chunk frames. Only used with
+        transports that support writing pre-encoded frames.
+        :type frame_cache: FrameCache, defaults to None
+        :param progress: Callback that is called with the number of image bytes
+        handed to the transfer so far and the image size
+        :type progress: Callable[[int, int], None], defaults to None
+        """
+        super().__init__(transport, retries=retries)
+        self.windowed = windowed
+        self.frame_cache = frame_cache
+        self.progress = progress
+
     def run_upgrade(self, image):
         """Executes the upgrade process
 
         :param image: File image
-        :type image: Bytes like object
+        :type image: Bytes like object or ImageSource
         :raises MdfuUpdateError: For an unsuccessful update
+        :return: Session statistics, also available in the stats attribute
+        when the update fails
+        :rtype: SessionStats
         """
+        if not isinstance(image, ImageSource):
+            image = ImageSource(image)
+        self.stats = SessionStats()
+        self.stats.image_size = len(image)
+        self.stats.start()
         try:
             self.transport.open()
             # Start session by:
@@ -613,19 +881,22 @@ class Mdfu():
             self.sequence_number = 0
             self._get_client_info(sync=True)
 
-            if self.client.protocol_version > mdfu_protocol_version:
-                msg = f"MDFU client protocol version {self.client.protocol_version} not supported. " +\
-                    f"This MDFU host implements MDFU protocol version {mdfu_protocol_version}. " +\
-                    "Please update pymdfu to the latest version."
-                raise MdfuProtocolError(msg)
-            chunks = chunkify(image, self.client.buffer_size)
+            self._check_protocol_version()
+            chunks = image.chunks(self.client.buffer_size)
+            if self.progress is not None:
+                chunks = self._report_progress(chunks, len(image))
+            templates = self._frame_templates(image)
 
             self.start_transfer()
-            for chunk in chunks:
-                self.write_chunk(chunk)
-            image_state = self._get_image_state()
-            if image_state != ImageState.VALID:
-                raise MdfuUpdateError(f"Get image state command returned with image state {image_state.name}.")
+            if self.windowed and self.client.buffer_count > 1:
+                self.write_chunks_windowed(chunks, templates)
+            elif templates is not None:
+                for chunk, template in zip(chunks, templates):
+                    self.write_chunk(chunk, template)
+            else:
+                for chunk in chunks:
+                    self.write_chunk(chunk)
+            self._check_image_state(self._get_image_state())
             self.end_transfer()
 
         except MdfuProtocolError as err:
@@ -634,6 +905,56 @@ class Mdfu():
             raise MdfuUpdateError(err) from err
         finally:
             self.transport.close()
+            self.stats.stop()
+        return self.stats
+
+    def _report_progress(self, chunks, size):
+        """Report the transfer progress while iterating over the image chunks
+
+        :param chunks: Pieces of the upgrade image file
+        :type chunks: Iterable of bytes like objects
+        :param size: Image size
+        :type size: int
+        :return: Generator yielding the chunks
+        :rtype: Generator of bytes like objects
+        """
+        offset = 0
+        for chunk in chunks:
+            yield chunk
+            offset = min(offset + len(chunk), size)
+            self.progress(offset, size)
+
+    def _frame_templates(self, image):
+        """Get the write chunk frame templates of an image from the frame cache
+
+        :param image: Firmware image
+        :type image: ImageSource
+        :return: Frame templates in chunk order or None if no frame cache is used or
+        the transport does not support frame templates
+        :rtype: FrameStore or None
+        """
+        if self.frame_cache is None:
+            return None
+        encoder = self.transport.frame_encoder
+        if not isinstance(encoder, type):
+            return None
+        return self.frame_cache.get(image, self.client.buffer_size, encoder)
+
+    def _write_packet(self, cmd_packet, template=None):
+        """Write a command packet to the transport
+
+        :param cmd_packet: Command packet
+        :type cmd_packet: MdfuCmdPacket
+        :param template: Encoded frame of the packet, defaults to None
+        :type template: FrameTemplate, optional
+        """
+        if template is not None:
+            self.transport.write_frame(template.frame(cmd_packet.sequence_number))
+        elif cmd_packet.data and hasattr(self.transport, "write_vectored"):
+            # Header and payload are passed down to the MAC layer without copying the payload into a packet
+            self.transport.write_vectored(cmd_packet.to_buffers())
+        else:
+            self.transport.write(cmd_packet.to_binary())
 
     def open(self):
         """Open MDFU session.
@@ -688,20 +1009,7 @@ class Mdfu():
         :rtype: ClientInfo
         """
         response = self.send_cmd(MdfuCmd.GET_CLIENT_INFO, sync=sync)
-        try:
-            self.client = ClientInfo.from_bytes(response.data)
-            # If the client provides the inter transaction delay we apply it to the
-            # MAC layer if it offers this feature
-            if hasattr(self.transport.mac, "inter_transaction_delay"):
-                if self.client.inter_transaction_delay is None:
-                    raise MdfuClientInfoError("Client did not provide mandatory inter transaction delay parameter.")
-                self.transport.mac.inter_transaction_delay = self.client.inter_transaction_delay
-
-        except (ValueError, MdfuClientInfoError) as err:
-            self.logger.error(err)
-            self.logger.error("Received invalid MDFU Client Info")
-            self.logger.debug("Raw Client Info 0x%s", response.data.hex())
-            raise MdfuProtocolError from err
+        self._set_client_info(response)
 
     def _get_image_state(self):
         """Executes Get Image State command
@@ -711,18 +1019,7 @@ class Mdfu():
         :rtype: ImageState
         """
         response = self.send_cmd(MdfuCmd.GET_IMAGE_STATE)
-        payload_length = len(response.data)
-        if payload_length > 1:
-            raise MdfuProtocolError("Get image state command returned with more data than expected." +\
-                                    f"Expected 1 byte but got {payload_length}")
-        if payload_length < 1:
-            raise MdfuProtocolError("Get image state command returned with less data than expected." + \
-                                    f"Expected 1 byte but got {payload_length}.")
-        try:
-            image_state = ImageState(response.data[0])
-        except ValueError as exc:
-            raise MdfuProtocolError("Invalid image state {response.data[0]} received from client.") from exc
-        return image_state
+        return self._parse_image_state(response)
 
     def start_transfer(self, sync=False):
         """Executes Start Transfer command
@@ -730,13 +1027,164 @@ class Mdfu():
         self.logger.debug("Starting MDFU file transfer")
         self.send_cmd(MdfuCmd.START_TRANSFER, sync=sync)
 
-    def write_chunk(self, chunk):
+    def write_chunk(self, chunk, template=None):
         """Executes Write Chunk command
 
         :param chunk: Piece of the upgrade image file
         :type chunk: Bytes like object
+        :param template: Encoded frame of the command, defaults to None
+        :type template: FrameTemplate, optional
+        """
+        self.send_cmd(MdfuCmd.WRITE_CHUNK, data=chunk, template=template)
+
+    def write_chunks_windowed(self, chunks, templates=None):
+        """Executes Write Chunk commands with multiple commands in flight
+
+        Up to buffer_count (reported by the client) Write Chunk commands are sent
+        before waiting for a status packet. Status packets are matched to the
+        commands in flight by their sequence number. When a status packet is lost
+        or the client requests a resend, the affected command and all commands
+        sent after it are sent again.
+
+        :param chunks: Pieces of the upgrade image file
+        :type chunks: Iterable of bytes like objects
+        :param templates: Encoded frames of the commands, defaults to None
+        :type templates: Iterable of FrameTemplate, optional
+        :raises MdfuProtocolError: For failed command execution
+        """
+        window = min(self.client.buffer_count, self.MAX_COMMANDS_IN_FLIGHT)
+        timeout = self.client.timeouts.get(MdfuCmd.WRITE_CHUNK, self.client.default_timeout)
+        # Commands in flight in the order they were sent,
+        # sequence number -> [packet, attempts left, frame template]
+        in_flight = OrderedDict()
+        if templates is None:
+            chunks = ((chunk, None) for chunk in chunks)
+        else:
+            chunks = zip(chunks, templates)
+        cmd_stats = self.stats.command(MdfuCmd.WRITE_CHUNK.name)
+        snapshot = self._io_snapshot()
+        try:
+            self._write_chunks_windowed(chunks, window, timeout, in_flight, cmd_stats)
+        finally:
+            self._record_io(cmd_stats, snapshot)
+
+    def _write_chunks_windowed(self, chunks, window, timeout, in_flight, cmd_stats):
+        """Send Write Chunk commands and process their status packets in windowed mode
+
+        :param chunks: Pieces of the upgrade image file and their frame templates
+        :type chunks: Iterator of tuple(bytes like object, FrameTemplate or None)
+        :param window: Maximum number of commands in flight
+        :type window: int
+        :param timeout: Status packet timeout in seconds
+        :type timeout: float
+        :param in_flight: Commands in flight
+        :type in_flight: OrderedDict
+        :param cmd_stats: Write Chunk command statistics
+        :type cmd_stats: CommandStats
+        :raises MdfuProtocolError: For failed command execution
+        """
+        chunks_pending = True
+        while chunks_pending or in_flight:
+            while chunks_pending and len(in_flight) < window:
+                try:
+                    chunk, template = next(chunks)
+                except StopIteration:
+                    chunks_pending = False
+                    break
+                cmd_packet = MdfuCmdPacket(self.sequence_number, MdfuCmd.WRITE_CHUNK.value, chunk)
+                self.logger.debug("Sending MDFU command packet:\n%s\n", cmd_packet)
+                cmd_stats.count += 1
+                cmd_stats.payload_bytes += len(chunk)
+                in_flight[self.sequence_number] = [cmd_packet, 1 + self.retries, template]
+                self._increment_sequence_number()
+                self._write_cmd_packet(cmd_packet, in_flight)
+            if not in_flight:
+                break
+            try:
+                # In windowed mode the response timing is measured from the start of the read
+                # since other commands were written after the one this status belongs to.
+                read_start = time.perf_counter_ns()
+                status_packet = self.transport.read(timeout=timeout)
+                self._record_response(cmd_stats, read_start)
+            except TransportError as exc:
+                # No valid status received, retry from the oldest command in flight since
+                # it is the one we are waiting for
+                self.logger.debug(exc)
+                self._retry_cmd_packets(next(iter(in_flight)), in_flight)
+                continue
+            status_packet = self._decode_status_packet(status_packet)
+
+            if status_packet.sequence_number not in in_flight:
+                self.logger.debug("Discarding MDFU status packet with sequence number %d " \
+                                  "that does not match any command in flight", status_packet.sequence_number)
+                continue
+            if status_packet.resend:
+                self.logger.debug("Resending MDFU packet. Packet status was %s",\
+                        MdfuStatus(status_packet.status).name)
+                cmd_stats.resends += 1
+                self._retry_cmd_packets(status_packet.sequence_number, in_flight)
+                continue
+            if status_packet.status != MdfuStatus.SUCCESS.value:
+                self.log_error_cause(status_packet)
+                raise MdfuProtocolError()
+            del in_flight[status_packet.sequence_number]
+
+    def _write_cmd_packet(self, cmd_packet, in_flight):
+        """Write a command packet in windowed mode
+
+        A transport error during the write is handled by retrying the write until the
+        command has no attempts left.
+
+        :param cmd_packet: Command packet to send
+        :type cmd_packet: MdfuCmdPacket
+        :param in_flight: Commands in flight
+        :type in_flight: OrderedDict
+        """
+        cmd_stats = self.stats.command(MdfuCmd.WRITE_CHUNK.name)
+        while True:
+            try:
+                start = time.perf_counter_ns()
+                self._write_packet(cmd_packet, in_flight[cmd_packet.sequence_number][2])
+                cmd_stats.write_time += (time.perf_counter_ns() - start) / 1e9
+                return
+            except TransportError as exc:
+                self.logger.debug(exc)
+                self._consume_attempt(cmd_packet.sequence_number, in_flight)
+
+    def _retry_cmd_packets(self, sequence_number, in_flight):
+        """Send a command in flight and all commands sent after it again
+
+        The client executes commands in sequence number order and does not accept
+        a command with an older sequence number after newer ones, so the commands
+        that followed the failed command are sent again as well (go-back-N). Only
+        the failed command uses up an attempt.
+
+        :param sequence_number: Sequence number of the command to resend
+        :type sequence_number: int
+        :param in_flight: Commands in flight
+        :type in_flight: OrderedDict
+        """
+        self._consume_attempt(sequence_number, in_flight)
+        resend = False
+        for seq, entry in list(in_flight.items()):
+            resend = resend or seq == sequence_number
+            if resend:
+                self._write_cmd_packet(entry[0], in_flight)
+
+    def _consume_attempt(self, sequence_number, in_flight):
+        """Decrement attempts left for a command in flight
+
+        :param sequence_number: Sequence number of the command
+        :type sequence_number: int
+        :param in_flight: Commands in flight
+        :type in_flight: OrderedDict
+        :raises MdfuProtocolError: When the command has no attempts left
         """
-        self.send_cmd(MdfuCmd.WRITE_CHUNK, data=chunk)
+        entry = in_flight[sequence_number]
+        entry[1] -= 1
+        if entry[1] == 0:
+            self._raise_retries_exhausted(entry[0])
+        self.stats.command(MdfuCmd.WRITE_CHUNK.name).retries += 1
 
     def end_transfer(self):
         """Executes End Transfer command
@@ -744,7 +1192,7 @@ class Mdfu():
         self.logger.debug("Ending MDFU file transfer")
         self.send_cmd(MdfuCmd.END_TRANSFER)
 
-    def send_cmd(self, command: MdfuCmd, data=bytes(), sync=False) -> MdfuStatusPacket:
+    def send_cmd(self, command: MdfuCmd, data=bytes(), sync=False, template=None) -> MdfuStatusPacket:
         """Send a command packet to MDFU client
 
         :param command: Command to send
@@ -754,81 +1202,222 @@ class Mdfu():
         :param sync: Synchronize packet sequence number with client. When set the client
         will set its sequence number to the one received in this command packet.
         :type sync: Bool
+        :param template: Encoded frame of the command packet without sequence number, used
+        instead of encoding the packet. Not supported for commands with sync flag.
+        :type template: FrameTemplate, optional
         :return: MDFU status packet
         :rtype: MdfuStatusPacket
         """
         cmd_packet = MdfuCmdPacket(self.sequence_number, command.value, data, sync=sync)
         self.logger.debug("Sending MDFU command packet:\n%s\n", cmd_packet)
+        cmd_stats = self.stats.command(command.name)
+        cmd_stats.count += 1
+        cmd_stats.payload_bytes += len(data)
+        snapshot = self._io_snapshot()
         # We will try at least once plus the number of retries
         attempts = 1 + self.retries
+        timeout = self._command_timeout(command)
         try:
-            # Check if there is a specific timeout for the command
-            timeout = self.client.timeouts[command]
-        except KeyError:
-            # No specific timeout found, use client default
-            timeout = self.client.default_timeout
-        except AttributeError:
-            # No client provided timeouts found, use host default
-            timeout = self.initial_default_command_timeout
-        while attempts:
-            try:
-                self.transport.write(cmd_packet.to_binary())
-                status_packet = self.transport.read(timeout=timeout)
-                status_packet = MdfuStatusPacket.from_binary(status_packet)
-                self.logger.debug("Received a MDFU status packet\n%s\n", status_packet)
-
-                if status_packet.resend:
-                    self.logger.debug("Resending MDFU packet. Packet status was %s",\
-                            MdfuStatus(status_packet.status).name)
+            while attempts:
+                if attempts <= self.retries:
+                    cmd_stats.retries += 1
+                try:
+                    start = time.perf_counter_ns()
+                    self._write_packet(cmd_packet, template)
+                    request_end = time.perf_counter_ns()
+                    cmd_stats.write_time += (request_end - start) / 1e9
+                    response = self.transport.read(timeout=timeout)
+                    self._record_response(cmd_stats, request_end)
+                    status_packet = self._decode_status_packet(response)
+                    if self._process_status_packet(status_packet):
+                        break
+                    cmd_stats.resends += 1
                     attempts -= 1
-                    continue
-                if status_packet.status == MdfuStatus.SUCCESS.value:
-                    self._increment_sequence_number()
-                    break
-
-                self.log_error_cause(status_packet)
-                self._increment_sequence_number()
-                raise MdfuProtocolError()
-
-            except TransportError as exc:
-                self.logger.debug(exc)
-                attempts -= 1
-            except (MdfuStatusInvalidError, MdfuCmdNotSupportedError) as exc:
-                self.logger.error(exc)
-                raise MdfuProtocolError(exc) from exc
+                except TransportError as exc:
+                    self.logger.debug(exc)
+                    attempts -= 1
+        finally:
+            self._record_io(cmd_stats, snapshot)
         if attempts == 0:
-            msg = f"Tried {1 + self.retries} times to send command " + \
-                    f"{MdfuCmd(cmd_packet.command).name} without success"
-            self.logger.error(msg)
-            raise MdfuProtocolError(msg)
+            self._raise_retries_exhausted(cmd_packet)
 
         return status_packet
 
-    def _increment_sequence_number(self):
-        self.sequence_number = (self.sequence_number + 1) & 0x1f
+class AsyncMdfu(MdfuHostBase):
+    """Asynchronous MDFU protocol host
 
-    def log_error_cause(self, status_packet: MdfuStatusPacket):
-        """Log MDFU client repsonse error cause
+    Same protocol behavior as Mdfu but runs on an asyncio event loop with an
+    asynchronous transport, so that one event loop can update many clients.
+    """
+    def __init__(self, transport: AsyncTransport, retries=5):
+        """Class initialization
 
-        :param status_packet: Mdfu status packet with error response status
-        :type status_packet: MdfuStatusPacket
+        :param transport: Asynchronous transport layer the MDFU protocol uses
+        :type transport: AsyncTransport
+        :param retries: How often a failed command should be retried.
+        :type retries: Int, defaults to 5
         """
-        error = MdfuStatus(status_packet.status)
-        self.logger.error("Received MDFU status packet with %s", error.name)
+        super().__init__(transport, retries=retries)
 
-        error_cause = None
-        if error == MdfuStatus.COMMAND_NOT_EXECUTED and len(status_packet.data):
+    async def run_upgrade(self, image):
+        """Executes the upgrade process
+
+        :param image: File image
+        :type image: Bytes like object or ImageSource
+        :raises MdfuUpdateError: For an unsuccessful update
+        :return: Session statistics, also available in the stats attribute
+        when the update fails
+        :rtype: SessionStats
+        """
+        if not isinstance(image, ImageSource):
+            image = ImageSource(image)
+        self.stats = SessionStats()
+        self.stats.image_size = len(image)
+        self.stats.start()
+        try:
+            await self.transport.open()
+            self.sequence_number = 0
+            await self._get_client_info(sync=True)
+            self._check_protocol_version()
+
+            await self.start_transfer()
+            for chunk in image.chunks(self.client.buffer_size):
+                await self.write_chunk(chunk)
+            self._check_image_state(await self._get_image_state())
+            await self.end_transfer()
+
+        except MdfuProtocolError as err:
+            raise MdfuUpdateError(err) from err
+        except TransportError as err:
+            raise MdfuUpdateError(err) from err
+        finally:
+            await self.transport.close()
+            self.stats.stop()
+        return self.stats
+
+    async def open(self):
+        """Open MDFU session.
+
+        :raises MdfuProtocolError: When an error occurs on lower communication layers.
+        """
+        if not self.opened:
             try:
-                cause = CmdNotExecutedCause(status_packet.data[0])
-                error_cause = f"Command not executed cause: {cause.description}"
-            except ValueError:
-                error_cause = f"Invalid command not executed cause {status_packet.data[0]}"
-        elif error == MdfuStatus.ABORT_FILE_TRANSFER and len(status_packet.data):
+                await self.transport.open()
+            except TransportError as err:
+                raise MdfuProtocolError(err) from err
+            self.opened = True
+
+    async def close(self):
+        """Close MDFU session.
+
+        :raises MdfuProtocolError: When an error occurs on lower communication layers
+        """
+        if self.opened:
             try:
-                cause = FileTransferAbortCause(status_packet.data[0])
-                error_cause = f"File transfer abort cause: {cause.description}"
-            except ValueError:
-                error_cause = f"Invalid file abort cause {status_packet.data[0]}"
+                await self.transport.close()
+            except TransportError as err:
+                raise MdfuProtocolError(err) from err
+            self.opened = False
 
-        if error_cause:
-            self.logger.error(error_cause)
+    async def get_client_info(self, sync=True):
+        """Get MDFU client information
+
+        Before calling this function start an MDFU session by calling open().
+
+        :param sync: Synchronize packet sequence number with client.
+        :type sync: bool, optional
+        :raises MdfuProtocolError: For failed command execution
+        :return: Client information
+        :rtype: ClientInfo
+        """
+        if not self.opened:
+            raise MdfuProtocolError("Call open() before issuing any MDFU commands")
+
+        await self._get_client_info(sync=sync)
+        return self.client
+
+    async def _get_client_info(self, sync=False):
+        """Executes the GetClientInfo command
+
+        :param sync: Synchronize packet sequence number with client.
+        :type sync: bool, optional
+        :raises MdfuProtocolError: For failed command execution
+        """
+        response = await self.send_cmd(MdfuCmd.GET_CLIENT_INFO, sync=sync)
+        self._set_client_info(response)
+
+    async def _get_image_state(self):
+        """Executes Get Image State command
+
+        :raises MdfuProtocolError: For invalid payload in command response.
+        :return: Current client image state
+        :rtype: ImageState
+        """
+        response = await self.send_cmd(MdfuCmd.GET_IMAGE_STATE)
+        return self._parse_image_state(response)
+
+    async def start_transfer(self, sync=False):
+        """Executes Start Transfer command
+        """
+        self.logger.debug("Starting MDFU file transfer")
+        await self.send_cmd(MdfuCmd.START_TRANSFER, sync=sync)
+
+    async def write_chunk(self, chunk):
+        """Executes Write Chunk command
+
+        :param chunk: Piece of the upgrade image file
+        :type chunk: Bytes like object
+        """
+        await self.send_cmd(MdfuCmd.WRITE_CHUNK, data=chunk)
+
+    async def end_transfer(self):
+        """Executes End Transfer command
+        """
+        self.logger.debug("Ending MDFU file transfer")
+        await self.send_cmd(MdfuCmd.END_TRANSFER)
+
+    async def send_cmd(self, command: MdfuCmd, data=bytes(), sync=False) -> MdfuStatusPacket:
+        """Send a command packet to MDFU client
+
+        :param command: Command to send
+        :type command: MdfuCmd
+        :param data: Data to send, defaults to None
+        :type data: Bytes like object, optional
+        :param sync: Synchronize packet sequence number with client.
+        :type sync: Bool
+        :return: MDFU status packet
+        :rtype: MdfuStatusPacket
+        """
+        cmd_packet = MdfuCmdPacket(self.sequence_number, command.value, data, sync=sync)
+        self.logger.debug("Sending MDFU command packet:\n%s\n", cmd_packet)
+        cmd_stats = self.stats.command(command.name)
+        cmd_stats.count += 1
+        cmd_stats.payload_bytes += len(data)
+        snapshot = self._io_snapshot()
+        attempts = 1 + self.retries
+        timeout = self._command_timeout(command)
+        try:
+            while attempts:
+                if attempts <= self.retries:
+                    cmd_stats.retries += 1
+                try:
+                    start = time.perf_counter_ns()
+                    await self.transport.write(cmd_packet.to_binary())
+                    request_end = time.perf_counter_ns()
+                    cmd_stats.write_time += (request_end - start) / 1e9
+                    response = await self.transport.read(timeout=timeout)
+                    self._record_response(cmd_stats, request_end)
+                    status_packet = self._decode_status_packet(response)
+                    if self._process_status_packet(status_packet):
+                        break
+                    cmd_stats.resends += 1
+                    attempts -= 1
+                except TransportError as exc:
+                    self.logger.debug(exc)
+                    attempts -= 1
+        finally:
+            self._record_io(cmd_stats, snapshot)
+        if attempts == 0:
+            self._raise_retries_exhausted(cmd_packet)
+
+        return status_packet
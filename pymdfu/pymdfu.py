@@ -20,6 +20,10 @@ from pymdfu.mac.exceptions import MacError
 from .status_codes import STATUS_SUCCESS, STATUS_FAILURE
 from .tools.tools import ToolFactory, supported_tools
 from .mdfu import Mdfu, MdfuUpdateError, MdfuProtocolError, mdfu_protocol_version
+from .image import ImageSource
+
+# Same as pymdfu.service.DEFAULT_PORT, the service module is only imported by the actions that use it
+DEFAULT_SERVICE_PORT = 5560
 
 try:
     from . import __version__ as VERSION
@@ -38,8 +42,7 @@ def update(args):
     """
     logger = logging.getLogger(__name__)
     try:
-        with open(args.image, "rb") as file:
-            image = file.read()
+        with ImageSource.from_file(args.image) as image:
             try:
                 tool = ToolFactory.get_tool(args.tool, tool_args=args.tool_args)
             except ValueError as exc:
@@ -49,7 +52,12 @@ def update(args):
             except MacError as exc:
                 logger.error(exc)
                 return STATUS_FAILURE
-            mdfu = Mdfu(tool, retries=args.retries)
+            if args.frame_cache:
+                from .frame_cache import FrameCache # pylint: disable=import-outside-toplevel
+                frame_cache = FrameCache(args.frame_cache)
+            else:
+                frame_cache = None
+            mdfu = Mdfu(tool, retries=args.retries, windowed=args.windowed, frame_cache=frame_cache)
             try:
                 mdfu.run_upgrade(image)
                 logger.info("Upgrade finished successfully")
@@ -57,9 +65,157 @@ def update(args):
                 logger.error(exc)
                 logger.error("Upgrade failed")
                 return STATUS_FAILURE
+            finally:
+                print_stats(args, mdfu.stats)
+    except FileNotFoundError:
+        logger.error("Invalid image file: No such file or directory '%s'", args.image)
+        return STATUS_FAILURE
+    return STATUS_SUCCESS
+
+def print_stats(args, stats):
+    """Print MDFU session statistics when requested on the command line
+
+    :param args: Arguments from command line
+    :type args: dict
+    :param stats: Session statistics
+    :type stats: SessionStats
+    """
+    if args.stats_json:
+        print(stats.to_json())
+    elif args.stats:
+        print(stats)
+
+def load_devices_file(path):
+    """Load the device configurations from a devices file
+
+    Errors are logged.
+
+    :param path: Path to the TOML devices file with a [[device]] table per device
+    :type path: str
+    :return: Devices or None if the file is invalid or contains no devices
+    :rtype: list(FleetDevice) or None
+    """
+    from .fleet import FleetDevice # pylint: disable=import-outside-toplevel
+    logger = logging.getLogger(__name__)
+    try:
+        with open(path, 'rb') as file:
+            devices_config = toml_reader.load(file)
+        devices = [FleetDevice.from_config(device, index)
+                   for index, device in enumerate(devices_config.get("device", []))]
+    except FileNotFoundError:
+        logger.error("Invalid devices file: No such file or directory '%s'", path)
+        return None
+    except (toml_reader.TOMLDecodeError, ValueError) as exc:
+        logger.error("Invalid devices file '%s': %s", path, exc)
+        return None
+    if not devices:
+        logger.error("No devices found in devices file '%s'", path)
+        return None
+    return devices
+
+def update_many(args):
+    """Perform firmware update on multiple devices in parallel
+
+    :param args: Arguments from command line
+    :type args: dict
+    """
+    logger = logging.getLogger(__name__)
+    if len(args.tool_args):
+        print(f"{CliHelp.USAGE_UPDATE_MANY_CMD}pymdfu: error: unrecognized arguments: {' '.join(args.tool_args)}",
+              file=sys.stderr)
+        return STATUS_FAILURE
+    devices = load_devices_file(args.devices)
+    if devices is None:
+        return STATUS_FAILURE
+    from .fleet import MdfuFleetUpdater # pylint: disable=import-outside-toplevel
+    from .frame_cache import FrameCache # pylint: disable=import-outside-toplevel
+    try:
+        with ImageSource.from_file(args.image) as image:
+            updater = MdfuFleetUpdater(devices, max_workers=args.workers, retries=args.retries,
+                                       windowed=args.windowed, frame_cache=FrameCache(args.frame_cache))
+            results = updater.run(image)
     except FileNotFoundError:
         logger.error("Invalid image file: No such file or directory '%s'", args.image)
         return STATUS_FAILURE
+    except ValueError as exc:
+        logger.error(exc)
+        return STATUS_FAILURE
+    for result in results:
+        logger.info(result)
+    failed = sum(1 for result in results if not result.success)
+    if failed:
+        logger.error("Upgrade failed on %d of %d devices", failed, len(results))
+        return STATUS_FAILURE
+    logger.info("Upgrade of %d devices finished successfully", len(results))
+    return STATUS_SUCCESS
+
+def serve(args):
+    """Run the update service until interrupted
+
+    :param args: Arguments from command line
+    :type args: dict
+    """
+    logger = logging.getLogger(__name__)
+    if len(args.tool_args):
+        print(f"{CliHelp.USAGE_SERVE_CMD}pymdfu: error: unrecognized arguments: {' '.join(args.tool_args)}",
+              file=sys.stderr)
+        return STATUS_FAILURE
+    devices = load_devices_file(args.devices)
+    if devices is None:
+        return STATUS_FAILURE
+    from .service import MdfuService, FRAME_CACHE_STORES # pylint: disable=import-outside-toplevel
+    from .frame_cache import FrameCache # pylint: disable=import-outside-toplevel
+    try:
+        service = MdfuService(devices, port=args.port, retries=args.retries, windowed=args.windowed,
+                              frame_cache=FrameCache(args.frame_cache, max_stores=FRAME_CACHE_STORES))
+        service.start()
+    except (ValueError, OSError) as exc:
+        logger.error("Starting update service failed: %s", exc)
+        return STATUS_FAILURE
+    host, port = service.address
+    logger.info("Update service for %d devices listening on %s port %d", len(devices), host, port)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Update service stopped")
+    finally:
+        service.close()
+    return STATUS_SUCCESS
+
+def submit(args):
+    """Submit a job to the update service and report its progress
+
+    :param args: Arguments from command line
+    :type args: dict
+    """
+    logger = logging.getLogger(__name__)
+    if len(args.tool_args):
+        print(f"{CliHelp.USAGE_SUBMIT_CMD}pymdfu: error: unrecognized arguments: {' '.join(args.tool_args)}",
+              file=sys.stderr)
+        return STATUS_FAILURE
+    from .service import submit_job # pylint: disable=import-outside-toplevel
+    if args.image:
+        job = {"job": "update", "device": args.device, "image": os.path.abspath(args.image)}
+    else:
+        job = {"job": "client-info", "device": args.device}
+
+    def report(event):
+        if event.get("event") == "progress":
+            logger.info("%s: %d%% (%d of %d bytes)", event["device"], event["offset"] * 100 // event["size"],
+                        event["offset"], event["size"])
+
+    try:
+        result = submit_job(job, port=args.port, on_event=report)
+    except (OSError, ValueError) as exc:
+        logger.error("Submitting job to update service on port %d failed: %s", args.port, exc)
+        return STATUS_FAILURE
+    if not result.get("success"):
+        logger.error(result.get("error"))
+        return STATUS_FAILURE
+    if args.image:
+        logger.info("Upgrade finished successfully in %.2fs", result["duration"])
+    else:
+        logger.info(result["client_info"])
     return STATUS_SUCCESS
 
 def client_info(args):
@@ -195,7 +351,21 @@ class CliHelp():
     """)
     USAGE_UPDATE_CMD = \
     "pymdfu [--help | -h] [--verbose <level> | -v <level>] [--config-file <file> | -c <file>] "\
-    "update --tool <tool> --image <image> --retries <retries> [<tools-args>...]\n"
+    "update --tool <tool> --image <image> --retries <retries> [--windowed] [--stats | --stats-json] "\
+    "[--frame-cache <dir>] [<tools-args>...]\n"
+
+    USAGE_UPDATE_MANY_CMD = \
+    "pymdfu [--help | -h] [--verbose <level> | -v <level>] "\
+    "update-many --devices <file> --image <image> [--workers <workers>] [--retries <retries>] [--windowed] "\
+    "[--frame-cache <dir>]\n"
+
+    USAGE_SERVE_CMD = \
+    "pymdfu [--help | -h] [--verbose <level> | -v <level>] "\
+    "serve --devices <file> [--port <port>] [--retries <retries>] [--windowed] [--frame-cache <dir>]\n"
+
+    USAGE_SUBMIT_CMD = \
+    "pymdfu [--help | -h] [--verbose <level> | -v <level>] "\
+    "submit --device <name> (--image <image> | --client-info) [--port <port>]\n"
 
     USAGE_CLIENT_INFO_CMD = \
     "pymdfu [--help | -h] [--verbose <level> | -v <level>] [--config-file <file> | -c <file>] "\
@@ -238,6 +408,12 @@ class CliHelp():
                             client-info: Get MDFU client information
                             tools-help:  Get help on tool specific parameters
                             update:      Perform a firmware update
+                            update-many: Perform a firmware update on multiple
+                                         devices in parallel
+                            serve:       Run an update service that keeps the
+                                         tools of multiple devices open
+                            submit:      Submit an update or client-info job
+                                         to the update service
             
             -h, --help      Show this help message and exit
         
@@ -327,9 +503,154 @@ class CliHelp():
                             Number of retry attempts when encountering recoverable errors
                             during a MDFU transaction. Default is 5 retries.
 
+            --windowed      Keep up to the number of client command buffers of write
+                            chunk commands in flight before waiting for the client
+                            responses. Only speeds up updates over stream based
+                            transports (serial, network with serial transport), SPI
+                            and I2C clients have a single response buffer.
+
+            --stats         Print timing and throughput statistics per MDFU command
+                            after the update.
+
+            --stats-json    Print the statistics in JSON format.
+
+            --frame-cache <dir>
+                            Directory where the encoded write chunk frames of the
+                            image are cached. Later updates of the same image with
+                            the same client buffer size and transport reuse them.
+
         """)
         return update_help_text
 
+    @classmethod
+    def update_many_cmd_help(cls):
+        """Create help text for update-many action
+
+        Help text for
+            pymdfu update-many --help
+
+        :return: Help text for CLI update-many action
+        :rtype: str
+        """
+        update_many_help_text = textwrap.dedent(f"""\
+        {cls.USAGE_UPDATE_MANY_CMD}
+        Required arguments
+            --devices <file>
+                            TOML file with a [[device]] table for each MDFU client.
+                            Each table contains the tool name, the tool specific
+                            parameters and optionally a name and the number of
+                            retries for the device e.g.
+                                [[device]]
+                                name = "board1"
+                                tool = "serial"
+                                port = "/dev/ttyUSB0"
+                                baudrate = 115200
+
+            --image <image> FW image file to transfer to the MDFU clients.
+
+        Optional arguments
+{textwrap.indent(cls.COMMON_OPTIONS, cls.PARAMETER_INDENTATION * " ")}
+            -h, --help      Show this help message and exit
+
+            --workers <workers>
+                            Maximum number of devices that are updated at the
+                            same time. Default is 4.
+
+            --retries <retries>
+                            Number of retry attempts when encountering recoverable errors
+                            during a MDFU transaction. Default is 5 retries.
+
+            --windowed      Keep up to the number of client command buffers of write
+                            chunk commands in flight before waiting for the client
+                            responses. Only speeds up updates over stream based
+                            transports (serial, network with serial transport), SPI
+                            and I2C clients have a single response buffer.
+
+            --frame-cache <dir>
+                            Directory where the encoded write chunk frames of the
+                            image are cached for later runs. Without this option the
+                            frames are only shared between the devices of this run.
+
+        """)
+        return update_many_help_text
+
+    @classmethod
+    def serve_cmd_help(cls):
+        """Create help text for serve action
+
+        Help text for
+            pymdfu serve --help
+
+        :return: Help text for CLI serve action
+        :rtype: str
+        """
+        serve_help_text = textwrap.dedent(f"""\
+        {cls.USAGE_SERVE_CMD}
+        Run an update service that keeps the tools of the devices open and runs
+        update and client-info jobs submitted with the submit action. The service
+        only accepts connections from the local host and runs until interrupted.
+
+        Required arguments
+            --devices <file>
+                            TOML file with a [[device]] table for each MDFU client,
+                            see update-many action. Jobs select the device by its name.
+
+        Optional arguments
+{textwrap.indent(cls.COMMON_OPTIONS, cls.PARAMETER_INDENTATION * " ")}
+            -h, --help      Show this help message and exit
+
+            --port <port>   Port the service listens on. Default is {DEFAULT_SERVICE_PORT}.
+
+            --retries <retries>
+                            Number of retry attempts when encountering recoverable errors
+                            during a MDFU transaction. Default is 5 retries.
+
+            --windowed      Keep up to the number of client command buffers of write
+                            chunk commands in flight before waiting for the client
+                            responses. Only speeds up updates over stream based
+                            transports (serial, network with serial transport), SPI
+                            and I2C clients have a single response buffer.
+
+            --frame-cache <dir>
+                            Directory where the encoded write chunk frames of the
+                            images are cached for later runs. The service keeps the
+                            frames of the most recently used images in memory, without
+                            this option the frames are only kept while the service runs.
+
+        """)
+        return serve_help_text
+
+    @classmethod
+    def submit_cmd_help(cls):
+        """Create help text for submit action
+
+        Help text for
+            pymdfu submit --help
+
+        :return: Help text for CLI submit action
+        :rtype: str
+        """
+        submit_help_text = textwrap.dedent(f"""\
+        {cls.USAGE_SUBMIT_CMD}
+        Submit a job to the update service started with the serve action and
+        report the progress until the job is finished.
+
+        Required arguments
+            --device <name> Name of the device in the devices file of the service.
+
+            --image <image> FW image file to transfer to the MDFU client.
+
+            --client-info   Get MDFU client information instead of updating.
+
+        Optional arguments
+{textwrap.indent(cls.COMMON_OPTIONS, cls.PARAMETER_INDENTATION * " ")}
+            -h, --help      Show this help message and exit
+
+            --port <port>   Port of the update service. Default is {DEFAULT_SERVICE_PORT}.
+
+        """)
+        return submit_help_text
+
     @classmethod
     def tools_help_cmd_help(cls):
         """Create help text for tools-help action
@@ -358,11 +679,7 @@ class CliHelp():
         :return: List of supported tools
         :rtype: str
         """
-        supported_tools_txt = "["
-        for tool_name,_ in supported_tools.items():
-            supported_tools_txt += f"{tool_name}, "
-        supported_tools_txt = supported_tools_txt[:-2] + ']'
-        return supported_tools_txt
+        return "[" + ", ".join(supported_tools) + "]"
 
     @classmethod
     def tools_parameter_help(cls):
@@ -430,6 +747,12 @@ def print_help(args):
     if hasattr(args, "action") and args.action is not None:
         if args.action == "update":
             txt = CliHelp.update_cmd_help()
+        elif args.action == "update-many":
+            txt = CliHelp.update_many_cmd_help()
+        elif args.action == "serve":
+            txt = CliHelp.serve_cmd_help()
+        elif args.action == "submit":
+            txt = CliHelp.submit_cmd_help()
         elif args.action == "client-info":
             txt = CliHelp.client_info_cmd_help()
         elif args.action == "tools-help":
@@ -565,6 +888,47 @@ def main():
     update_cmd.add_argument("--tool", choices=supported_tools, required=not no_action)
     update_cmd.add_argument("--image", type=str, required=not no_action)
     update_cmd.add_argument("--retries", type=positive_int, required=False, default=5)
+    update_cmd.add_argument("--windowed", action="store_true")
+    update_cmd.add_argument("--stats", action="store_true")
+    update_cmd.add_argument("--stats-json", action="store_true")
+    update_cmd.add_argument("--frame-cache", type=str, required=False, default=None)
+
+    update_many_cmd = subparsers.add_parser(name='update-many',
+                                        usage=CliHelp.USAGE_UPDATE_MANY_CMD,
+                                        add_help=False,
+                                        prog="pymdfu")
+
+    update_many_cmd.set_defaults(func=update_many)
+    update_many_cmd.add_argument("--devices", type=str, required=not no_action)
+    update_many_cmd.add_argument("--image", type=str, required=not no_action)
+    update_many_cmd.add_argument("--workers", type=positive_int, required=False, default=4)
+    update_many_cmd.add_argument("--retries", type=positive_int, required=False, default=5)
+    update_many_cmd.add_argument("--windowed", action="store_true")
+    update_many_cmd.add_argument("--frame-cache", type=str, required=False, default=None)
+
+    serve_cmd = subparsers.add_parser(name='serve',
+                                        usage=CliHelp.USAGE_SERVE_CMD,
+                                        add_help=False,
+                                        prog="pymdfu")
+
+    serve_cmd.set_defaults(func=serve)
+    serve_cmd.add_argument("--devices", type=str, required=not no_action)
+    serve_cmd.add_argument("--port", type=positive_int, required=False, default=DEFAULT_SERVICE_PORT)
+    serve_cmd.add_argument("--retries", type=positive_int, required=False, default=5)
+    serve_cmd.add_argument("--windowed", action="store_true")
+    serve_cmd.add_argument("--frame-cache", type=str, required=False, default=None)
+
+    submit_cmd = subparsers.add_parser(name='submit',
+                                        usage=CliHelp.USAGE_SUBMIT_CMD,
+                                        add_help=False,
+                                        prog="pymdfu")
+
+    submit_cmd.set_defaults(func=submit)
+    submit_cmd.add_argument("--device", type=str, required=not no_action)
+    submit_cmd.add_argument("--port", type=positive_int, required=False, default=DEFAULT_SERVICE_PORT)
+    submit_job_group = submit_cmd.add_mutually_exclusive_group(required=not no_action)
+    submit_job_group.add_argument("--image", type=str)
+    submit_job_group.add_argument("--client-info", action="store_true")
 
     tool_help = subparsers.add_parser(name='tools-help',
                                         add_help=False)
@@ -578,7 +942,7 @@ def main():
 
     # When a configuration file is availble (config) we add the parameters from the specific tool (args.tool)
     # section to the tool arguments (tool_args)
-    if config:
+    if config and hasattr(args, "tool"):
         merge_config_file_tool_parameters(config, args.tool, tool_args) # pylint: disable=no-member
 
     args.tool_args = tool_args
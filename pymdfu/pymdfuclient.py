@@ -1,30 +1,114 @@
 
 """MDFU client"""
 import threading
+import time
 from logging import getLogger
 from collections import deque
 from packaging.version import Version
 from .mdfu import MdfuCmd, MdfuCmdPacket, MdfuStatusPacket, MdfuStatus,\
-                    MdfuCmdNotSupportedError, ClientInfo, ImageState
+                    MdfuCmdNotSupportedError, ClientInfo, ImageState, CmdNotExecutedCause
 from .transport import TransportError
+from .utils import LazyHex
+
+class ClientProfile():
+    """Timing and behaviour model of a MDFU client
+
+    Describes how long a client needs to execute commands so that host pipelining
+    and polling strategies can be evaluated without hardware. Commands are executed
+    one after the other and a command's status packet is available when its
+    execution finished. Up to the client's number of command buffers are accepted
+    while other commands are executed.
+    """
+    def __init__(self, latency_scale=0.0, latencies=None, write_time_per_byte=0.0,
+                 erase_time_per_byte=0.0, page_size=512, busy_time=0.0):
+        """Class initialization
+
+        :param latency_scale: Command processing latency as fraction of the command
+        timeout that the client advertises, defaults to 0.0
+        :type latency_scale: float, optional
+        :param latencies: Processing latency in seconds per command, overrides the latency
+        derived from the timeouts, defaults to None
+        :type latencies: dict(MdfuCmd: float), optional
+        :param write_time_per_byte: Flash write time in seconds per byte, defaults to 0.0
+        :type write_time_per_byte: float, optional
+        :param erase_time_per_byte: Flash erase time in seconds per byte. A page is erased
+        when a write chunk writes its first byte, defaults to 0.0
+        :type erase_time_per_byte: float, optional
+        :param page_size: Flash page size in bytes, defaults to 512
+        :type page_size: int, optional
+        :param busy_time: Time in seconds the client is busy after executing a command before
+        it starts executing the next buffered command, defaults to 0.0
+        :type busy_time: float, optional
+        """
+        if page_size < 1:
+            raise ValueError(f"Invalid page size {page_size}")
+        self.latency_scale = latency_scale
+        self.latencies = latencies if latencies else {}
+        self.write_time_per_byte = write_time_per_byte
+        self.erase_time_per_byte = erase_time_per_byte
+        self.page_size = page_size
+        self.busy_time = busy_time
+
+    def processing_time(self, command, timeout, offset=0, size=0):
+        """Time the client needs to execute a command
+
+        :param command: MDFU command
+        :type command: MdfuCmd
+        :param timeout: Command timeout advertised by the client in seconds
+        :type timeout: float
+        :param offset: Image offset of a Write Chunk command, defaults to 0
+        :type offset: int, optional
+        :param size: Data size of a Write Chunk command, defaults to 0
+        :type size: int, optional
+        :return: Processing time in seconds
+        :rtype: float
+        """
+        processing_time = self.latencies.get(command, self.latency_scale * timeout)
+        if command == MdfuCmd.WRITE_CHUNK and size:
+            # Pages that start within the written range are erased before writing
+            pages = -(-(offset + size) // self.page_size) - -(-offset // self.page_size)
+            processing_time += pages * self.page_size * self.erase_time_per_byte
+            processing_time += size * self.write_time_per_byte
+        return processing_time
+
+# Predefined client profiles, None is a client that executes commands immediately
+client_profiles = {
+    "none": None,
+    # Microcontroller with self-programming flash memory
+    "flash": ClientProfile(latency_scale=0.0001, write_time_per_byte=20e-6, erase_time_per_byte=40e-6,
+                           page_size=512, busy_time=0.0005)
+}
 
 class MdfuClient(threading.Thread):
     """MDFU client
 
     This class can be used to simulate a MDFU client
     """
-    def __init__(self, transport, client_info=None):
+    # Minimum time in seconds to wait for a command from the host while commands are executed
+    MIN_READ_TIMEOUT = 0.001
+
+    def __init__(self, transport, client_info=None, profile=None):
         """MDFU client class initialization
 
         :param transport: Transport object
         :type transport: Transport
         :param client_info: Client information, defaults to None
         :type client_info: ClientInfo, optional
+        :param profile: Timing and behaviour model, defaults to None which executes
+        commands immediately
+        :type profile: ClientProfile, optional
         """
         self.queue = deque()
+        # Commands in execution as (completion time, status packet) in execution order
+        self.pending = deque()
+        self.busy_until = 0.0
+        self.image_offset = 0
+        self.profile = profile
         self.sequence_number = 0
         self.logger = getLogger("pymdfu.MdfuClient")
         self.resend = False
+        # Sent status packets by sequence number for commands that the host sends again
+        self.history = {}
         self.transport = transport
         if client_info:
             self.client_info = client_info
@@ -46,11 +130,16 @@ class MdfuClient(threading.Thread):
         self.transport.open()
         while True:
             data = None
+            delay = self._next_status_delay()
             try:
-                # TODO this could be non-blocking, right now we just time out and try again.
-                # If we don't block we can service other tasks more often (right now just
-                # thread termination)
-                data = self.transport.read()
+                if delay is None:
+                    # TODO this could be non-blocking, right now we just time out and try again.
+                    # If we don't block we can service other tasks more often (right now just
+                    # thread termination)
+                    data = self.transport.read()
+                elif delay > 0 or self._host_data_available():
+                    # Do not wait longer for a command than until the next status packet is ready
+                    data = self._read(max(delay, self.MIN_READ_TIMEOUT))
             except TimeoutError:
                 pass
             except TransportError:
@@ -63,7 +152,7 @@ class MdfuClient(threading.Thread):
                 try:
                     packet = MdfuCmdPacket.from_binary(data)
                 except ValueError:
-                    self.logger.warning("MDFU client got an invalid packet: 0x%x\n", data.hex())
+                    self.logger.warning("MDFU client got an invalid packet: 0x%s\n", LazyHex(data))
                     # TODO What should we do here if the MDFU packet cannot be decoded without error?
                     # Sending back a status packed with last known good sequence number (+1)?
                     # what if the corrupted packet is the first packet with a sync?
@@ -79,18 +168,46 @@ class MdfuClient(threading.Thread):
 
                 if packet.sync:
                     self.sequence_number = packet.sequence_number
+                    self.history.clear()
                 else:
+                    if self._is_duplicate(packet.sequence_number):
+                        # Command was already executed, send its status packet again without
+                        # executing it twice
+                        if packet.sequence_number in self.history:
+                            self.logger.debug("Got command %d again, resending its status packet",
+                                              packet.sequence_number)
+                            self.queue.appendleft(self.history[packet.sequence_number])
+                        continue
                     if not self.resend: # increment only when this is not a packet resend
                         self._increment_sequence_number()
                     if self.sequence_number != packet.sequence_number:
                         self.logger.warning("Wrong sequence number, expected " \
                                             "%d but got %d", self.sequence_number, packet.sequence_number)
-                        # TODO what should we report to the host if the sequence number does not match?
-                        # Create a new status code and send this? status code = ProtocolError?
-                        status_packet = MdfuStatusPacket(self.sequence_number,\
-                                        MdfuStatus.COMMAND_NOT_EXECUTED.value)
+                        # Expect the same sequence number again with the next command
+                        self.sequence_number = (self.sequence_number - 1) & 0x1f
+                        if (packet.sequence_number - self.sequence_number - 1) & 0x1f \
+                                < self.client_info.buffer_count:
+                            # A command before this one got lost, discard the command. The host
+                            # sends it again together with the lost one.
+                            continue
+                        # Sequence number is outside of the host's window, the host is out of sync
+                        status_packet = MdfuStatusPacket(packet.sequence_number,
+                                            MdfuStatus.COMMAND_NOT_EXECUTED.value,
+                                            bytes([CmdNotExecutedCause.SEQUENCE_NUMBER_INVALID.value]))
                         self.queue.appendleft(status_packet)
                         continue
+                    self.history.pop(packet.sequence_number, None)
+
+                if self.profile is not None and len(self.pending) >= self.client_info.buffer_count:
+                    self.logger.warning("All command buffers in use, requesting resend of packet %d",
+                                        packet.sequence_number)
+                    if not packet.sync:
+                        # Expect the same sequence number when the command is sent again
+                        self.sequence_number = (self.sequence_number - 1) & 0x1f
+                    status_packet = MdfuStatusPacket(packet.sequence_number,
+                                                     MdfuStatus.COMMAND_NOT_EXECUTED.value, resend=True)
+                    self.queue.appendleft(status_packet)
+                    continue
 
                 if packet.command == MdfuCmd.GET_CLIENT_INFO.value:
                     self.cmd_get_client_info(packet)
@@ -106,10 +223,15 @@ class MdfuClient(threading.Thread):
                     self.logger.error("Command not supported %s", packet.command)
                     status_packet = MdfuStatusPacket(packet.sequence_number, MdfuStatus.COMMAND_NOT_SUPPORTED.value, data)
                     self.queue.appendleft(status_packet)
+            self._release_completed()
             if len(self.queue):
-                self.transport.write(self.queue.pop().to_binary())
+                status_packet = self.queue.pop()
+                self.history[status_packet.sequence_number] = status_packet
+                self.transport.write(status_packet.to_binary())
         self.transport.close()
         self.queue.clear()
+        self.pending.clear()
+        self.history.clear()
         self.sequence_number = 0
         self.logger.debug("MDFU client stopped")
 
@@ -118,6 +240,94 @@ class MdfuClient(threading.Thread):
         """
         self.sequence_number = (self.sequence_number + 1) & 0x1f
 
+    def _is_duplicate(self, sequence_number):
+        """Check if a command was received before
+
+        Sequence numbers up to half of the sequence number space before the
+        expected one belong to commands that were already received.
+
+        :param sequence_number: Sequence number of the command
+        :type sequence_number: int
+        :return: True if the command was received before
+        :rtype: bool
+        """
+        return 0 <= (self.sequence_number - sequence_number) & 0x1f < 16
+
+    def _next_status_delay(self):
+        """Time until the next status packet is ready to be sent
+
+        :return: Delay in seconds or None when no status packet is ready or pending
+        :rtype: float or None
+        """
+        if self.queue:
+            return 0.0
+        if self.pending:
+            return max(0.0, self.pending[0][0] - time.perf_counter())
+        return None
+
+    def _read(self, timeout):
+        """Read a command packet from the host
+
+        MAC layer reads block up to the MAC layer timeout, so it is limited to
+        the read timeout while reading.
+
+        :param timeout: Read timeout in seconds
+        :type timeout: float
+        :return: MDFU command packet
+        :rtype: bytes
+        """
+        mac = self.transport.mac
+        mac_timeout = getattr(mac, "timeout", 0)
+        if mac_timeout == 0 or (mac_timeout is not None and mac_timeout <= timeout):
+            return self.transport.read(timeout=timeout)
+        mac.timeout = timeout
+        try:
+            return self.transport.read(timeout=timeout)
+        finally:
+            mac.timeout = mac_timeout
+
+    def _host_data_available(self):
+        """Check if the host sent data
+
+        :return: True if data is available or the MAC layer can't report it
+        :rtype: bool
+        """
+        # Stream based transports can have received more than one frame already
+        if getattr(self.transport, "rx_buf", None):
+            return True
+        try:
+            return len(self.transport.mac) > 0
+        except TypeError:
+            return True
+
+    def _release_completed(self):
+        """Move the status packets of commands that finished execution into the send queue
+        """
+        now = time.perf_counter()
+        while self.pending and self.pending[0][0] <= now:
+            self.queue.appendleft(self.pending.popleft()[1])
+
+    def _respond(self, packet, status_packet):
+        """Queue the status packet of an executed command
+
+        Without a client profile the status packet is ready immediately, otherwise
+        when the command finished execution according to the profile.
+
+        :param packet: MDFU command packet
+        :type packet: MdfuCmdPacket
+        :param status_packet: MDFU status packet
+        :type status_packet: MdfuStatusPacket
+        """
+        if self.profile is None:
+            self.queue.appendleft(status_packet)
+            return
+        command = MdfuCmd(packet.command)
+        timeout = self.client_info.timeouts.get(command, self.client_info.default_timeout)
+        processing_time = self.profile.processing_time(command, timeout, self.image_offset, len(packet.data))
+        completion = max(time.perf_counter(), self.busy_until) + processing_time
+        self.busy_until = completion + self.profile.busy_time
+        self.pending.append((completion, status_packet))
+
     def cmd_get_client_info(self, packet):
         """Handle Get Client Info command
 
@@ -125,7 +335,7 @@ class MdfuClient(threading.Thread):
         :type packet: MdfuCmdPacket
         """
         status_packet = MdfuStatusPacket(packet.sequence_number, MdfuStatus.SUCCESS.value, self.client_info.to_bytes())
-        self.queue.appendleft(status_packet)
+        self._respond(packet, status_packet)
 
     def cmd_start_transfer(self, packet):
         """Handle Start Transfer command
@@ -133,8 +343,9 @@ class MdfuClient(threading.Thread):
         :param packet: MDFU command packet
         :type packet: MdfuCmdPacket
         """
+        self.image_offset = 0
         status_packet = MdfuStatusPacket(packet.sequence_number, MdfuStatus.SUCCESS.value)
-        self.queue.appendleft(status_packet)
+        self._respond(packet, status_packet)
 
     def cmd_write_chunk(self, packet):
         """Handle Write Chunk command
@@ -143,7 +354,8 @@ class MdfuClient(threading.Thread):
         :type packet: MdfuCmdPacket
         """
         status_packet = MdfuStatusPacket(packet.sequence_number, MdfuStatus.SUCCESS.value)
-        self.queue.appendleft(status_packet)
+        self._respond(packet, status_packet)
+        self.image_offset += len(packet.data)
 
     def cmd_get_image_state(self, packet):
         """Handle Get image state command
@@ -153,7 +365,7 @@ class MdfuClient(threading.Thread):
         """
         status_packet = MdfuStatusPacket(packet.sequence_number, MdfuStatus.SUCCESS.value,
                                          bytes([ImageState.VALID.value]))
-        self.queue.appendleft(status_packet)
+        self._respond(packet, status_packet)
 
     def cmd_end_transfer(self, packet):
         """Handle End Transfer command
@@ -162,7 +374,76 @@ class MdfuClient(threading.Thread):
         :type packet: MdfuCmdPacket
         """
         status_packet = MdfuStatusPacket(packet.sequence_number, MdfuStatus.SUCCESS.value)
-        self.queue.appendleft(status_packet)
+        self._respond(packet, status_packet)
+
+class MdfuClientServer():
+    """MDFU clients for all connections of a socket server
+
+    Each connection accepted by the server gets its own MDFU client with its
+    own protocol state, so that one process can simulate many devices. The
+    socket I/O of all connections is handled by the selector loop of the
+    server.
+    """
+    def __init__(self, server, transport_factory, client_info=None, profile=None):
+        """Class initialization
+
+        :param server: Socket server
+        :type server: MacSocketServer
+        :param transport_factory: Creates the client transport layer for a connection MAC layer
+        :type transport_factory: Callable[[Mac], Transport]
+        :param client_info: Client information of the clients, defaults to None
+        :type client_info: ClientInfo, optional
+        :param profile: Timing and behaviour model of the clients, defaults to None
+        :type profile: ClientProfile, optional
+        """
+        self.server = server
+        self.transport_factory = transport_factory
+        self.client_info = client_info
+        self.profile = profile
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.logger = getLogger("pymdfu.MdfuClientServer")
+        server.on_connect = self._connect
+        server.on_disconnect = self._disconnect
+
+    def __len__(self):
+        """Number of connected clients"""
+        with self.lock:
+            return len(self.clients)
+
+    def start(self):
+        """Start accepting connections
+
+        :raises OSError: When the server can't listen on its ports
+        """
+        self.server.open()
+
+    def stop(self):
+        """Close all connections and stop the clients"""
+        self.server.close()
+        with self.lock:
+            clients = list(self.clients.values())
+            self.clients.clear()
+        for mdfu_client in clients:
+            mdfu_client.stop_event.set()
+        for mdfu_client in clients:
+            mdfu_client.join()
+
+    def _connect(self, mac):
+        mdfu_client = MdfuClient(self.transport_factory(mac), client_info=self.client_info, profile=self.profile)
+        mdfu_client.name = f"MDFU client {mac.addr}"
+        with self.lock:
+            self.clients[mac] = mdfu_client
+        self.logger.debug("Starting MDFU client for %s", mac.addr)
+        mdfu_client.start()
+
+    def _disconnect(self, mac):
+        with self.lock:
+            mdfu_client = self.clients.pop(mac, None)
+        if mdfu_client is not None:
+            self.logger.debug("Stopping MDFU client for %s", mac.addr)
+            # The client thread ends after its pending read, the selector loop must not wait for it
+            mdfu_client.stop_event.set()
 
 
 if __name__ == "__main__":
@@ -14,7 +14,7 @@ try:
     import tomllib as toml_reader
 except ModuleNotFoundError:
     import tomli as toml_reader #pylint: disable=import-error
-from pymdfu.pymdfuclient import MdfuClient
+from pymdfu.pymdfuclient import MdfuClient, MdfuClientServer
 from pymdfu.tools.tools import ToolFactory, supported_client_tools
 
 try:
@@ -26,15 +26,19 @@ except ImportError:
     COMMIT_ID = "N/A"
     BUILD_DATE = "N/A"
 
-def run_mdfu_client(transport):
+def run_mdfu_client(transport, client_info=None, profile=None):
     """Run MDFU client
 
     Terminate the client with CTRL-C
 
     :param transport: Initialized transport layer stack
     :type transport: Transport
+    :param client_info: Client information, defaults to None
+    :type client_info: ClientInfo, optional
+    :param profile: Timing and behaviour model of the client, defaults to None
+    :type profile: ClientProfile, optional
     """
-    client = MdfuClient(transport)
+    client = MdfuClient(transport, client_info=client_info, profile=profile)
     client.start()
     try:
         while client.is_alive():
@@ -42,6 +46,28 @@ def run_mdfu_client(transport):
     except KeyboardInterrupt:
         client.stop()
 
+def run_mdfu_client_server(tool):
+    """Run a MDFU client for each connection of a multi-client tool
+
+    Terminate the clients with CTRL-C
+
+    :param tool: Tool with a socket server and a create_transport method
+    :type tool: NetworkClientTool
+    """
+    logger = logging.getLogger(__name__)
+    server = MdfuClientServer(tool.server, tool.create_transport, client_info=tool.client_info, profile=tool.profile)
+    server.start()
+    ports = [address[1] for address in tool.server.addresses]
+    if len(ports) > 1:
+        logger.info("Accepting MDFU host connections on ports %d to %d", ports[0], ports[-1])
+    else:
+        logger.info("Accepting MDFU host connections on port %d", ports[0])
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
 class CliHelp():
     """CLI help"""
     USAGE = textwrap.dedent("""\
@@ -60,6 +86,10 @@ class CliHelp():
         Start client with networking tool on localhost port 5558
 
             pymdfuclient --tool network --host localhost --port 5558
+
+        Simulate many clients on ports 5600 to 5699 with the SPI transport
+
+            pymdfuclient --tool network --port 5600 --port-count 100 --transport spi
     """)
 
     @classmethod
@@ -265,7 +295,11 @@ def main():
         print(help_txt, file=sys.stderr)
         return 1
     try:
-        run_mdfu_client(tool)
+        if getattr(tool, "server", None) is not None:
+            run_mdfu_client_server(tool)
+        else:
+            run_mdfu_client(tool, client_info=getattr(tool, "client_info", None),
+                            profile=getattr(tool, "profile", None))
     # pylint: disable-next=broad-exception-caught
     except Exception as exc:
         logger.error("Operation failed with %s: %s", type(exc).__name__, exc)
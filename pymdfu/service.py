@@ -0,0 +1,379 @@
+"""Persistent MDFU update service
+
+Each pymdfu invocation pays for the interpreter start, module imports,
+configuration parsing and opening the tool before the first MDFU command is
+sent. The update service is a long running process that keeps the tools of
+the configured devices open and runs update and client info jobs that are
+submitted over a local socket.
+
+Each connection carries one job. The client sends the job as a JSON object on
+a single line and the service answers with one JSON object per line:
+
+    {"job": "update", "device": "board1", "image": "/path/to/update_image.img"}
+    {"job": "client-info", "device": "board1"}
+
+    {"event": "progress", "device": "board1", "offset": 4096, "size": 65536}
+    {"event": "result", "device": "board1", "success": true, "error": null, ...}
+
+The result is always the last line, progress events are only sent for updates.
+"""
+import json
+import socket
+import socketserver
+import threading
+import time
+from logging import getLogger
+from pymdfu.mac.exceptions import MacError
+from .tools.tools import ToolFactory
+from .transport import Transport, TransportError
+from .mdfu import Mdfu, MdfuUpdateError, MdfuProtocolError
+from .image import ImageSource
+
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 5560
+# Upper limit for the size of a job line
+MAX_JOB_SIZE = 65536
+# Number of frame stores, one per image, buffer size and transport, the service keeps in memory
+FRAME_CACHE_STORES = 16
+
+class WarmTool(Transport):
+    """Tool of a service device that is kept open between MDFU sessions
+
+    The MDFU host opens and closes its transport for every session. This
+    wrapper opens the tool on the first session and leaves it open when the
+    session is closed so that the following sessions start right away.
+    """
+    def __init__(self, device):
+        """Class initialization
+
+        :param device: Device configuration
+        :type device: FleetDevice
+        """
+        self.device = device
+        self.tool = None
+        self.is_open = False
+        # Jobs for the same device are executed one after another
+        self.lock = threading.Lock()
+        self.logger = getLogger("pymdfu.WarmTool")
+
+    def open(self):
+        """Create and open the tool unless it is already open
+
+        :raises ValueError: For invalid tool parameters
+        :raises MacError: When the tool can't be opened
+        """
+        if self.is_open:
+            return
+        if self.tool is None:
+            self.tool = ToolFactory.get_tool(self.device.tool, tool_args=list(self.device.tool_args))
+        self.tool.open()
+        self.is_open = True
+        self.logger.debug("Opened tool for %s", self.device.name)
+
+    def close(self):
+        """End of an MDFU session, the tool stays open"""
+
+    def shutdown(self):
+        """Close the tool
+
+        The tool is opened again on the next session.
+        """
+        if self.is_open:
+            self.is_open = False
+            try:
+                self.tool.close()
+            except (MacError, TransportError, OSError) as exc:
+                self.logger.debug("Closing tool for %s failed: %s", self.device.name, exc)
+
+    @property
+    def mac(self):
+        """MAC layer
+
+        :return: MAC layer used in the transport layer
+        :rtype: Mac
+        """
+        return self.tool.mac
+
+    @property
+    def counters(self):
+        """Transport layer counters
+
+        :return: Byte counters and response timing of the transport layer
+        :rtype: TransportCounters
+        """
+        return self.tool.counters
+
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for the transport layer
+
+        :return: Transport class
+        :rtype: type
+        """
+        return self.tool.frame_encoder
+
+    def write_frame(self, frame):
+        self.tool.write_frame(frame)
+
+    def write_vectored(self, buffers):
+        self.tool.write_vectored(buffers)
+
+    def write(self, data):
+        self.tool.write(data)
+
+    def read(self, timeout):
+        return self.tool.read(timeout)
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Connection handler that reads a job and streams the job events back"""
+    def handle(self):
+        line = self.rfile.readline(MAX_JOB_SIZE)
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("Job is not a JSON object")
+        except ValueError as exc:
+            self.send_event({"event": "result", "success": False, "error": f"Invalid job: {exc}"})
+            return
+        self.send_event(self.server.service.run_job(job, self.send_event))
+
+    def send_event(self, event):
+        """Send an event to the client
+
+        A client that disconnects does not abort the job, the events are dropped instead.
+
+        :param event: Event
+        :type event: dict
+        """
+        try:
+            self.wfile.write(json.dumps(event).encode() + b"\n")
+        except OSError:
+            pass
+
+class _ServiceServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address, service):
+        super().__init__(server_address, _JobHandler)
+        self.service = service
+
+class MdfuService():
+    """MDFU update service with warm tool connections
+
+    Jobs are handled in a thread per connection. Jobs for different devices
+    run in parallel while jobs for the same device wait for each other. A failed
+    job closes the tool of the device so that the next job starts with a freshly
+    opened connection.
+    """
+    def __init__(self, devices, host=DEFAULT_HOST, port=DEFAULT_PORT, retries=5, windowed=False,
+                 frame_cache=None):
+        """Class initialization
+
+        :param devices: Devices that the service updates
+        :type devices: list(FleetDevice)
+        :param host: Host name or address the service listens on, defaults to DEFAULT_HOST
+        :type host: str, optional
+        :param port: Port the service listens on, defaults to DEFAULT_PORT. Zero selects
+        a free port.
+        :type port: int, optional
+        :param retries: Default number of retries for devices without retries setting,
+        defaults to 5
+        :type retries: int, optional
+        :param windowed: Use windowed write chunk transfers, defaults to False
+        :type windowed: bool, optional
+        :param frame_cache: Cache for encoded write chunk frames, defaults to None
+        :type frame_cache: FrameCache, optional
+        :raises ValueError: When device names are not unique
+        """
+        self.tools = {}
+        for device in devices:
+            if device.name in self.tools:
+                raise ValueError(f"Duplicate device name {device.name}")
+            self.tools[device.name] = WarmTool(device)
+        self.host = host
+        self.port = port
+        self.retries = retries
+        self.windowed = windowed
+        self.frame_cache = frame_cache
+        self.server = None
+        self.logger = getLogger("pymdfu.MdfuService")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def address(self):
+        """Address the service listens on
+
+        :return: Host address and port
+        :rtype: tuple(str, int)
+        """
+        return self.server.server_address[:2]
+
+    def start(self):
+        """Start listening for jobs and open the tools
+
+        Tools that fail to open are opened again by the first job for the device.
+
+        :raises OSError: When the service can't listen on the address
+        """
+        self.server = _ServiceServer((self.host, self.port), self)
+        for name, tool in self.tools.items():
+            with tool.lock:
+                try:
+                    tool.open()
+                except (ValueError, MacError, TransportError, OSError) as exc:
+                    self.logger.warning("Opening tool for %s failed: %s", name, exc)
+
+    def serve_forever(self):
+        """Handle jobs until shutdown() is called"""
+        self.server.serve_forever()
+
+    def shutdown(self):
+        """Stop serve_forever, must be called from another thread"""
+        self.server.shutdown()
+
+    def close(self):
+        """Stop listening and close the tools"""
+        if self.server is not None:
+            self.server.server_close()
+            self.server = None
+        for tool in self.tools.values():
+            with tool.lock:
+                tool.shutdown()
+
+    def run_job(self, job, send_event):
+        """Run a job
+
+        :param job: Job with "job" type, "device" name and for updates the "image" path
+        :type job: dict
+        :param send_event: Callback for progress events
+        :type send_event: Callable[[dict], None]
+        :return: Result event
+        :rtype: dict
+        """
+        name = job.get("device")
+        result = {"event": "result", "device": name, "success": False, "error": None}
+        tool = self.tools.get(name)
+        if tool is None:
+            result["error"] = f"Unknown device {name}"
+            return result
+        kind = job.get("job")
+        if kind not in ("update", "client-info"):
+            result["error"] = f"Unknown job {kind}"
+            return result
+
+        image = None
+        if kind == "update":
+            path = job.get("image")
+            if not isinstance(path, str):
+                result["error"] = "No image file specified"
+                return result
+            try:
+                image = ImageSource.from_file(path)
+            except OSError as exc:
+                result["error"] = f"Invalid image file: {exc}"
+                return result
+
+        start = time.perf_counter()
+        with tool.lock:
+            retries = self.retries if tool.device.retries is None else tool.device.retries
+            try:
+                if image is not None:
+                    with image:
+                        result["stats"] = self._update(tool, image, retries, send_event)
+                else:
+                    result["client_info"] = self._client_info(tool, retries)
+                result["success"] = True
+            except (ValueError, OSError, MacError, TransportError, MdfuUpdateError, MdfuProtocolError) as exc:
+                result["error"] = str(exc) or f"Job {kind} failed"
+                tool.shutdown()
+        result["duration"] = time.perf_counter() - start
+        if result["success"]:
+            self.logger.info("Job %s for %s finished successfully in %.2fs", kind, name, result["duration"])
+        else:
+            self.logger.error("Job %s for %s failed: %s", kind, name, result["error"])
+        return result
+
+    def _update(self, tool, image, retries, send_event):
+        """Update a device
+
+        :param tool: Tool of the device
+        :type tool: WarmTool
+        :param image: Firmware image
+        :type image: ImageSource
+        :param retries: Number of retries
+        :type retries: int
+        :param send_event: Callback for progress events
+        :type send_event: Callable[[dict], None]
+        :return: Session statistics
+        :rtype: dict
+        """
+        name = tool.device.name
+        reported = [-1]
+
+        def progress(offset, size):
+            # Limit the events to one per percent
+            percent = offset * 100 // size
+            if percent != reported[0]:
+                reported[0] = percent
+                send_event({"event": "progress", "device": name, "offset": offset, "size": size})
+
+        mdfu = Mdfu(tool, retries=retries, windowed=self.windowed, frame_cache=self.frame_cache,
+                    progress=progress)
+        return mdfu.run_upgrade(image).to_dict()
+
+    @staticmethod
+    def _client_info(tool, retries):
+        """Get client information of a device
+
+        :param tool: Tool of the device
+        :type tool: WarmTool
+        :param retries: Number of retries
+        :type retries: int
+        :return: Client information
+        :rtype: str
+        """
+        mdfu = Mdfu(tool, retries=retries)
+        mdfu.open()
+        try:
+            return str(mdfu.get_client_info(sync=True))
+        finally:
+            mdfu.close()
+
+def submit_job(job, host=DEFAULT_HOST, port=DEFAULT_PORT, on_event=None, connect_timeout=5):
+    """Submit a job to an update service and wait for the result
+
+    :param job: Job, see module description
+    :type job: dict
+    :param host: Host name or address of the service, defaults to DEFAULT_HOST
+    :type host: str, optional
+    :param port: Port of the service, defaults to DEFAULT_PORT
+    :type port: int, optional
+    :param on_event: Callback for progress events, defaults to None
+    :type on_event: Callable[[dict], None], optional
+    :param connect_timeout: Connection timeout in seconds, defaults to 5
+    :type connect_timeout: float, optional
+    :raises OSError: When the service is not reachable or closes the connection
+    before sending the result
+    :raises ValueError: For invalid events
+    :return: Result event
+    :rtype: dict
+    """
+    with socket.create_connection((host, port), timeout=connect_timeout) as sock:
+        # Updates can take a long time, wait for the result without timeout
+        sock.settimeout(None)
+        sock.sendall(json.dumps(job).encode() + b"\n")
+        with sock.makefile("rb") as file:
+            for line in file:
+                event = json.loads(line)
+                if event.get("event") == "result":
+                    return event
+                if on_event:
+                    on_event(event)
+    raise ConnectionError("Update service closed the connection before the job finished")
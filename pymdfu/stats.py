@@ -0,0 +1,160 @@
+"""MDFU session statistics
+
+Collects per command timing and throughput figures during an MDFU session with
+a few counter updates per command, so that it can stay enabled for every update
+without slowing it down like debug logging does.
+"""
+import json
+import time
+
+class CommandStats():
+    """Statistics for one MDFU command type
+
+    All times are accumulated over all executions of the command and are in seconds.
+    """
+    __slots__ = ("count", "retries", "resends", "write_time", "first_byte_time", "response_time",
+                 "itd_wait_time", "tx_bytes", "rx_bytes", "payload_bytes")
+
+    def __init__(self):
+        """Class initialization"""
+        # Number of commands sent, not including retries
+        self.count = 0
+        # Number of times a command was sent again, due to a transport error or a resend request
+        self.retries = 0
+        # Number of status packets with the resend flag set
+        self.resends = 0
+        # Time spent in transport layer writes
+        self.write_time = 0.0
+        # Time from the end of a write until the first byte of the response was received
+        self.first_byte_time = 0.0
+        # Time from the end of a write until the complete response was received
+        self.response_time = 0.0
+        # Time spent waiting for the inter transaction delay on the MAC layer
+        self.itd_wait_time = 0.0
+        # Bytes sent and received on the transport layer including framing and retries
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        # Command payload bytes, not including retries
+        self.payload_bytes = 0
+
+    def to_dict(self):
+        """Convert statistics into a dictionary
+
+        :return: Statistics
+        :rtype: dict
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class SessionStats():
+    """Statistics of an MDFU session
+    """
+    def __init__(self):
+        """Class initialization"""
+        # Command name -> CommandStats in the order the commands were first sent
+        self.commands = {}
+        self.image_size = 0
+        self.start_time = None
+        self.end_time = None
+
+    def command(self, name):
+        """Get the statistics for a command
+
+        :param name: Command name e.g. "WRITE_CHUNK"
+        :type name: str
+        :return: Command statistics, created on first access
+        :rtype: CommandStats
+        """
+        try:
+            return self.commands[name]
+        except KeyError:
+            stats = self.commands[name] = CommandStats()
+            return stats
+
+    def start(self):
+        """Mark the start of the session"""
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+    def stop(self):
+        """Mark the end of the session"""
+        self.end_time = time.perf_counter()
+
+    @property
+    def duration(self):
+        """Session duration
+
+        :return: Duration in seconds, up to now if the session is still running
+        :rtype: float
+        """
+        if self.start_time is None:
+            return 0.0
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return end - self.start_time
+
+    @property
+    def throughput(self):
+        """Image throughput of the session
+
+        :return: Image bytes per second
+        :rtype: float
+        """
+        duration = self.duration
+        return self.image_size / duration if duration > 0 else 0.0
+
+    def total(self, field):
+        """Sum of a statistics field over all commands
+
+        :param field: CommandStats attribute name e.g. "tx_bytes"
+        :type field: str
+        :return: Sum of the field
+        :rtype: int or float
+        """
+        return sum(getattr(stats, field) for stats in self.commands.values())
+
+    def to_dict(self):
+        """Convert statistics into a dictionary
+
+        :return: Statistics
+        :rtype: dict
+        """
+        return {
+            "duration": self.duration,
+            "image_size": self.image_size,
+            "throughput": self.throughput,
+            "tx_bytes": self.total("tx_bytes"),
+            "rx_bytes": self.total("rx_bytes"),
+            "payload_bytes": self.total("payload_bytes"),
+            "commands": {name: stats.to_dict() for name, stats in self.commands.items()}
+        }
+
+    def to_json(self, indent=2):
+        """Convert statistics into JSON
+
+        :param indent: JSON indentation, defaults to 2
+        :type indent: int, optional
+        :return: Statistics in JSON format
+        :rtype: str
+        """
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def __str__(self):
+        """Creates human readable representation of the session statistics
+        """
+        txt = f"""\
+MDFU session statistics
+--------------------------------
+- Duration: {self.duration:.3f} seconds
+- Image size: {self.image_size} bytes
+- Throughput: {self.throughput / 1024:.2f} KiB/s
+- Bytes on wire: {self.total("tx_bytes")} sent, {self.total("rx_bytes")} received
+- Payload bytes: {self.total("payload_bytes")}
+
+{"Command":<18}{"count":>7}{"retries":>9}{"resends":>9}{"write[ms]":>11}{"first byte[ms]":>16}\
+{"response[ms]":>14}{"ITD[ms]":>10}{"tx bytes":>11}{"rx bytes":>11}{"payload":>11}
+"""
+        for name, stats in self.commands.items():
+            txt += f"{name:<18}{stats.count:>7}{stats.retries:>9}{stats.resends:>9}" \
+                f"{stats.write_time * 1000:>11.1f}{stats.first_byte_time * 1000:>16.1f}" \
+                f"{stats.response_time * 1000:>14.1f}{stats.itd_wait_time * 1000:>10.1f}" \
+                f"{stats.tx_bytes:>11}{stats.rx_bytes:>11}{stats.payload_bytes:>11}\n"
+        return txt
@@ -0,0 +1,95 @@
+"""Tests for the asyncio based MDFU host"""
+import asyncio
+import os
+import unittest
+import pytest
+from pymdfu.transport.uart_transport import UartTransport
+from pymdfu.transport.spi_transport import SpiTransportClient
+from pymdfu.transport.i2c_transport import I2cTransportClient
+from pymdfu.transport.async_transport import AsyncUartTransport, AsyncSpiTransport, AsyncI2cTransport
+from pymdfu.mac.network_mac import MacSocketHost, MacSocketPacketHost
+from pymdfu.mac.async_mac import AsyncMacSocketClient, AsyncMacSocketPacketClient, AsyncMacSerialPort
+from ..mdfu import AsyncMdfu, MdfuUpdateError
+from ..pymdfuclient import MdfuClient
+from ..stats import SessionStats
+
+class TestAsyncMdfu(unittest.TestCase):
+    """Asynchronous MDFU host tests"""
+
+    def _start_client(self, transport_class, mac):
+        """Start a MDFU client listening on a free port
+
+        :return: Port the client listens on
+        :rtype: int
+        """
+        # Open the MAC here to bind to a free port before the client thread starts
+        mac.open()
+        port = mac.sock.getsockname()[1]
+        client = MdfuClient(transport_class(mac=mac, timeout=0.2))
+        client.start()
+        self.addCleanup(client.stop)
+        return port
+
+    def _serial_host(self):
+        port = self._start_client(UartTransport, MacSocketHost("localhost", 0, timeout=0.2))
+        return AsyncMdfu(AsyncUartTransport(AsyncMacSocketClient(port)))
+
+    def _packet_host(self, client_transport_class, host_transport_class):
+        port = self._start_client(client_transport_class, MacSocketPacketHost("localhost", 0, timeout=0.2))
+        return AsyncMdfu(host_transport_class(AsyncMacSocketPacketClient(port=port)))
+
+    def test_serial_update(self):
+        """Update a client with UART transport over a socket"""
+        host = self._serial_host()
+        asyncio.run(host.run_upgrade(bytes(range(256)) * 3))
+
+    def test_spi_update(self):
+        """Update a client with SPI transport over the network packet MAC"""
+        host = self._packet_host(SpiTransportClient, AsyncSpiTransport)
+        asyncio.run(host.run_upgrade(bytes(range(256)) * 3))
+
+    def test_i2c_update(self):
+        """Update a client with I2C transport over the network packet MAC"""
+        host = self._packet_host(I2cTransportClient, AsyncI2cTransport)
+        asyncio.run(host.run_upgrade(bytes(range(256)) * 3))
+
+    def test_concurrent_updates(self):
+        """Update several clients concurrently on one event loop"""
+        hosts = [self._serial_host() for _ in range(3)]
+        hosts.append(self._packet_host(SpiTransportClient, AsyncSpiTransport))
+        hosts.append(self._packet_host(I2cTransportClient, AsyncI2cTransport))
+        image = bytes(range(256)) * 4
+
+        async def update_all():
+            return await asyncio.gather(*[host.run_upgrade(image) for host in hosts], return_exceptions=True)
+        results = asyncio.run(update_all())
+        for result in results:
+            self.assertIsInstance(result, SessionStats)
+            self.assertEqual(result.image_size, len(image))
+
+    def test_connection_refused(self):
+        """Test that a failed connection aborts the update"""
+        host = AsyncMdfu(AsyncUartTransport(AsyncMacSocketClient(1)))
+        with pytest.raises(MdfuUpdateError):
+            asyncio.run(host.run_upgrade(bytes(10)))
+
+    @unittest.skipUnless(hasattr(os, "openpty"), "Requires pseudo terminals")
+    def test_serial_port_mac(self):
+        """Test asynchronous serial port MAC with a pseudo terminal"""
+        controller, device = os.openpty()
+        self.addCleanup(os.close, controller)
+        self.addCleanup(os.close, device)
+        transport = AsyncUartTransport(AsyncMacSerialPort(os.ttyname(device), 115200), timeout=1)
+
+        async def transfer():
+            await transport.open()
+            try:
+                await transport.write(bytes([1, 2, 3]))
+                # Echo the frame back from the other side of the pseudo terminal
+                loop = asyncio.get_running_loop()
+                frame = await loop.run_in_executor(None, os.read, controller, 64)
+                loop.call_later(0.05, os.write, controller, frame)
+                return await transport.read()
+            finally:
+                await transport.close()
+        self.assertEqual(asyncio.run(transfer()), bytes([1, 2, 3]))
@@ -0,0 +1,42 @@
+"""Tests for the throughput benchmark"""
+import unittest
+from benchmarks.throughput import run_case, configurations, compare, results_to_dict, format_results, \
+    BenchmarkResult
+from benchmarks import latency
+from benchmarks.latency import TRANSPORTS
+
+class TestThroughputBenchmark(unittest.TestCase):
+    """Throughput benchmark tests"""
+
+    def test_all_configurations(self):
+        """Run a small benchmark case for every simulator configuration"""
+        self.assertEqual(configurations(), [("serial", "bytes"), ("serial", "socketpair"),
+                                            ("i2c", "packet"), ("spi", "packet")])
+        for transport, mac in configurations():
+            result = run_case(transport, mac, 1000, 256, repeat=1)
+            # Get client info, start transfer, 4 write chunks, get image state and end transfer
+            self.assertEqual(result.commands, 8)
+            self.assertGreater(result.payload_mbps, 0)
+            self.assertGreater(result.commands_per_second, 0)
+            self.assertGreaterEqual(result.cpu_per_mb, 0)
+            self.assertIn(f"{transport}/{mac}", format_results([result]))
+
+    def test_compare(self):
+        """Test regression detection against a baseline"""
+        baseline = results_to_dict([BenchmarkResult("spi", "packet", 1000, 128, 1.0, 0.5, 10)])
+        faster = BenchmarkResult("spi", "packet", 1000, 128, 0.9, 0.5, 10)
+        slower = BenchmarkResult("spi", "packet", 1000, 128, 2.0, 0.5, 10)
+        unknown = BenchmarkResult("i2c", "packet", 1000, 128, 2.0, 0.5, 10)
+        self.assertEqual(compare([faster, unknown], baseline, tolerance=0.25), [])
+        self.assertEqual(len(compare([slower], baseline, tolerance=0.25)), 1)
+        self.assertIn("+11%", format_results([faster], baseline))
+
+class TestLatencyBenchmark(unittest.TestCase):
+    """Network latency benchmark tests"""
+
+    def test_default_socket_options(self):
+        """Run the latency benchmark for every transport with the default socket options"""
+        for transport in TRANSPORTS:
+            result = latency.run_case(transport, "default", image_size=512, repeat=1)
+            # Get client info, start transfer, 4 write chunks, get image state and end transfer
+            self.assertEqual(result.commands, 8)
@@ -0,0 +1,50 @@
+"""Tests for the transport checksum calculation"""
+import random
+import unittest
+from ..utils import calculate_checksum, calculate_checksum_reference, calculate_checksum_vectored
+
+class TestChecksum(unittest.TestCase):
+    """Checksum tests"""
+
+    def test_known_values(self):
+        """Test checksum against known values"""
+        self.assertEqual(calculate_checksum(bytes()), 0xffff)
+        self.assertEqual(calculate_checksum(bytes([0x01, 0x02])), (~0x0201) & 0xffff)
+        # Uneven number of bytes is padded with a zero byte
+        self.assertEqual(calculate_checksum(bytes([0x01, 0x02, 0x03])), (~(0x0201 + 0x0003)) & 0xffff)
+
+    def test_differential(self):
+        """Compare checksum implementation against the reference implementation"""
+        rng = random.Random(1234)
+        sizes = list(range(0, 20)) + [255, 256, 257, 1023, 1024, 1025, 4099]
+        for size in sizes:
+            data = bytes(rng.getrandbits(8) for _ in range(size))
+            expected = calculate_checksum_reference(data)
+            self.assertEqual(calculate_checksum(data), expected, f"size {size}")
+            self.assertEqual(calculate_checksum(bytearray(data)), expected, f"size {size}")
+            self.assertEqual(calculate_checksum(memoryview(data)), expected, f"size {size}")
+
+    def test_unaligned_view(self):
+        """Test checksum of a view that does not start at the beginning of a buffer"""
+        data = bytes(range(256)) * 4
+        for offset in range(1, 4):
+            view = memoryview(data)[offset:]
+            self.assertEqual(calculate_checksum(view), calculate_checksum_reference(data[offset:]))
+
+    def test_overflow(self):
+        """Test that the checksum is truncated to 16 bits for large sums"""
+        data = bytes([0xff] * 4096)
+        self.assertEqual(calculate_checksum(data), calculate_checksum_reference(data))
+
+    def test_input_not_modified(self):
+        """Test that the input data is not modified"""
+        data = bytearray([1, 2, 3])
+        calculate_checksum(data)
+        self.assertEqual(data, bytearray([1, 2, 3]))
+
+    def test_vectored(self):
+        """Test checksum of the concatenation of several buffers"""
+        data = bytes(range(256)) * 4
+        for buffers in [(data[:2], memoryview(data)[2:]), (data[:3], data[3:7], data[7:]),
+                        (data[:2], data[2:], bytes()), (data,), ()]:
+            self.assertEqual(calculate_checksum_vectored(buffers), calculate_checksum(b"".join(buffers)))
@@ -0,0 +1,128 @@
+"""Tests for the encoded frame cache"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from mock import patch
+from ..frame_cache import FrameCache, FrameStore
+from ..image import ImageSource
+from ..mdfu import Mdfu, MdfuCmd, MdfuCmdPacket
+from ..pymdfu import main
+from ..status_codes import STATUS_SUCCESS
+from ..tools.tools import ToolFactory
+from ..transport import FrameTemplate
+from ..transport.uart_transport import UartTransport, Frame, FRAME_START_CODE, FRAME_END_CODE, ESCAPE_SEQ_CODE
+from ..transport.spi_transport import SpiTransport
+from ..transport.i2c_transport import I2cTransport
+
+class TestFrameCache(unittest.TestCase):
+    """Frame cache tests"""
+
+    def _cache_dir(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        return directory
+
+    def test_frame_template(self):
+        """Test that frame templates create the same frames as the transports"""
+        # Data with reserved UART codes to cover escaping of the payload and the check sequence
+        data = bytes([FRAME_START_CODE, FRAME_END_CODE, ESCAPE_SEQ_CODE]) + bytes(range(64))
+        encoders = [(UartTransport, lambda packet: Frame(packet).to_bytes()),
+                    (SpiTransport, SpiTransport.create_write_frame),
+                    (I2cTransport, I2cTransport.create_frame)]
+        for encoder, create_frame in encoders:
+            for size in range(len(data)):
+                template = FrameTemplate.create(encoder, MdfuCmdPacket(0, MdfuCmd.WRITE_CHUNK.value,
+                                                                       data[:size]).to_binary())
+                for sequence_number in range(32):
+                    packet = MdfuCmdPacket(sequence_number, MdfuCmd.WRITE_CHUNK.value, data[:size]).to_binary()
+                    self.assertEqual(template.frame(sequence_number), create_frame(packet))
+
+    def test_memory_cache(self):
+        """Test that frames are encoded once per image, buffer size and transport"""
+        image = ImageSource(bytes(range(256)) * 3)
+        cache = FrameCache()
+        store = cache.get(image, 128, UartTransport)
+        self.assertEqual(len(store), 6)
+        self.assertIs(cache.get(ImageSource(bytes(range(256)) * 3), 128, UartTransport), store)
+        self.assertIsNot(cache.get(image, 256, UartTransport), store)
+        self.assertIsNot(cache.get(image, 128, SpiTransport), store)
+
+    def test_max_stores(self):
+        """Test that only the most recently used frame stores are kept in memory"""
+        images = [ImageSource(bytes([value]) * 256) for value in range(3)]
+        cache = FrameCache(max_stores=2)
+        stores = [cache.get(image, 128, UartTransport) for image in images[:2]]
+        # Using the first store again makes the second one the least recently used
+        self.assertIs(cache.get(images[0], 128, UartTransport), stores[0])
+        cache.get(images[2], 128, UartTransport)
+        self.assertIs(cache.get(images[0], 128, UartTransport), stores[0])
+        self.assertIsNot(cache.get(images[1], 128, UartTransport), stores[1])
+
+    def test_disk_cache(self):
+        """Test that frames are reused from the cache directory by a new cache"""
+        directory = self._cache_dir()
+        image = ImageSource(bytes(range(256)) * 3)
+        store = FrameCache(directory).get(image, 100, I2cTransport)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+        with patch.object(FrameStore, "create") as mock_create:
+            loaded = FrameCache(directory).get(image, 100, I2cTransport)
+        mock_create.assert_not_called()
+        self.assertEqual([template.frame(3) for template in loaded], [template.frame(3) for template in store])
+
+    def test_invalid_cache_file(self):
+        """Test that invalid cache files are replaced"""
+        directory = self._cache_dir()
+        image = ImageSource(bytes(300))
+        FrameCache(directory).get(image, 128, UartTransport)
+        path = os.path.join(directory, os.listdir(directory)[0])
+        with open(path, "r+b") as file:
+            file.truncate(os.path.getsize(path) - 1)
+
+        store = FrameCache(directory).get(image, 128, UartTransport)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(FrameCache(directory).get(image, 128, UartTransport).templates[2].head,
+                         store.templates[2].head)
+
+    def test_corrupted_cache_file(self):
+        """Test that a cache file with modified frame data is not used"""
+        directory = self._cache_dir()
+        image = ImageSource(bytes(300))
+        store = FrameCache(directory).get(image, 128, UartTransport)
+        path = os.path.join(directory, os.listdir(directory)[0])
+        with open(path, "r+b") as file:
+            data = bytearray(file.read())
+            data[-1] ^= 0x01
+            file.seek(0)
+            file.write(data)
+
+        with self.assertRaises(ValueError):
+            FrameCache.decode(data, UartTransport)
+        loaded = FrameCache(directory).get(image, 128, UartTransport)
+        self.assertEqual([template.frame(1) for template in loaded], [template.frame(1) for template in store])
+
+    def test_cached_update(self):
+        """Test simulated updates with cached frames"""
+        image = ImageSource(bytes(range(256)) * 4 + bytes(10))
+        cache = FrameCache()
+        # Second serial update reuses the frames in windowed mode
+        tool_args = [[], ["--buffer-count", "4"], ["--transport", "spi", "--mac", "packet"]]
+        for args in tool_args:
+            mdfu = Mdfu(ToolFactory.get_tool("simulator", tool_args=args), windowed=True, frame_cache=cache)
+            stats = mdfu.run_upgrade(image)
+            self.assertEqual(stats.commands["WRITE_CHUNK"].payload_bytes, len(image))
+        # One store per transport
+        self.assertEqual(len(cache._stores), 2) #pylint: disable=protected-access
+
+    def test_cli_frame_cache(self):
+        """Test update CLI action with a frame cache directory"""
+        directory = self._cache_dir()
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            file.write(bytes(range(256)) * 2)
+        self.addCleanup(os.remove, file.name)
+        testargs = ["pymdfu", "update", "--tool", "simulator", "--image", file.name, "--frame-cache", directory]
+        with patch.object(sys, 'argv', testargs):
+            self.assertEqual(main(), STATUS_SUCCESS)
+        self.assertEqual(len(os.listdir(directory)), 1)
@@ -0,0 +1,59 @@
+"""Tests for the firmware image source"""
+import os
+import tempfile
+import unittest
+from ..image import ImageSource
+from ..mdfu import chunkify
+
+class TestImageSource(unittest.TestCase):
+    """Image source tests"""
+
+    def _create_image_file(self, data):
+        file = tempfile.NamedTemporaryFile(delete=False) #pylint: disable=consider-using-with
+        file.write(data)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_chunks_match_chunkify(self):
+        """Test that chunks of an image source are identical to chunkify"""
+        image = bytes(i % 251 for i in range(1000))
+        source = ImageSource(image)
+        for chunk_size in [1, 7, 128, 1000, 1024]:
+            chunks = [bytes(chunk) for chunk in source.chunks(chunk_size)]
+            self.assertEqual(chunks, chunkify(image, chunk_size))
+
+    def test_chunks_are_views(self):
+        """Test that unpadded chunks do not copy image data"""
+        image = bytearray(256)
+        source = ImageSource(image)
+        chunk = next(source.chunks(128))
+        self.assertIsInstance(chunk, memoryview)
+        image[0] = 0xAA
+        self.assertEqual(chunk[0], 0xAA)
+
+    def test_padding(self):
+        """Test padding of the last chunk"""
+        source = ImageSource(bytes([1, 2, 3, 4, 5]))
+        chunks = [bytes(chunk) for chunk in source.chunks(4, padding=0xff)]
+        self.assertEqual(chunks, [bytes([1, 2, 3, 4]), bytes([5, 0xff, 0xff, 0xff])])
+
+    def test_from_file(self):
+        """Test image source created from a file"""
+        image = bytes(i % 256 for i in range(4096 + 17))
+        path = self._create_image_file(image)
+        with ImageSource.from_file(path) as source:
+            self.assertEqual(len(source), len(image))
+            self.assertEqual(b"".join(source.chunks(512)), image)
+
+    def test_from_empty_file(self):
+        """Test image source created from an empty file"""
+        path = self._create_image_file(bytes())
+        with ImageSource.from_file(path) as source:
+            self.assertEqual(len(source), 0)
+            self.assertEqual(list(source.chunks(512)), [])
+
+    def test_from_missing_file(self):
+        """Test that a missing file raises FileNotFoundError"""
+        with self.assertRaises(FileNotFoundError):
+            ImageSource.from_file("this_file_does_not_exist.img")
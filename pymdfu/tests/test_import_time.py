@@ -0,0 +1,48 @@
+"""CLI import time tests"""
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Run the interpreter in the directory that contains the pymdfu package
+PACKAGE_ROOT = Path(__file__).parents[2]
+# Modules of tool specific dependencies that should only be loaded when a tool needs them
+TOOL_DEPENDENCIES = ["serial", "pyaardvark", "EasyMCP2221", "mcp2210", "asyncio"]
+# Modules that are only loaded by the CLI actions that use them
+ACTION_MODULES = ["pymdfu.fleet", "pymdfu.frame_cache", "pymdfu.service", "pymdfu.transport.spi_transport",
+                  "pymdfu.transport.i2c_transport", "pymdfu.transport.uart_transport"]
+
+def run_python(code):
+    """Run python code in a new interpreter
+
+    :param code: Python code
+    :type code: str
+    :return: Output of the interpreter
+    :rtype: str
+    """
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=PACKAGE_ROOT)
+    return result.stdout
+
+class TestImportTime(unittest.TestCase):
+    """Import time tests for the pymdfu CLI"""
+
+    def _loaded_dependencies(self, code, modules=None):
+        modules = TOOL_DEPENDENCIES if modules is None else modules
+        output = run_python(f"import sys\n{code}\nprint([m for m in {modules} if m in sys.modules])")
+        return output.strip()
+
+    def test_no_tool_dependencies_on_import(self):
+        """Test that importing the CLI does not load any tool dependencies"""
+        self.assertEqual(self._loaded_dependencies("import pymdfu.pymdfu"), "[]")
+
+    def test_only_selected_tool_is_imported(self):
+        """Test that selecting a tool does not load dependencies of other tools"""
+        code = "from pymdfu.tools.tools import ToolFactory\nToolFactory.get_tool_class('network')"
+        self.assertEqual(self._loaded_dependencies(code), "[]")
+        code = "from pymdfu.tools.tools import ToolFactory\nToolFactory.get_tool_class('serial')"
+        self.assertEqual(self._loaded_dependencies(code), "['serial']")
+
+    def test_no_action_modules_on_import(self):
+        """Test that importing the CLI does not load the modules of the fleet and service actions"""
+        self.assertEqual(self._loaded_dependencies("import pymdfu.pymdfu", ACTION_MODULES), "[]")
@@ -0,0 +1,63 @@
+"""Tests for lazy formatting of debug log messages"""
+import logging
+import timeit
+import tracemalloc
+import unittest
+from mock import MagicMock
+from pymdfu.transport.uart_transport import UartTransport
+from ..utils import LazyHex
+
+class FormattingHandler(logging.Handler):
+    """Log handler that formats every message it receives"""
+    def emit(self, record):
+        record.getMessage()
+
+class TestLazyLogging(unittest.TestCase):
+    """Lazy debug logging tests"""
+
+    def setUp(self):
+        self.logger = logging.getLogger("pymdfu.transport.uart_transport")
+        self.handler = FormattingHandler()
+        self.logger.addHandler(self.handler)
+        self.level = self.logger.level
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.addCleanup(self.logger.setLevel, self.level)
+
+    def _peak_memory(self, level, packet):
+        """Peak memory allocated while writing a packet with logging set to level"""
+        self.logger.setLevel(level)
+        transport = UartTransport(MagicMock())
+        tracemalloc.start()
+        try:
+            transport.write(packet)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    def test_lazy_hex(self):
+        """Test hex formatting of LazyHex"""
+        data = bytes([0x01, 0xab, 0xff])
+        self.assertEqual(str(LazyHex(data)), "01abff")
+        self.assertEqual(str(LazyHex(bytearray(data))), "01abff")
+        self.assertEqual(str(LazyHex(memoryview(data))), "01abff")
+        self.assertEqual("0x%s" % LazyHex(data), "0x01abff")
+
+    def test_no_hex_string_without_debug(self):
+        """Test that the frame is not converted to a hex string when debug logging is off"""
+        # Byte values that don't need escaping so the frame has the size of the packet
+        packet = bytes([0x11]) * 100_000
+        debug_peak = self._peak_memory(logging.DEBUG, packet)
+        info_peak = self._peak_memory(logging.INFO, packet)
+        # The hex string of the frame needs two bytes per frame byte
+        self.assertGreater(debug_peak - info_peak, 2 * len(packet))
+
+    def test_debug_call_benchmark(self):
+        """Compare disabled debug logging with eager and lazy hex formatting"""
+        self.logger.setLevel(logging.INFO)
+        frame = bytes(1024)
+        eager = min(timeit.repeat(lambda: self.logger.debug("Frame 0x%s", frame.hex()), number=2000, repeat=3))
+        lazy = min(timeit.repeat(lambda: self.logger.debug("Frame 0x%s", LazyHex(frame)), number=2000, repeat=3))
+        print(f"\nDisabled debug log of 1 KiB frame: eager hex {eager * 500:.3f} ms, lazy hex {lazy * 500:.3f} ms "
+              "per 1000 calls")
+        self.assertLess(lazy, eager)
@@ -0,0 +1,110 @@
+"""Tests for Linux I2C MAC layer"""
+import ctypes
+import errno
+import os
+import tempfile
+import unittest
+from mock import patch
+from pymdfu.mac.linux_i2c_mac import MacLinuxI2c
+from pymdfu.mac.exceptions import MacError, MacI2cNackError
+
+class I2cDevFake():
+    """Fake for the ioctl interface of an i2c-dev device"""
+    def __init__(self, funcs=MacLinuxI2c.I2C_FUNC_I2C, response=b""):
+        self.funcs = funcs
+        self.response = response
+        self.transfers = []
+        self.rdwr_args = set()
+        self.error = None
+
+    def ioctl(self, fd, request, arg=0, mutate_flag=True): # pylint: disable=unused-argument
+        """Handle an ioctl request"""
+        if request == MacLinuxI2c.I2C_FUNCS:
+            arg[0] = self.funcs
+        elif request == MacLinuxI2c.I2C_RDWR:
+            self.rdwr_args.add(id(arg))
+            if self.error:
+                raise OSError(self.error, os.strerror(self.error))
+            transfer = []
+            for i in range(arg.nmsgs):
+                msg = arg.msgs[i]
+                if msg.flags & MacLinuxI2c.I2C_M_RD:
+                    data = self.response[:msg.len]
+                    ctypes.memmove(msg.buf, data, len(data))
+                    transfer.append(("r", msg.addr, msg.len))
+                else:
+                    transfer.append(("w", msg.addr, ctypes.string_at(msg.buf, msg.len)))
+            self.transfers.append(transfer)
+        return 0
+
+class TestLinuxI2cMac(unittest.TestCase):
+    """Linux I2C MAC layer tests"""
+
+    def _open_mac(self, fake):
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            file.write(fake.response)
+        self.addCleanup(os.remove, file.name)
+        ioctl_patch = patch("pymdfu.mac.linux_i2c_mac.fcntl.ioctl", side_effect=fake.ioctl)
+        ioctl_patch.start()
+        self.addCleanup(ioctl_patch.stop)
+        mac = MacLinuxI2c(file.name, 0x20, inter_transaction_delay=0)
+        mac.open()
+        return mac
+
+    def test_rdwr_transfers(self):
+        """Test read and write transactions with I2C_RDWR ioctl"""
+        fake = I2cDevFake(response=b"L\x05\x00\x05\x00" + bytes(200))
+        mac = self._open_mac(fake)
+        self.assertTrue(mac.rdwr_supported)
+
+        mac.write(b"\x11\x22")
+        self.assertEqual(mac.read(5), b"L\x05\x00\x05\x00")
+        # Read larger than the initial buffer size
+        self.assertEqual(mac.read(100), fake.response[:100])
+        buf = bytearray(3)
+        self.assertEqual(mac.readinto(buf), 3)
+        self.assertEqual(buf, b"L\x05\x00")
+        self.assertEqual(fake.transfers, [[("w", 0x20, b"\x11\x22")], [("r", 0x20, 5)],
+                                          [("r", 0x20, 100)], [("r", 0x20, 3)]])
+        # The same ioctl argument is used for all transfers
+        self.assertEqual(len(fake.rdwr_args), 1)
+
+    def test_write_vectored(self):
+        """Test that the buffers of a vectored write are sent in one transaction"""
+        fake = I2cDevFake()
+        mac = self._open_mac(fake)
+        mac.write_vectored((b"\x11", memoryview(bytes(100)), b"\x22"))
+        self.assertEqual(fake.transfers, [[("w", 0x20, b"\x11" + bytes(100) + b"\x22")]])
+
+    def test_write_read(self):
+        """Test combined write and read transaction"""
+        fake = I2cDevFake(response=b"\x01\x02\x03")
+        mac = self._open_mac(fake)
+        self.assertEqual(mac.write_read(b"\x55", 2), b"\x01\x02")
+        self.assertEqual(fake.transfers, [[("w", 0x20, b"\x55"), ("r", 0x20, 2)]])
+
+    def test_nack(self):
+        """Test client NACK handling"""
+        fake = I2cDevFake(response=bytes(5))
+        mac = self._open_mac(fake)
+        fake.error = errno.EIO
+        # NACK on write is not an error
+        mac.write(b"\x11")
+        with self.assertRaises(MacI2cNackError):
+            mac.read(5)
+        with self.assertRaises(MacI2cNackError):
+            mac.write_read(b"\x11", 5)
+        fake.error = errno.ETIMEDOUT
+        with self.assertRaises(MacError):
+            mac.read(5)
+
+    def test_smbus_only_adapter(self):
+        """Test fallback to read and write system calls without I2C_RDWR support"""
+        fake = I2cDevFake(funcs=0, response=b"\x01\x02\x03\x04")
+        mac = self._open_mac(fake)
+        self.assertFalse(mac.rdwr_supported)
+        self.assertEqual(mac.read(2), b"\x01\x02")
+        buf = bytearray(2)
+        mac.readinto(buf)
+        self.assertEqual(buf, b"\x03\x04")
+        self.assertEqual(fake.transfers, [])
@@ -0,0 +1,79 @@
+"""Tests for Linux SPI MAC layer"""
+import ctypes
+import errno
+import os
+import tempfile
+import unittest
+from mock import patch
+from pymdfu.mac.linux_spi_mac import MacLinuxSpi, SpiIoctlRequest
+from pymdfu.mac.exceptions import MacError
+
+class SpidevFake():
+    """Fake for the ioctl interface of a spidev device
+
+    The client returns the inverted bytes of each transfer.
+    """
+    def __init__(self):
+        self.messages = []
+        self.args = set()
+        self.error = None
+
+    def ioctl(self, fd, request, arg=0, mutate_flag=True): # pylint: disable=unused-argument
+        """Handle an ioctl request"""
+        if request != SpiIoctlRequest.SPI_IOC_MESSAGE_1.value:
+            return 0
+        if self.error:
+            raise OSError(self.error, os.strerror(self.error))
+        self.args.add(id(arg))
+        data = ctypes.string_at(arg.tx_buf, arg.len)
+        ctypes.memmove(arg.rx_buf, bytes(~x & 0xff for x in data), arg.len)
+        self.messages.append(data)
+        return 0
+
+class TestLinuxSpiMac(unittest.TestCase):
+    """Linux SPI MAC layer tests"""
+
+    def _open_mac(self, fake, inter_transaction_delay=0):
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            pass
+        self.addCleanup(os.remove, file.name)
+        ioctl_patch = patch("pymdfu.mac.linux_spi_mac.fcntl.ioctl", side_effect=fake.ioctl)
+        ioctl_patch.start()
+        self.addCleanup(ioctl_patch.stop)
+        mac = MacLinuxSpi(file.name, 0, 1000000, inter_transaction_delay=inter_transaction_delay)
+        mac.open()
+        self.addCleanup(mac.close)
+        return mac
+
+    def test_transaction(self):
+        """Test write and read of a SPI transaction"""
+        fake = SpidevFake()
+        mac = self._open_mac(fake)
+        mac.write(b"\x00\x0f")
+        self.assertEqual(mac.read(2), b"\xff\xf0")
+        self.assertEqual(mac.read(2), b"")
+        # Transaction larger than the initial buffer
+        mac.write(bytes(100))
+        buf = bytearray(200)
+        self.assertEqual(mac.readinto(buf), 100)
+        self.assertEqual(buf[:100], bytes([0xff] * 100))
+        self.assertEqual(fake.messages[0], b"\x00\x0f")
+        # The same transfer descriptor is used for all transactions
+        self.assertEqual(len(fake.args), 1)
+
+    def test_write_vectored(self):
+        """Test that the buffers of a vectored write are sent in one transaction"""
+        fake = SpidevFake()
+        mac = self._open_mac(fake)
+        mac.write_vectored((b"\x11", memoryview(bytes(100)), b"\x22\x33"))
+        self.assertEqual(fake.messages, [b"\x11" + bytes(100) + b"\x22\x33"])
+        self.assertEqual(mac.read(103), b"\xee" + bytes([0xff] * 100) + b"\xdd\xcc")
+
+    def test_ioctl_error(self):
+        """Test that ioctl errors raise a MAC error"""
+        fake = SpidevFake()
+        mac = self._open_mac(fake)
+        fake.error = errno.EMSGSIZE
+        with self.assertRaises(MacError):
+            mac.write(b"\x01")
+        self.assertEqual(mac.read(1), b"")
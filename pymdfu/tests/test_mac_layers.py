@@ -1,9 +1,19 @@
 """Tests for MAC socket layer"""
 import unittest
 import io
+import socket
+import threading
+import time
+import mock
 from mock import patch
 from pymdfu.mac import MacFactory
-from pymdfu.mac.network_mac import MacSocketPacketHost, MacSocketPacketClient
+from pymdfu.mac.exceptions import MacError
+from pymdfu.mac.mac import Mac
+from pymdfu.transport.spi_transport import SpiTransport
+from pymdfu.transport.i2c_transport import I2cTransport
+from pymdfu.transport.uart_transport import UartTransport
+from pymdfu.mac.network_mac import MacSocketPacketHost, MacSocketPacketClient, MacSocketClient, RingBuffer, \
+    SocketOptions, sendmsg_all
 
 class TestMacLayers(unittest.TestCase):
     """Tests for MAC layers"""
@@ -154,3 +164,211 @@ class TestMacLayers(unittest.TestCase):
 
         client.close()
         host.close()
+
+    def test_blocking_read_wakeup(self):
+        """ Test that a blocking read returns as soon as data is written.
+
+        The reader waits on the MAC buffer instead of polling, the read must
+        complete well before the timeout expires.
+        """
+        host, client = MacFactory.get_bytes_based_mac(timeout=5)
+        host.open()
+        client.open()
+        msg = "Hello".encode("utf-8")
+        writer = threading.Timer(0.05, client.write, args=(msg,))
+        start = time.monotonic()
+        writer.start()
+        data = host.read(len(msg))
+        duration = time.monotonic() - start
+        writer.join()
+        self.assertEqual(msg, data)
+        self.assertLess(duration, 1)
+
+    def test_socket_mac_timeout(self):
+        """ Test that a socket host MAC read returns available data after timeout."""
+        host = MacFactory.get_socket_host_mac(timeout=0.2)
+        client = MacFactory.get_socket_client_mac()
+        host.open()
+        client.open()
+        client.write(b"Hi")
+        data = host.read(5)
+        self.assertEqual(data, b"Hi")
+        client.close()
+        host.close()
+
+    def test_socket_packet_host_large_packets(self):
+        """ Test that packets larger than the receive buffer are received in one piece."""
+        host = MacSocketPacketHost("localhost", 0, timeout=2)
+        host.open()
+        client = MacSocketPacketClient(host="localhost", port=host.sock.getsockname()[1])
+        client.open()
+        messages = [bytes([i % 256 for i in range(size)]) for size in [10000, 1, 0, 5000]]
+        for msg in messages:
+            client.write(msg)
+        for msg in messages:
+            self.assertEqual(host.read(), msg)
+        client.close()
+        host.close()
+
+    def test_ring_buffer(self):
+        """ Test ring buffer reads and writes across the buffer end and growing the buffer."""
+        buf = RingBuffer(8)
+        buf.write(b"abcdef")
+        self.assertEqual(buf.read(4), b"abcd")
+        # Wraps around the end of the buffer
+        buf.write(b"ghijk")
+        self.assertEqual(len(buf), 7)
+        self.assertEqual(buf.peek(3, offset=1), b"fgh")
+        # Grows the buffer and keeps the order of the data
+        buf.write(b"0123456789")
+        self.assertEqual(buf.read(100), b"efghijk0123456789")
+        self.assertEqual(buf.read(1), b"")
+        buf.write(b"xyz")
+        buf.skip(2)
+        self.assertEqual(buf.peek(5), b"z")
+        buf.clear()
+        self.assertEqual(len(buf), 0)
+
+    def test_socket_packet_client_read(self):
+        """ Test that the packet client blocks without busy waiting and splits packets."""
+        with socket.create_server(("localhost", 0)) as server:
+            client = MacSocketPacketClient(host="localhost", port=server.getsockname()[1], timeout=0.3)
+            client.open()
+            conn, _ = server.accept()
+            with conn:
+                # Timeout while waiting for a packet does not use the CPU
+                cpu_start = time.process_time()
+                with self.assertRaises(MacError):
+                    client.read()
+                self.assertLess(time.process_time() - cpu_start, 0.1)
+
+                # Packets in one segment and a packet split over several segments
+                frames = [b"MDFU" + len(msg).to_bytes(4, byteorder="little") + msg
+                          for msg in [b"one", b"", bytes(range(200)) * 30]]
+                conn.sendall(frames[0] + frames[1] + frames[2][:100])
+                writer = threading.Timer(0.05, conn.sendall, args=(frames[2][100:],))
+                writer.start()
+                self.assertEqual(client.read(), b"one")
+                self.assertEqual(client.read(), b"")
+                self.assertEqual(client.read(), bytes(range(200)) * 30)
+                writer.join()
+
+                conn.sendall(b"XXXX\x00\x00\x00\x00")
+                with self.assertRaises(MacError):
+                    client.read()
+            client.close()
+
+    def test_socket_packet_client_connection_closed(self):
+        """ Test that a closed connection raises an error instead of waiting for the timeout."""
+        with socket.create_server(("localhost", 0)) as server:
+            client = MacSocketPacketClient(host="localhost", port=server.getsockname()[1], timeout=5)
+            client.open()
+            conn, _ = server.accept()
+            conn.close()
+            start = time.monotonic()
+            with self.assertRaises(MacError):
+                client.read()
+            self.assertLess(time.monotonic() - start, 1)
+            client.close()
+
+    def test_socket_options(self):
+        """ Test that socket options are applied to the connections of both ends."""
+        options = SocketOptions(send_buffer_size=65536, recv_buffer_size=65536)
+        host = MacSocketPacketHost("localhost", 0, timeout=2, options=options)
+        host.open()
+        port = host.sock.getsockname()[1]
+        client = MacSocketPacketClient(host="localhost", port=port, options=options)
+        client.open()
+        client.write(b"Hi")
+        self.assertEqual(host.read(), b"Hi")
+        for sock in [client.sock, host.conn]:
+            self.assertTrue(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+            # Linux reports twice the requested buffer size
+            self.assertGreaterEqual(sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF), 65536)
+        client.close()
+        host.close()
+
+        client = MacSocketPacketClient(host="localhost", port=port, options=SocketOptions(nodelay=False))
+        # Connection refused since the host is closed
+        with self.assertRaises(MacError):
+            client.open()
+
+    def test_connect_timeout(self):
+        """ Test that a connection timeout results in a MAC error."""
+        client = MacSocketClient(5557, connect_timeout=0.1)
+        with patch("pymdfu.mac.network_mac.socket.socket") as mock_socket:
+            mock_socket.return_value.connect.side_effect = socket.timeout("timed out")
+            with self.assertRaises(MacError):
+                client.open()
+        mock_socket.return_value.settimeout.assert_called_with(0.1)
+        mock_socket.return_value.close.assert_called_once()
+
+    def test_sendmsg_all(self):
+        """ Test that partially sent buffers are continued with the unsent data."""
+        sock = mock.Mock()
+        sent = []
+
+        def sendmsg(buffers):
+            # Send at most 3 bytes per call
+            data = b"".join(bytes(buffer) for buffer in buffers)[:3]
+            sent.append(data)
+            return len(data)
+        sock.sendmsg.side_effect = sendmsg
+        sendmsg_all(sock, [b"ab", b"", bytearray(b"cdefg"), memoryview(b"h")])
+        self.assertEqual(sent, [b"abc", b"def", b"gh"])
+
+    def test_socket_packet_client_write_vectored(self):
+        """ Test that the buffers of a vectored write are received as one packet."""
+        host = MacSocketPacketHost("localhost", 0, timeout=2)
+        host.open()
+        client = MacSocketPacketClient(host="localhost", port=host.sock.getsockname()[1])
+        client.open()
+        payload = bytes(range(256)) * 100
+        client.write_vectored((b"\x11", memoryview(payload), b"\x22\x33"))
+        client.write(b"next")
+        self.assertEqual(host.read(), b"\x11" + payload + b"\x22\x33")
+        self.assertEqual(host.read(), b"next")
+        client.close()
+        host.close()
+
+    def test_transport_write_vectored(self):
+        """ Test that the SPI and I2C transports pass the packet to the MAC layer without copying it."""
+        class VectoredMac(Mac):
+            """MAC that records vectored writes"""
+            def __init__(self):
+                super().__init__()
+                self.writes = []
+
+            def write_vectored(self, buffers):
+                self.writes.append(buffers)
+
+            def read(self, size):
+                return bytes(size)
+
+        packet = bytes([0x01, 0x03]) + bytes(range(100))
+        for transport, create_frame in [(SpiTransport, SpiTransport.create_write_frame),
+                                        (I2cTransport, I2cTransport.create_frame)]:
+            mac = VectoredMac()
+            transport(mac).write(packet)
+            self.assertEqual(len(mac.writes), 1)
+            self.assertIn(packet, mac.writes[0])
+            self.assertIs([buffer for buffer in mac.writes[0] if buffer == packet][0], packet)
+            self.assertEqual(b"".join(mac.writes[0]), create_frame(packet))
+
+            # Packet header and payload are passed on as separate buffers
+            payload = memoryview(packet)[2:]
+            mac = VectoredMac()
+            transport(mac).write_vectored((packet[:2], payload))
+            self.assertIs(mac.writes[0][-2], payload)
+            self.assertEqual(b"".join(mac.writes[0]), create_frame(packet))
+
+    def test_uart_transport_write_vectored(self):
+        """Test that the UART transport creates the same frame from a packet split into buffers"""
+        packet = bytes([0x01, 0x03]) + bytes(range(256))
+        mac_host, _ = MacFactory.get_bytes_based_mac()
+        writes = []
+        mac_host.write = writes.append
+        transport = UartTransport(mac_host)
+        transport.write(packet)
+        transport.write_vectored((packet[:2], memoryview(packet)[2:]))
+        self.assertEqual(writes[0], writes[1])
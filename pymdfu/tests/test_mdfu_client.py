@@ -3,14 +3,16 @@ import unittest
 import sys
 import io
 import time
-from mock import patch
+import threading
+from mock import patch, Mock
 from pymdfu.mac import MacFactory
-from pymdfu.pymdfuclient_cli import main
-from pymdfu.pymdfuclient import MdfuClient
+from pymdfu.pymdfuclient_cli import main, run_mdfu_client_server
+from pymdfu.pymdfuclient import MdfuClient, MdfuClientServer, client_profiles
 from pymdfu import __version__ as VERSION
 from pymdfu.transport.uart_transport import UartTransport
 from pymdfu.mdfu import Mdfu
 from pymdfu.tools.tools import ToolFactory
+from pymdfu.tools.network import NetworkTool, NetworkClientTool
 
 class TestMdfuClient(unittest.TestCase):
     """Tests for MDFU client"""
@@ -144,3 +146,83 @@ class TestMdfuClient(unittest.TestCase):
         upgrade_image = bytes(512 * [0xff])
         mdfu_host.run_upgrade(upgrade_image)
         mdfu_client.stop()
+
+    def _start_client_server(self, tool_args):
+        client_tool = NetworkClientTool(["--host", "localhost", "--port", "0"] + tool_args)
+        server = MdfuClientServer(client_tool.server, client_tool.create_transport,
+                                  client_info=client_tool.client_info, profile=client_tool.profile)
+        server.start()
+        self.addCleanup(server.stop)
+        return server, [address[1] for address in client_tool.server.addresses]
+
+    def test_multi_client_update(self):
+        """Run parallel MDFU sessions against one multi-client tool for each transport"""
+        for transport in ["serial", "spi", "i2c"]:
+            with self.subTest(transport=transport):
+                server, ports = self._start_client_server(["--multi-client", "--transport", transport])
+                self.assertEqual(len(ports), 1)
+                image = bytes(range(256)) * 8
+                results = []
+
+                def update():
+                    tool = NetworkTool(["--host", "localhost", "--port", str(ports[0]), "--transport", transport])
+                    stats = Mdfu(tool).run_upgrade(image)
+                    results.append(stats.commands["WRITE_CHUNK"].payload_bytes)
+                threads = [threading.Thread(target=update) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(results, [len(image)] * 4)
+                # Clients are removed when the hosts close their connections
+                deadline = time.monotonic() + 2
+                while len(server) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(len(server), 0)
+                server.stop()
+
+    def test_multi_client_profile(self):
+        """Test that the clients of a multi-client tool use the client info and profile of the tool arguments"""
+        _, ports = self._start_client_server(["--multi-client", "--transport", "spi", "--profile", "flash",
+                                              "--buffer-count", "2", "--buffer-size", "256"])
+        tool = NetworkTool(["--host", "localhost", "--port", str(ports[0]), "--transport", "spi"])
+        mdfu = Mdfu(tool)
+        mdfu.open()
+        try:
+            client_info = mdfu.get_client_info(sync=True)
+        finally:
+            mdfu.close()
+        self.assertEqual(client_info.buffer_count, 2)
+        self.assertEqual(client_info.buffer_size, 256)
+
+    def test_run_client_server_profile(self):
+        """Test that the CLI passes client info and profile to the multi-client server"""
+        server_patch = patch("pymdfu.pymdfuclient_cli.MdfuClientServer")
+        self.addCleanup(server_patch.stop)
+        mock_server = server_patch.start()
+        sleep_patch = patch("pymdfu.pymdfuclient_cli.time.sleep", side_effect=KeyboardInterrupt)
+        self.addCleanup(sleep_patch.stop)
+        sleep_patch.start()
+        tool = NetworkClientTool(["--port", "0", "--multi-client", "--profile", "flash", "--buffer-count", "4"])
+        tool.server = Mock(addresses=[("localhost", 5559)])
+        run_mdfu_client_server(tool)
+        _, kwargs = mock_server.call_args
+        self.assertIs(kwargs["profile"], client_profiles["flash"])
+        self.assertEqual(kwargs["client_info"].buffer_count, 4)
+        mock_server.return_value.stop.assert_called_once()
+
+    def test_multi_client_port_range(self):
+        """Test that a client is started for connections on every port of a port range"""
+        tool = NetworkClientTool(["--port", "5600", "--port-count", "3", "--transport", "spi"])
+        self.assertEqual(tool.server.ports, [5600, 5601, 5602])
+        with self.assertRaises(ValueError):
+            NetworkClientTool(["--port", "5600", "--port-count", "0"])
+
+        # Listen on free ports instead
+        tool.server.ports = [0, 0]
+        server = MdfuClientServer(tool.server, tool.create_transport)
+        server.start()
+        self.addCleanup(server.stop)
+        for address in tool.server.addresses:
+            host_tool = NetworkTool(["--host", "localhost", "--port", str(address[1]), "--transport", "spi"])
+            Mdfu(host_tool).run_upgrade(bytes(300))
@@ -0,0 +1,89 @@
+"""Tests for the MDFU client timing and behaviour profile"""
+import unittest
+from packaging.version import Version
+from pymdfu.mac import MacFactory
+from pymdfu.transport.uart_transport import UartTransport
+from pymdfu.tools.tools import ToolFactory
+from ..mdfu import Mdfu, ClientInfo, MdfuCmd, MdfuCmdPacket, MdfuStatus, MdfuStatusPacket
+from ..pymdfuclient import MdfuClient, ClientProfile
+
+class RecordingMdfuClient(MdfuClient):
+    """MDFU client that records the maximum number of commands in execution"""
+    max_pending = 0
+
+    def _respond(self, packet, status_packet):
+        super()._respond(packet, status_packet)
+        self.max_pending = max(self.max_pending, len(self.pending))
+
+class TestMdfuClientProfile(unittest.TestCase):
+    """MDFU client profile tests"""
+
+    def _start_client(self, client_info, profile, client_class=MdfuClient):
+        mac_host, mac_client = MacFactory.get_bytes_based_mac(timeout=1)
+        client = client_class(UartTransport(mac=mac_client, timeout=1), client_info=client_info, profile=profile)
+        client.start()
+        self.addCleanup(client.stop)
+        return client, UartTransport(mac=mac_host)
+
+    def test_processing_time(self):
+        """Test command processing time calculation"""
+        profile = ClientProfile(latency_scale=0.1, latencies={MdfuCmd.END_TRANSFER: 0.5},
+                                write_time_per_byte=0.001, erase_time_per_byte=0.01, page_size=512)
+        self.assertAlmostEqual(profile.processing_time(MdfuCmd.START_TRANSFER, 2), 0.2)
+        self.assertAlmostEqual(profile.processing_time(MdfuCmd.END_TRANSFER, 2), 0.5)
+        # First chunk of a page erases the page
+        self.assertAlmostEqual(profile.processing_time(MdfuCmd.WRITE_CHUNK, 1, 0, 128), 0.1 + 5.12 + 0.128)
+        self.assertAlmostEqual(profile.processing_time(MdfuCmd.WRITE_CHUNK, 1, 128, 128), 0.1 + 0.128)
+        # Chunk that crosses into the next page
+        self.assertAlmostEqual(profile.processing_time(MdfuCmd.WRITE_CHUNK, 1, 448, 128), 0.1 + 5.12 + 0.128)
+        self.assertAlmostEqual(profile.processing_time(MdfuCmd.WRITE_CHUNK, 1, 0, 1024), 0.1 + 10.24 + 1.024)
+        with self.assertRaises(ValueError):
+            ClientProfile(page_size=0)
+
+    def test_write_time(self):
+        """Test that write chunk status packets are delayed by the flash write time"""
+        image = bytes(1024)
+        profile = ClientProfile(write_time_per_byte=0.0001)
+        client_info = ClientInfo(Version("1.2.0"), 1, 128, 10)
+        _, transport = self._start_client(client_info, profile)
+        stats = Mdfu(transport).run_upgrade(image)
+        self.assertGreaterEqual(stats.commands["WRITE_CHUNK"].response_time, len(image) * 0.0001 * 0.9)
+
+    def test_simulator_profile(self):
+        """Test simulated I2C update with the flash profile"""
+        tool = ToolFactory.get_tool("simulator", tool_args=["--transport", "i2c", "--mac", "packet",
+                                                            "--profile", "flash"])
+        stats = Mdfu(tool).run_upgrade(bytes(2048))
+        # 2048 bytes written and 4 pages erased
+        self.assertGreaterEqual(stats.commands["WRITE_CHUNK"].response_time, 2048 * 20e-6 + 2048 * 40e-6)
+
+    def test_multiple_buffers(self):
+        """Test that the client accepts commands while executing others"""
+        profile = ClientProfile(latencies={MdfuCmd.WRITE_CHUNK: 0.01})
+        client_info = ClientInfo(Version("1.2.0"), 4, 128, 10)
+        client, transport = self._start_client(client_info, profile, RecordingMdfuClient)
+        Mdfu(transport, windowed=True).run_upgrade(bytes(range(256)) * 8)
+        self.assertGreater(client.max_pending, 1)
+        self.assertLessEqual(client.max_pending, 4)
+
+    def test_buffers_full(self):
+        """Test that a command is rejected with a resend request when all buffers are in use"""
+        profile = ClientProfile(latencies={MdfuCmd.START_TRANSFER: 0.2})
+        client_info = ClientInfo(Version("1.2.0"), 1, 128, 10)
+        _, transport = self._start_client(client_info, profile)
+        transport.open()
+        transport.write(MdfuCmdPacket(0, MdfuCmd.START_TRANSFER.value, bytes(), sync=True).to_binary())
+        transport.write(MdfuCmdPacket(1, MdfuCmd.WRITE_CHUNK.value, bytes(8)).to_binary())
+
+        status = MdfuStatusPacket.from_binary(transport.read(timeout=1))
+        self.assertEqual(status.sequence_number, 1)
+        self.assertTrue(status.resend)
+        status = MdfuStatusPacket.from_binary(transport.read(timeout=1))
+        self.assertEqual(status.sequence_number, 0)
+        self.assertEqual(status.status, MdfuStatus.SUCCESS.value)
+        # The client accepts the command when it is sent again
+        transport.write(MdfuCmdPacket(1, MdfuCmd.WRITE_CHUNK.value, bytes(8)).to_binary())
+        status = MdfuStatusPacket.from_binary(transport.read(timeout=1))
+        self.assertEqual(status.sequence_number, 1)
+        self.assertEqual(status.status, MdfuStatus.SUCCESS.value)
+        self.assertFalse(status.resend)
@@ -0,0 +1,95 @@
+"""Tests for parallel firmware updates of multiple devices"""
+import os
+import sys
+import tempfile
+import unittest
+from mock import patch
+from serial import SerialException
+from ..fleet import MdfuFleetUpdater, FleetDevice
+from ..image import ImageSource
+from ..pymdfu import main
+from ..status_codes import STATUS_SUCCESS, STATUS_FAILURE
+
+class TestMdfuFleetUpdate(unittest.TestCase):
+    """Fleet update tests"""
+
+    def _create_file(self, data):
+        file = tempfile.NamedTemporaryFile(delete=False) #pylint: disable=consider-using-with
+        file.write(data)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_device_from_config(self):
+        """Test device creation from a configuration dictionary"""
+        device = FleetDevice.from_config({"tool": "serial", "name": "board", "retries": 2,
+                                          "port": "COM11", "baudrate": 115200})
+        self.assertEqual(device.name, "board")
+        self.assertEqual(device.tool, "serial")
+        self.assertEqual(device.retries, 2)
+        self.assertEqual(device.tool_args, ["--port", "COM11", "--baudrate", "115200"])
+        self.assertEqual(FleetDevice.from_config({"tool": "serial"}, 3).name, "device3")
+        with self.assertRaises(ValueError):
+            FleetDevice.from_config({"port": "COM11"})
+        device = FleetDevice.from_config({"tool": "network", "no-nodelay": True, "multi-client": False})
+        self.assertEqual(device.tool_args, ["--no-nodelay"])
+        self.assertEqual(FleetDevice.from_config({"tool": "serial", "retries": 0}).retries, 0)
+        for retries in ["3", 2.5, -1, True]:
+            with self.assertRaises(ValueError):
+                FleetDevice.from_config({"tool": "serial", "retries": retries})
+
+    def test_simulated_fleet_update(self):
+        """Update multiple simulated clients in parallel with a shared image"""
+        image = ImageSource(bytes(range(256)) * 4)
+        devices = [FleetDevice(f"sim{i}", "simulator") for i in range(3)]
+        devices.append(FleetDevice("sim-i2c", "simulator", ["--transport", "i2c", "--mac", "packet"]))
+        updater = MdfuFleetUpdater(devices, max_workers=2)
+        results = updater.run(image)
+
+        self.assertEqual([result.device for result in results], devices)
+        for result in results:
+            self.assertTrue(result.success, str(result))
+            self.assertIsNone(result.error)
+
+    def test_failed_device(self):
+        """Test that a failing device does not abort the update of the other devices"""
+        devices = [FleetDevice("bad", "simulator", ["--mac", "invalid"]),
+                   FleetDevice("good", "simulator")]
+        results = MdfuFleetUpdater(devices).run(bytes(512))
+
+        self.assertFalse(results[0].success)
+        self.assertIsNotNone(results[0].error)
+        self.assertTrue(results[1].success)
+
+    def test_missing_serial_port(self):
+        """Test that an OSError of a device fails the device without aborting the other devices"""
+        devices = [FleetDevice("missing", "serial", ["--port", "COM99", "--baudrate", "115200"]),
+                   FleetDevice("good", "simulator")]
+        with patch("pymdfu.mac.serial_mac.MacSerialPort.open", side_effect=SerialException("could not open port COM99")):
+            results = MdfuFleetUpdater(devices).run(bytes(512))
+
+        self.assertFalse(results[0].success)
+        self.assertIsNotNone(results[0].error)
+        self.assertTrue(results[1].success)
+
+    def test_invalid_worker_count(self):
+        """Test that at least one worker is required"""
+        with self.assertRaises(ValueError):
+            MdfuFleetUpdater([], max_workers=0)
+
+    def test_cli_update_many(self):
+        """Test update-many CLI action"""
+        image = self._create_file(bytes(1024))
+        devices = self._create_file(b'[[device]]\nname = "a"\ntool = "simulator"\n\n'
+                                    b'[[device]]\nname = "b"\ntool = "simulator"\nretries = 2\n')
+        testargs = ["pymdfu", "update-many", "--devices", devices, "--image", image, "--workers", "2"]
+        with patch.object(sys, 'argv', testargs):
+            self.assertEqual(main(), STATUS_SUCCESS)
+
+    def test_cli_update_many_no_devices(self):
+        """Test update-many CLI action with an empty devices file"""
+        image = self._create_file(bytes(1024))
+        devices = self._create_file(b'')
+        testargs = ["pymdfu", "update-many", "--devices", devices, "--image", image]
+        with patch.object(sys, 'argv', testargs):
+            self.assertEqual(main(), STATUS_FAILURE)
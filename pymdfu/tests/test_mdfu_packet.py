@@ -29,6 +29,7 @@ class TestMdfuPacket(unittest.TestCase):
         packet = MdfuCmdPacket(1, MdfuCmd.GET_CLIENT_INFO.value, data, sync=True)
         packet_bin = packet.to_binary()
         self.assertEqual(packet_bin, packet_bin_expected)
+        self.assertIsInstance(packet_bin, bytes)
 
     def test_invalid_cmd_packet(self):
         """Test MdfuCmdPacket related exceptions
@@ -78,3 +79,36 @@ class TestMdfuPacket(unittest.TestCase):
             MdfuStatusPacket(1,  0, None)
         with pytest.raises(MdfuStatusInvalidError):
             MdfuStatusPacket(1, 0xff, None)
+
+    def test_status_packet_to_binary(self):
+        """Build MDFU binary packet from MdfuStatusPacket class"""
+        packet = MdfuStatusPacket(2, MdfuStatus.COMMAND_NOT_EXECUTED.value, bytes([0x01]), resend=True)
+        self.assertEqual(packet.to_binary(), bytes([0x42, 0x04, 0x01]))
+        self.assertIsInstance(packet.to_binary(), bytes)
+        self.assertEqual(MdfuStatusPacket.from_binary(packet.to_binary()).data, bytes([0x01]))
+
+    def test_to_binary_memoryview(self):
+        """Build binary packets from memoryview data"""
+        data = bytes(range(10))
+        packets = [(MdfuCmdPacket(3, MdfuCmd.WRITE_CHUNK.value, memoryview(data)),
+                    bytes([0x03, MdfuCmd.WRITE_CHUNK.value])),
+                   (MdfuStatusPacket(31, MdfuStatus.SUCCESS.value, memoryview(data), resend=True),
+                    bytes([0x5f, MdfuStatus.SUCCESS.value]))]
+        for packet, header in packets:
+            self.assertEqual(packet.to_binary(), header + data)
+            self.assertIsInstance(packet.to_binary(), bytes)
+
+    def test_packet_slots(self):
+        """Packets only have their fields as attributes"""
+        packets = [MdfuCmdPacket(1, MdfuCmd.GET_CLIENT_INFO.value, bytes()),
+                   MdfuStatusPacket(1, MdfuStatus.SUCCESS.value)]
+        for packet in packets:
+            with pytest.raises(AttributeError):
+                packet.unknown = 1
+
+    def test_short_packets(self):
+        """Packets without command or status field are invalid"""
+        with pytest.raises(MdfuCmdNotSupportedError):
+            MdfuCmdPacket.from_binary(bytes([0x01]))
+        with pytest.raises(MdfuStatusInvalidError):
+            MdfuStatusPacket.from_binary(bytes([0x01]))
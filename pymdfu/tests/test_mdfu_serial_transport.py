@@ -1,12 +1,27 @@
 """Tests for MDFU serial transport"""
 import time
+import random
 import unittest
 import pytest
 import mock
 from ..transport.uart_transport import UartTransport, TransportError, Frame, \
-    FRAME_END_ESC_SEQ, FRAME_START_ESC_SEQ, ESCAPE_SEQ_ESC_SEQ, FRAME_END_CODE, FRAME_START_CODE
+    FRAME_END_ESC_SEQ, FRAME_START_ESC_SEQ, ESCAPE_SEQ_ESC_SEQ, FRAME_END_CODE, FRAME_START_CODE, ESCAPE_SEQ_CODE
 from ..mac.mac import Mac
 
+def encode_payload_per_byte(data):
+    """Per byte reference implementation of the frame payload encoding"""
+    encoded_data = bytearray()
+    for byte in data:
+        if byte == FRAME_START_CODE:
+            encoded_data += FRAME_START_ESC_SEQ
+        elif byte == FRAME_END_CODE:
+            encoded_data += FRAME_END_ESC_SEQ
+        elif byte == ESCAPE_SEQ_CODE:
+            encoded_data += ESCAPE_SEQ_ESC_SEQ
+        else:
+            encoded_data.append(byte)
+    return encoded_data
+
 class TestMdfuPacket(unittest.TestCase):
     """
     Serial transport layer tests
@@ -78,5 +93,43 @@ class TestMdfuPacket(unittest.TestCase):
         with pytest.raises(TransportError):
             rsp = transport.read(timeout=1)
         mac_mock.read.assert_called()
-        
 
+    def test_payload_encoding(self):
+        """Test frame payload encoding against a per byte reference implementation"""
+        rng = random.Random(42)
+        reserved = [FRAME_START_CODE, FRAME_END_CODE, ESCAPE_SEQ_CODE]
+        for size in [0, 1, 2, 3, 17, 256, 1030]:
+            # Mix of random bytes and a high density of reserved codes
+            data = bytes(rng.choice(reserved) if rng.random() < 0.3 else rng.getrandbits(8)
+                         for _ in range(size))
+            encoded = Frame.encode_payload(data)
+            self.assertEqual(encoded, encode_payload_per_byte(data))
+            self.assertEqual(Frame.decode_payload(encoded), data)
+
+    def test_payload_decoding_errors(self):
+        """Test that invalid escape sequences are detected when decoding"""
+        with pytest.raises(ValueError):
+            Frame.decode_payload(bytes([0x01, ESCAPE_SEQ_CODE, 0x00, 0x02]))
+        # Two consecutive escape codes
+        with pytest.raises(ValueError):
+            Frame.decode_payload(bytes([0x01, ESCAPE_SEQ_CODE, ESCAPE_SEQ_CODE, 0x02]))
+        with pytest.raises(ValueError):
+            Frame.decode_payload(bytes([ESCAPE_SEQ_CODE, ESCAPE_SEQ_CODE]))
+
+    def test_read_bulk(self):
+        """Test that frames are assembled from bulk MAC reads
+
+        Two frames and some noise are received in a single MAC read. The bytes
+        following the first frame must be kept for the second read.
+        """
+        packets = [bytes([0x01, 0x02, FRAME_START_CODE]), bytes([0x03, FRAME_END_CODE, ESCAPE_SEQ_CODE, 0x04])]
+        stream = bytes([0x00, 0x11]) + Frame(packets[0]).to_bytes() + Frame(packets[1]).to_bytes()
+
+        mac_mock = mock.MagicMock()
+        mac_mock.__len__.return_value = len(stream)
+        mac_mock.read.side_effect = [stream]
+        transport = UartTransport(mac_mock)
+
+        self.assertEqual(transport.read(timeout=1), packets[0])
+        self.assertEqual(transport.read(timeout=1), packets[1])
+        mac_mock.read.assert_called_once_with(len(stream))
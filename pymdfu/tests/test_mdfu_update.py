@@ -4,7 +4,7 @@ import mock
 import pytest
 from packaging.version import Version
 from pymdfu.transport.uart_transport import UartTransport
-from ..mdfu import Mdfu, ClientInfo, MdfuUpdateError
+from ..mdfu import Mdfu, ClientInfo, MdfuUpdateError, MdfuCmd, MdfuStatusPacket, MdfuStatus
 from ..pymdfuclient import MdfuClient
 from ..mac import MacFactory
 
@@ -41,3 +41,15 @@ class TestMdfuUpdate(unittest.TestCase):
             host.client = ClientInfo(Version("99.99.99"), 1, 256, 1)
             with pytest.raises(MdfuUpdateError):
                 host.run_upgrade(bytes(1))
+
+    def test_write_chunk_payload_not_copied(self):
+        """Test that the write chunk payload is passed to the transport without copying it into a packet"""
+        transport = mock.MagicMock()
+        transport.read.return_value = MdfuStatusPacket(0, MdfuStatus.SUCCESS.value).to_binary()
+        host = Mdfu(transport)
+        chunk = memoryview(bytes(range(64)))
+        host.send_cmd(MdfuCmd.WRITE_CHUNK, data=chunk)
+        header, payload = transport.write_vectored.call_args[0][0]
+        self.assertEqual(header, bytes([0x00, MdfuCmd.WRITE_CHUNK.value]))
+        self.assertIs(payload, chunk)
+        transport.write.assert_not_called()
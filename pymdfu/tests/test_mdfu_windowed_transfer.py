@@ -0,0 +1,179 @@
+"""Tests for windowed write chunk transfers"""
+import unittest
+import pytest
+from packaging.version import Version
+from pymdfu.transport.uart_transport import UartTransport
+from ..mdfu import Mdfu, ClientInfo, MdfuCmd, MdfuCmdPacket, MdfuStatus, MdfuStatusPacket, \
+    MdfuProtocolError, TransportError
+from ..pymdfuclient import MdfuClient
+from ..mac import MacFactory
+
+class WindowedTransportStub():
+    """Transport stub that answers commands out of order
+
+    Status packets are returned once the number of commands in flight equals
+    the window size, in reverse order of the commands that were sent.
+    """
+    def __init__(self, window, resend=None):
+        self.window = window
+        self.resend = set(resend) if resend else set()
+        self.written = []
+        self.responses = []
+        self.max_in_flight = 0
+        self.in_flight = []
+        self.mac = None
+
+    def write(self, data):
+        packet = MdfuCmdPacket.from_binary(data)
+        self.written.append(packet)
+        self.in_flight.append(packet)
+        self.max_in_flight = max(self.max_in_flight, len(self.in_flight))
+
+    def read(self, timeout=None): # pylint: disable=unused-argument
+        if not self.responses:
+            for packet in reversed(self.in_flight):
+                resend = packet.sequence_number in self.resend
+                self.resend.discard(packet.sequence_number)
+                status = MdfuStatus.COMMAND_NOT_EXECUTED if resend else MdfuStatus.SUCCESS
+                self.responses.append(MdfuStatusPacket(packet.sequence_number, status.value, resend=resend))
+            self.in_flight = []
+        if not self.responses:
+            raise TransportError("No response available")
+        return self.responses.pop(0).to_binary()
+
+class TestMdfuWindowedTransfer(unittest.TestCase):
+    """Windowed write chunk transfer tests"""
+
+    def _host(self, transport, buffer_count, retries=5):
+        host = Mdfu(transport, retries=retries, windowed=True)
+        host.client = ClientInfo(Version("1.2.0"), buffer_count, 64, 1)
+        return host
+
+    def test_window_limit(self):
+        """Test that no more than buffer_count commands are in flight"""
+        transport = WindowedTransportStub(window=4)
+        host = self._host(transport, 4)
+        chunks = [bytes([i]) * 64 for i in range(10)]
+        host.write_chunks_windowed(chunks)
+
+        self.assertEqual(transport.max_in_flight, 4)
+        self.assertEqual([p.data for p in transport.written], chunks)
+        self.assertEqual([p.sequence_number for p in transport.written], list(range(10)))
+        self.assertEqual(host.sequence_number, 10)
+
+    def test_resend_from_failed_chunk(self):
+        """Test that the chunk with the resend flag set and the chunks in flight after it are sent again"""
+        transport = WindowedTransportStub(window=4, resend=[1])
+        # Answer in order like a client that executes commands in sequence number order
+        transport.read = lambda timeout=None, read=transport.read: \
+            (transport.in_flight.reverse(), read(timeout))[1]
+        host = self._host(transport, 4)
+        chunks = [bytes([i]) * 64 for i in range(4)]
+        host.write_chunks_windowed(chunks)
+
+        sequence_numbers = [p.sequence_number for p in transport.written]
+        self.assertEqual(sequence_numbers, [0, 1, 2, 3, 1, 2, 3])
+        self.assertEqual([p.data for p in transport.written[4:]], chunks[1:])
+
+    def test_error_status(self):
+        """Test that an error status aborts the windowed transfer"""
+        transport = WindowedTransportStub(window=2)
+        transport.read = lambda timeout=None: MdfuStatusPacket(0, MdfuStatus.ABORT_FILE_TRANSFER.value,
+                                                               bytes([1])).to_binary()
+        host = self._host(transport, 2)
+        with pytest.raises(MdfuProtocolError):
+            host.write_chunks_windowed([bytes(64), bytes(64)])
+
+    def test_retries_exhausted(self):
+        """Test that a command without response is retried and finally fails"""
+        transport = WindowedTransportStub(window=2)
+        def read(timeout=None): # pylint: disable=unused-argument
+            raise TransportError("Timeout")
+        transport.read = read
+        host = self._host(transport, 2, retries=2)
+        with pytest.raises(MdfuProtocolError):
+            host.write_chunks_windowed([bytes(64), bytes(64)])
+        # Two initial writes plus two retries of both commands in flight
+        self.assertEqual([p.sequence_number for p in transport.written], [0, 1, 0, 1, 0, 1])
+
+    def test_simulate_windowed_update(self):
+        """Simulate a firmware update in windowed mode"""
+        upgrade_image = bytes(range(256)) * 8
+        mac_host, mac_client = MacFactory.get_bytes_based_mac(timeout=1)
+        transport_client = UartTransport(mac=mac_client, timeout=1)
+        client_info = ClientInfo(Version("1.2.0"), 4, 128, 10, {MdfuCmd.WRITE_CHUNK: 1})
+        client = MdfuClient(transport_client, client_info=client_info)
+
+        transport_host = UartTransport(mac=mac_host)
+        host = Mdfu(transport_host, windowed=True)
+
+        client.start()
+        try:
+            host.run_upgrade(upgrade_image)
+        finally:
+            client.stop()
+
+    def test_simulate_lost_status_packet(self):
+        """Simulate a windowed update where a status packet is lost while several commands are in flight"""
+        upgrade_image = bytes(range(256)) * 8
+        mac_host, mac_client = MacFactory.get_bytes_based_mac(timeout=1)
+        transport_client = UartTransport(mac=mac_client, timeout=1)
+        # Drop the status packet of the third write chunk command
+        lost = [MdfuStatusPacket(4, MdfuStatus.SUCCESS.value).to_binary()]
+        write = transport_client.write
+        def lossy_write(data):
+            if lost and data == lost[0]:
+                lost.pop()
+                return
+            write(data)
+        transport_client.write = lossy_write
+        client_info = ClientInfo(Version("1.2.0"), 4, 128, 10, {MdfuCmd.WRITE_CHUNK: 0.2})
+        client = MdfuClient(transport_client, client_info=client_info)
+
+        transport_host = UartTransport(mac=mac_host)
+        written = []
+        host_write = transport_host.write_vectored
+        def recording_write(buffers):
+            written.append(MdfuCmdPacket.from_binary(b"".join(buffers)).sequence_number)
+            host_write(buffers)
+        transport_host.write_vectored = recording_write
+        host = Mdfu(transport_host, windowed=True)
+
+        client.start()
+        try:
+            host.run_upgrade(upgrade_image)
+        finally:
+            client.stop()
+        self.assertFalse(lost)
+        # The command with the lost status was sent again after newer commands
+        self.assertGreater(written.index(4, written.index(5)), written.index(5))
+        # Commands that were sent again were not executed twice
+        self.assertEqual(client.image_offset, len(upgrade_image))
+
+    def test_simulate_out_of_sync_host(self):
+        """Simulate a non-windowed host with a sequence number the client does not expect"""
+        mac_host, mac_client = MacFactory.get_bytes_based_mac(timeout=1)
+        transport_client = UartTransport(mac=mac_client, timeout=1)
+        client = MdfuClient(transport_client, client_info=ClientInfo(Version("1.2.0"), 1, 128, 10))
+
+        transport_host = UartTransport(mac=mac_host)
+        written = []
+        host_write = transport_host.write
+        def recording_write(data):
+            written.append(MdfuCmdPacket.from_binary(data).sequence_number)
+            host_write(data)
+        transport_host.write = recording_write
+        host = Mdfu(transport_host, retries=5)
+
+        client.start()
+        try:
+            host.open()
+            host.get_client_info(sync=True)
+            host.sequence_number = (host.sequence_number + 1) & 0x1f
+            with pytest.raises(MdfuProtocolError):
+                host.start_transfer()
+        finally:
+            host.close()
+            client.stop()
+        # The client answered with an error status instead of letting the host retry
+        self.assertEqual(written, [0, 2])
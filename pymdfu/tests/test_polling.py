@@ -0,0 +1,152 @@
+"""Tests for adaptive response polling"""
+import time
+import unittest
+from mock import patch
+from ..transport.polling import PollingScheduler
+from ..transport.spi_transport import SpiTransport
+from ..transport.i2c_transport import I2cTransport
+from ..transport import TransportError
+from ..timeout import Timer
+from ..utils import calculate_checksum
+
+RESPONSE = bytes([0x80, 0x01])
+
+def _with_checksum(data):
+    return data + calculate_checksum(data).to_bytes(2, byteorder="little")
+
+class DelayedResponseMac():
+    """MAC that returns a response after a delay and counts response length polls"""
+    def __init__(self, delay):
+        self.ready_time = time.perf_counter() + delay
+        self.polls = 0
+
+    def ready(self):
+        """Check if the response is ready"""
+        return time.perf_counter() >= self.ready_time
+
+class SpiClientMac(DelayedResponseMac):
+    """SPI MAC with a client that has a response ready after a delay"""
+    def __init__(self, delay):
+        super().__init__(delay)
+        self.length_sent = False
+
+    def write(self, data):
+        """Write SPI frame"""
+
+    def read(self, size):
+        """Read client reply to last SPI frame"""
+        if self.length_sent:
+            return b"\x00RSP" + _with_checksum(RESPONSE)
+        self.polls += 1
+        if not self.ready():
+            return bytes(size)
+        self.length_sent = True
+        return b"\x00LEN" + _with_checksum((len(RESPONSE) + 2).to_bytes(2, byteorder="little"))
+
+class SpiClientReadintoMac(SpiClientMac):
+    """SPI MAC with readinto support that counts readinto calls"""
+    def __init__(self, delay):
+        super().__init__(delay)
+        self.readinto_calls = 0
+
+    def readinto(self, buf):
+        """Read client reply to last SPI frame into a buffer"""
+        self.readinto_calls += 1
+        data = self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+class I2cClientMac(DelayedResponseMac):
+    """I2C MAC with a client that has a response ready after a delay"""
+    def __init__(self, delay, busy_frames=0):
+        super().__init__(delay)
+        self.busy_frames = busy_frames
+        self.length_sent = False
+
+    def read(self, size):
+        """Read frame from client"""
+        if not self.length_sent:
+            self.polls += 1
+            if not self.ready():
+                return bytes([0xff] * size)
+            self.length_sent = True
+            return b"L" + _with_checksum((len(RESPONSE) + 2).to_bytes(2, byteorder="little"))
+        if self.busy_frames:
+            self.busy_frames -= 1
+            return bytes([0xff] * size)
+        return b"R" + _with_checksum(RESPONSE)
+
+class TestPollingScheduler(unittest.TestCase):
+    """Polling scheduler tests"""
+
+    def test_backoff(self):
+        """Test exponential backoff of the polling interval"""
+        scheduler = PollingScheduler(min_interval=0.001, max_interval=0.004, backoff=2, immediate_polls=0)
+        poll = scheduler.start(1)
+        delays = [poll.next_delay() for _ in range(5)]
+        # No response time history, first poll is done immediately
+        self.assertEqual(delays, [0.0, 0.001, 0.002, 0.004, 0.004])
+
+        scheduler.immediate_polls = 2
+        poll = scheduler.start(1)
+        delays = [poll.next_delay() for _ in range(5)]
+        self.assertEqual(delays, [0.0, 0.0, 0.0, 0.001, 0.002])
+
+    def test_response_time_history(self):
+        """Test first poll delay based on the average response time"""
+        scheduler = PollingScheduler(margin=0.5, weight=0.5)
+        scheduler.record(1, 0.1)
+        self.assertAlmostEqual(scheduler.start(1).next_delay(), 0.05)
+        scheduler.record(1, 0.2)
+        self.assertAlmostEqual(scheduler.response_times[1], 0.15)
+        # History is kept per command timeout
+        self.assertEqual(scheduler.start(2).next_delay(), 0)
+        # First poll happens at the latest after half of the timeout
+        scheduler.record(0.1, 1)
+        self.assertAlmostEqual(scheduler.start(0.1).next_delay(), 0.05)
+
+    def test_wait_limited_by_timer(self):
+        """Test that a poll wait does not exceed the read timeout"""
+        scheduler = PollingScheduler()
+        scheduler.record(10, 10)
+        timer = Timer(0.01)
+        with patch("pymdfu.transport.polling.sleep_until") as mock_sleep_until:
+            scheduler.start(10).wait(timer)
+        mock_sleep_until.assert_called_once_with(timer.deadline)
+
+class TestResponsePolling(unittest.TestCase):
+    """Transport response polling tests"""
+
+    def test_spi_polling(self):
+        """Test that the SPI transport backs off while waiting for a response"""
+        transport = SpiTransport(SpiClientMac(0.1), timeout=1, polling_interval=0.01)
+        self.assertEqual(transport.read(), RESPONSE)
+        # Busy polling would result in thousands of polls within 100 ms
+        self.assertLess(transport.com.polls, 30)
+        polls = transport.com.polls
+
+        # Next read starts polling shortly before the response is expected
+        transport.com = SpiClientMac(0.1)
+        self.assertEqual(transport.read(), RESPONSE)
+        self.assertLess(transport.com.polls, polls)
+
+    def test_spi_polling_readinto(self):
+        """Test that SPI response length polls are received into a reused buffer"""
+        transport = SpiTransport(SpiClientReadintoMac(0.05), timeout=1, polling_interval=0.01)
+        self.assertEqual(transport.read(), RESPONSE)
+        self.assertEqual(transport.com.readinto_calls, transport.com.polls)
+
+    def test_i2c_polling(self):
+        """Test that the I2C transport backs off while waiting for a response"""
+        transport = I2cTransport(I2cClientMac(0.1, busy_frames=3), timeout=1, polling_interval=0.01)
+        self.assertEqual(transport.read(), RESPONSE)
+        self.assertLess(transport.com.polls, 30)
+        self.assertIn(1, transport.polling.response_times)
+
+    def test_polling_timeout(self):
+        """Test that the read times out when the client never responds"""
+        transport = I2cTransport(I2cClientMac(10), timeout=0.1, polling_interval=0.01)
+        start = time.perf_counter()
+        with self.assertRaises(TransportError):
+            transport.read()
+        self.assertLess(time.perf_counter() - start, 0.5)
@@ -0,0 +1,110 @@
+"""Tests for MDFU session statistics"""
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+import mock
+from mock import patch
+from ..mdfu import Mdfu, MdfuCmd, MdfuStatus, MdfuStatusPacket, TransportError
+from ..stats import SessionStats
+from ..tools.tools import ToolFactory
+from ..pymdfu import main
+from ..status_codes import STATUS_SUCCESS
+from .test_mdfu_windowed_transfer import WindowedTransportStub
+
+class TestSessionStats(unittest.TestCase):
+    """Session statistics tests"""
+
+    def _check_update_stats(self, stats, image_size, chunk_size=128):
+        """Check statistics of a successful update"""
+        self.assertIsInstance(stats, SessionStats)
+        self.assertEqual(stats.image_size, image_size)
+        self.assertGreater(stats.duration, 0)
+        self.assertGreater(stats.throughput, 0)
+        self.assertEqual(list(stats.commands), ["GET_CLIENT_INFO", "START_TRANSFER", "WRITE_CHUNK",
+                                                "GET_IMAGE_STATE", "END_TRANSFER"])
+        self.assertEqual(stats.commands["WRITE_CHUNK"].count, -(-image_size // chunk_size))
+        self.assertEqual(stats.commands["WRITE_CHUNK"].payload_bytes, image_size)
+        for cmd_stats in stats.commands.values():
+            self.assertGreaterEqual(cmd_stats.count, 1)
+            self.assertEqual(cmd_stats.retries, 0)
+            self.assertEqual(cmd_stats.resends, 0)
+            # Framing overhead is included in the bytes on the wire
+            self.assertGreater(cmd_stats.tx_bytes, cmd_stats.payload_bytes)
+            self.assertGreater(cmd_stats.rx_bytes, 0)
+            self.assertGreater(cmd_stats.response_time, 0)
+            self.assertLessEqual(cmd_stats.first_byte_time, cmd_stats.response_time)
+
+    def test_simulated_update(self):
+        """Test statistics of a simulated update over serial transport"""
+        image = bytes(range(256)) * 4 + bytes(10)
+        mdfu = Mdfu(ToolFactory.get_tool("simulator", tool_args=[]))
+        stats = mdfu.run_upgrade(image)
+        self.assertIs(stats, mdfu.stats)
+        self._check_update_stats(stats, len(image))
+
+    def test_simulated_i2c_update(self):
+        """Test statistics of a simulated update over I2C transport"""
+        image = bytes(range(256)) * 2
+        tool = ToolFactory.get_tool("simulator", tool_args=["--transport", "i2c", "--mac", "packet"])
+        self._check_update_stats(Mdfu(tool).run_upgrade(image), len(image))
+
+    def test_retries_and_resends(self):
+        """Test counting of retries and resend requests"""
+        transport = mock.MagicMock()
+        transport.read.side_effect = [
+            MdfuStatusPacket(0, MdfuStatus.COMMAND_NOT_EXECUTED.value, resend=True).to_binary(),
+            TransportError("Intentional mock timeout exception"),
+            MdfuStatusPacket(0, MdfuStatus.SUCCESS.value).to_binary()]
+        host = Mdfu(transport)
+        host.send_cmd(MdfuCmd.WRITE_CHUNK, data=bytes(10))
+
+        cmd_stats = host.stats.commands["WRITE_CHUNK"]
+        self.assertEqual(cmd_stats.count, 1)
+        self.assertEqual(cmd_stats.retries, 2)
+        self.assertEqual(cmd_stats.resends, 1)
+        self.assertEqual(cmd_stats.payload_bytes, 10)
+        # Transport without counters
+        self.assertEqual(cmd_stats.tx_bytes, 0)
+
+    def test_windowed_transfer(self):
+        """Test statistics of a windowed transfer"""
+        transport = WindowedTransportStub(window=4, resend=[2])
+        host = Mdfu(transport, windowed=True)
+        host.client = mock.MagicMock(buffer_count=4, timeouts={}, default_timeout=1)
+        host.write_chunks_windowed([bytes(8)] * 10)
+
+        cmd_stats = host.stats.commands["WRITE_CHUNK"]
+        self.assertEqual(cmd_stats.count, 10)
+        self.assertEqual(cmd_stats.payload_bytes, 80)
+        self.assertEqual(cmd_stats.resends, 1)
+        self.assertEqual(cmd_stats.retries, 1)
+
+    def test_to_dict(self):
+        """Test conversion of statistics into a dictionary and text"""
+        stats = SessionStats()
+        stats.command("WRITE_CHUNK").count = 2
+        stats.command("WRITE_CHUNK").tx_bytes = 100
+        stats.command("START_TRANSFER").tx_bytes = 5
+        data = stats.to_dict()
+        self.assertEqual(data["tx_bytes"], 105)
+        self.assertEqual(data["duration"], 0.0)
+        self.assertEqual(data["commands"]["WRITE_CHUNK"]["count"], 2)
+        self.assertEqual(json.loads(stats.to_json()), data)
+        self.assertIn("WRITE_CHUNK", str(stats))
+
+    def test_cli_stats_json(self):
+        """Test update CLI action with JSON statistics output"""
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            file.write(bytes(1000))
+        self.addCleanup(os.remove, file.name)
+        testargs = ["pymdfu", "update", "--tool", "simulator", "--image", file.name, "--stats-json"]
+        with patch.object(sys, 'argv', testargs), patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.assertEqual(main(), STATUS_SUCCESS)
+        # Log messages are printed to stdout as well
+        output = stdout.getvalue()
+        stats = json.loads(output[output.index("{"):])
+        self.assertEqual(stats["image_size"], 1000)
+        self.assertEqual(stats["commands"]["WRITE_CHUNK"]["payload_bytes"], 1000)
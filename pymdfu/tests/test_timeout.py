@@ -0,0 +1,47 @@
+"""Tests for the timeout timer"""
+import time
+import unittest
+from mock import patch
+from ..timeout import Timer, sleep_until
+
+class TestTimer(unittest.TestCase):
+    """Timer tests"""
+
+    def test_expired(self):
+        """Test timer expiry"""
+        timer = Timer(0.05)
+        self.assertFalse(timer.expired())
+        self.assertGreater(timer.remaining(), 0)
+        time.sleep(0.06)
+        self.assertTrue(timer.expired())
+        self.assertEqual(timer.remaining(), 0)
+
+    def test_wait(self):
+        """Test that wait blocks until the timer expired"""
+        start = time.perf_counter()
+        timer = Timer(0.02)
+        timer.wait()
+        self.assertTrue(timer.expired())
+        self.assertGreaterEqual(time.perf_counter() - start, 0.02)
+
+    def test_wait_sub_millisecond(self):
+        """Test a sub-millisecond wait that must not sleep"""
+        timer = Timer(0.0002)
+        with patch("pymdfu.timeout.time.sleep") as mock_sleep:
+            timer.wait()
+        mock_sleep.assert_not_called()
+        self.assertTrue(timer.expired())
+
+    def test_wait_expired(self):
+        """Test that waiting on an expired timer returns immediately"""
+        timer = Timer(0)
+        with patch("pymdfu.timeout.time.sleep") as mock_sleep:
+            timer.wait()
+            sleep_until(time.perf_counter_ns() - 1000)
+        mock_sleep.assert_not_called()
+
+    def test_monotonic(self):
+        """Test that the timer is not affected by changes of the wall clock"""
+        timer = Timer(10)
+        with patch("time.time", return_value=time.time() + 3600):
+            self.assertFalse(timer.expired())
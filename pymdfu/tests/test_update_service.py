@@ -0,0 +1,120 @@
+"""Tests for the persistent update service"""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from mock import patch
+from ..fleet import FleetDevice
+from ..frame_cache import FrameCache
+from ..pymdfu import main, DEFAULT_SERVICE_PORT
+from ..service import MdfuService, WarmTool, submit_job, DEFAULT_PORT
+from ..status_codes import STATUS_SUCCESS, STATUS_FAILURE
+from ..tools.simulator import SimulatorTool
+
+class TestUpdateService(unittest.TestCase):
+    """Update service tests"""
+
+    def _create_file(self, data):
+        file = tempfile.NamedTemporaryFile(delete=False) #pylint: disable=consider-using-with
+        file.write(data)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def _start_service(self, devices, **kwargs):
+        service = MdfuService(devices, port=0, frame_cache=FrameCache(), **kwargs)
+        service.start()
+        thread = threading.Thread(target=service.serve_forever)
+        thread.start()
+
+        def stop():
+            service.shutdown()
+            thread.join()
+            service.close()
+        self.addCleanup(stop)
+        return service
+
+    def test_update_jobs(self):
+        """Test that consecutive updates reuse the open tool and report the progress"""
+        image = self._create_file(bytes(range(256)) * 40)
+        devices = [FleetDevice("sim", "simulator"),
+                   FleetDevice("sim-spi", "simulator", ["--transport", "spi", "--mac", "packet"])]
+        with patch.object(SimulatorTool, "open", autospec=True, side_effect=SimulatorTool.open) as mock_open:
+            service = self._start_service(devices, windowed=True)
+            port = service.address[1]
+            for name in ["sim", "sim-spi", "sim"]:
+                events = []
+                result = submit_job({"job": "update", "device": name, "image": image}, port=port,
+                                    on_event=events.append)
+                self.assertTrue(result["success"], result["error"])
+                self.assertEqual(result["stats"]["commands"]["WRITE_CHUNK"]["payload_bytes"], 256 * 40)
+                self.assertEqual(events[-1], {"event": "progress", "device": name, "offset": 256 * 40,
+                                              "size": 256 * 40})
+                self.assertLessEqual(len(events), 101)
+        # Tools were opened when the service started
+        self.assertEqual(mock_open.call_count, 2)
+
+    def test_client_info_job(self):
+        """Test client information job"""
+        service = self._start_service([FleetDevice("sim", "simulator")])
+        result = submit_job({"job": "client-info", "device": "sim"}, port=service.address[1])
+        self.assertTrue(result["success"], result["error"])
+        self.assertIn("MDFU protocol version", result["client_info"])
+
+    def test_invalid_jobs(self):
+        """Test that invalid jobs are reported in the result"""
+        service = self._start_service([FleetDevice("sim", "simulator")])
+        port = service.address[1]
+        jobs = [{"job": "update", "device": "unknown", "image": "update.img"},
+                {"job": "erase", "device": "sim"},
+                {"job": "update", "device": "sim"},
+                {"job": "update", "device": "sim", "image": os.path.join(tempfile.gettempdir(), "missing.img")}]
+        for job in jobs:
+            result = submit_job(job, port=port)
+            self.assertFalse(result["success"])
+            self.assertIsNotNone(result["error"])
+
+    def test_failed_tool(self):
+        """Test that a tool that fails to open is reported and retried by the next job"""
+        service = self._start_service([FleetDevice("bad", "simulator", ["--mac", "invalid"])])
+        with patch.object(WarmTool, "open", autospec=True, side_effect=WarmTool.open) as mock_open:
+            for _ in range(2):
+                result = submit_job({"job": "client-info", "device": "bad"}, port=service.address[1])
+                self.assertFalse(result["success"])
+        self.assertEqual(mock_open.call_count, 2)
+
+    def test_duplicate_device_names(self):
+        """Test that device names must be unique"""
+        with self.assertRaises(ValueError):
+            MdfuService([FleetDevice("sim", "simulator"), FleetDevice("sim", "simulator")])
+
+    def test_cli_submit(self):
+        """Test submit CLI action"""
+        service = self._start_service([FleetDevice("sim", "simulator")])
+        image = self._create_file(bytes(1000))
+        port = str(service.address[1])
+        testargs = ["pymdfu", "submit", "--device", "sim", "--image", image, "--port", port]
+        with patch.object(sys, 'argv', testargs):
+            self.assertEqual(main(), STATUS_SUCCESS)
+        testargs = ["pymdfu", "submit", "--device", "sim", "--client-info", "--port", port]
+        with patch.object(sys, 'argv', testargs):
+            self.assertEqual(main(), STATUS_SUCCESS)
+        testargs = ["pymdfu", "submit", "--device", "other", "--client-info", "--port", port]
+        with patch.object(sys, 'argv', testargs):
+            self.assertEqual(main(), STATUS_FAILURE)
+        # The CLI defines the default service port without importing the service module
+        self.assertEqual(DEFAULT_SERVICE_PORT, DEFAULT_PORT)
+
+    def test_cli_serve(self):
+        """Test serve CLI action until it is interrupted"""
+        devices = self._create_file(b'[[device]]\nname = "sim"\ntool = "simulator"\n')
+        testargs = ["pymdfu", "serve", "--devices", devices, "--port", "0"]
+        with patch.object(sys, 'argv', testargs), \
+             patch.object(MdfuService, "serve_forever", side_effect=KeyboardInterrupt), \
+             patch.object(MdfuService, "close", autospec=True, side_effect=MdfuService.close) as mock_close:
+            self.assertEqual(main(), STATUS_SUCCESS)
+        mock_close.assert_called_once()
+        testargs = ["pymdfu", "serve", "--devices", devices + ".missing"]
+        with patch.object(sys, 'argv', testargs):
+            self.assertEqual(main(), STATUS_FAILURE)
@@ -2,15 +2,37 @@
 """
 import time
 
+# Time before a deadline where sleep_until stops sleeping and polls the clock instead.
+# This compensates for the coarse resolution and wakeup latency of time.sleep.
+SPIN_THRESHOLD_NS = 1_000_000
+
+def sleep_until(deadline_ns):
+    """Block until a deadline is reached
+
+    Sleeps for most of the remaining time and polls the clock for the last
+    SPIN_THRESHOLD_NS nanoseconds to achieve a precise wakeup without keeping the
+    CPU busy during the whole wait.
+
+    :param deadline_ns: Deadline as time.perf_counter_ns() value
+    :type deadline_ns: int
+    """
+    remaining = deadline_ns - time.perf_counter_ns()
+    if remaining > SPIN_THRESHOLD_NS:
+        time.sleep((remaining - SPIN_THRESHOLD_NS) / 1e9)
+    while time.perf_counter_ns() < deadline_ns:
+        pass
+
 class Timer():
     """Simple timeout timer
-    """
 
+    Based on the monotonic high resolution performance counter so that it is
+    not affected by system clock changes.
+    """
     def __init__(self, timeout):
         """Class initialzation
 
         :param timeout: Timeout in seconds
-        :type timeout: int
+        :type timeout: int, float
         """
         self.set(timeout)
 
@@ -18,9 +40,9 @@ class Timer():
         """Set a timeout
 
         :param timeout: Timeout in seconds
-        :type timeout: int
+        :type timeout: int, float
         """
-        self.timeout = time.time() + timeout
+        self.deadline = time.perf_counter_ns() + int(timeout * 1e9)
 
     def expired(self):
         """Checks if timeout has expired
@@ -28,4 +50,24 @@ class Timer():
         :return: True if timeout has expired otherwise False
         :rtype: bool
         """
-        return time.time() > self.timeout
+        return time.perf_counter_ns() > self.deadline
+
+    def remaining(self):
+        """Time left until the timeout expires
+
+        :return: Remaining time in seconds, zero if the timeout has expired
+        :rtype: float
+        """
+        return max(0, self.deadline - time.perf_counter_ns()) / 1e9
+
+    def wait(self):
+        """Block until the timeout has expired
+
+        :return: Time in seconds that was spent waiting
+        :rtype: float
+        """
+        start = time.perf_counter_ns()
+        if start >= self.deadline:
+            return 0.0
+        sleep_until(self.deadline)
+        return (time.perf_counter_ns() - start) / 1e9
@@ -86,9 +86,33 @@ class Mcp2210Tool(Tool, Transport):
         """
         return self.transport.mac
 
+    @property
+    def counters(self):
+        """Transport layer counters
+
+        :return: Byte counters and response timing of the transport layer
+        :rtype: TransportCounters
+        """
+        return self.transport.counters
+
     def write(self, data):
         self.transport.write(data)
 
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for the transport layer
+
+        :return: Transport class
+        :rtype: type
+        """
+        return self.transport.frame_encoder
+
+    def write_frame(self, frame):
+        self.transport.write_frame(frame)
+
+    def write_vectored(self, buffers):
+        self.transport.write_vectored(buffers)
+
     def read(self, timeout):
         return self.transport.read(timeout)
 
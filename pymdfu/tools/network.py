@@ -1,8 +1,11 @@
 """Networking tool"""
 import logging
 import textwrap
+from packaging.version import Version
 from pymdfu.mac import MacFactory
-from pymdfu.mac.network_mac import MacSocketPacketClient, MacSocketPacketHost
+from pymdfu.mac.network_mac import MacSocketPacketClient, MacSocketPacketHost, MacSocketServer, SocketOptions
+from pymdfu.mdfu import ClientInfo
+from pymdfu.pymdfuclient import client_profiles
 from pymdfu.transport.uart_transport import UartTransport
 from pymdfu.tools import Tool, ToolArgumentParser
 from pymdfu.transport import Transport
@@ -19,21 +22,34 @@ class NetworkTool(Tool, Transport):
         """
         self.logger = logging.getLogger(__name__)
         args = self._parse_args(tool_args)
+        options = self._socket_options(args)
 
         if args.transport == "serial":
-            mac = MacFactory.get_socket_client_mac(host=args.host, port=args.port, timeout=1)
+            mac = MacFactory.get_socket_client_mac(host=args.host, port=args.port, timeout=1,
+                                                   connect_timeout=args.connect_timeout, options=options)
             self.transport = UartTransport(mac=mac)
         elif args.transport == "spi":
-            mac = MacSocketPacketClient(args.host, args.port, timeout=2)
+            mac = MacSocketPacketClient(args.host, args.port, timeout=2, connect_timeout=args.connect_timeout,
+                                        options=options)
             self.transport = SpiTransport(mac=mac)
         elif args.transport == "i2c":
-            mac = MacSocketPacketClient(args.host, args.port, timeout=2)
+            mac = MacSocketPacketClient(args.host, args.port, timeout=2, connect_timeout=args.connect_timeout,
+                                        options=options)
             self.transport = I2cTransport(mac=mac)
         else:
             raise ValueError(f"Invalid transport {args.transport}")
 
+    @classmethod
+    def _parse_args(cls, tool_args):
+        return cls._argument_parser().parse_args(tool_args)
+
     @staticmethod
-    def _parse_args(tool_args):
+    def _argument_parser():
+        """Create the argument parser for the tool arguments
+
+        :return: Argument parser
+        :rtype: ToolArgumentParser
+        """
         parser = ToolArgumentParser()
         parser.add_argument("--transport",
             type=str,
@@ -48,11 +64,66 @@ class NetworkTool(Tool, Transport):
             type=str,
             default="localhost"
         )
-        return parser.parse_args(tool_args)
+        parser.add_argument("--connect-timeout",
+            type=float,
+            default=5
+        )
+        parser.add_argument("--no-nodelay",
+            dest="nodelay",
+            action="store_false"
+        )
+        parser.add_argument("--no-quickack",
+            dest="quickack",
+            action="store_false"
+        )
+        parser.add_argument("--send-buffer",
+            type=int,
+            default=None
+        )
+        parser.add_argument("--recv-buffer",
+            type=int,
+            default=None
+        )
+        parser.add_argument("--multi-client",
+            action="store_true"
+        )
+        parser.add_argument("--port-count",
+            type=int,
+            default=1
+        )
+        parser.add_argument("--buffer-size",
+            type=int,
+            default=128
+        )
+        parser.add_argument("--buffer-count",
+            type=int,
+            default=1
+        )
+        parser.add_argument("--profile",
+            type=str,
+            choices=list(client_profiles),
+            default="none"
+        )
+        return parser
+
+    @staticmethod
+    def _socket_options(args):
+        """Create socket options from the tool arguments
+
+        :param args: Parsed tool arguments
+        :type args: Namespace
+        :return: Socket options
+        :rtype: SocketOptions
+        """
+        return SocketOptions(nodelay=args.nodelay, quickack=args.quickack,
+                             send_buffer_size=args.send_buffer, recv_buffer_size=args.recv_buffer)
 
     @classmethod
     def usage_help(cls):
-        return "[--host <host>] [--port <port] [--transport <transport>]"
+        return "[--host <host>] [--port <port] [--transport <transport>] [--connect-timeout <seconds>] " \
+               "[--no-nodelay] [--no-quickack] [--send-buffer <bytes>] [--recv-buffer <bytes>] " \
+               "[--multi-client] [--port-count <count>] [--buffer-size <size>] [--buffer-count <count>] " \
+               "[--profile <profile>]"
 
     @classmethod
     def tool_help(cls):
@@ -67,7 +138,42 @@ class NetworkTool(Tool, Transport):
             --host <host>   Host name or IP address e.g. localhost or 127.0.0.1
             
             --transport <transport>
-                            Transport protocol one of [serial, spi], default is serial
+                            Transport protocol one of [serial, spi, i2c], default is serial
+
+            --connect-timeout <seconds>
+                            Timeout for connecting to the host, default is 5 seconds
+
+            --no-nodelay    Do not disable Nagle's algorithm (TCP_NODELAY). Small
+                            frames may then be delayed until the previous frame is
+                            acknowledged.
+
+            --no-quickack   Do not acknowledge received data immediately (TCP_QUICKACK,
+                            Linux only).
+
+            --send-buffer <bytes>
+                            Socket send buffer size, default is the OS default
+
+            --recv-buffer <bytes>
+                            Socket receive buffer size, default is the OS default
+
+            --multi-client  Client only: Accept any number of host connections and
+                            run a separate MDFU client for each connection
+
+            --port-count <count>
+                            Client only: Listen on <count> consecutive ports starting
+                            at --port, implies --multi-client. Default is 1.
+
+            --buffer-size <size>
+                            Client only: Maximum MDFU packet data length the client
+                            reports. Default is 128.
+
+            --buffer-count <count>
+                            Client only: Number of command buffers the client reports.
+                            Default is 1.
+
+            --profile <profile>
+                            Client only: Client timing profile one of [none, flash],
+                            default is none
         """)
 
     def list_connected(self):
@@ -88,14 +194,45 @@ class NetworkTool(Tool, Transport):
         """
         return self.transport.mac
 
+    @property
+    def counters(self):
+        """Transport layer counters
+
+        :return: Byte counters and response timing of the transport layer
+        :rtype: TransportCounters
+        """
+        return self.transport.counters
+
     def write(self, data):
         self.transport.write(data)
 
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for the transport layer
+
+        :return: Transport class
+        :rtype: type
+        """
+        return self.transport.frame_encoder
+
+    def write_frame(self, frame):
+        self.transport.write_frame(frame)
+
+    def write_vectored(self, buffers):
+        self.transport.write_vectored(buffers)
+
     def read(self, timeout=None):
         return self.transport.read(timeout)
 
 class NetworkClientTool(NetworkTool):
-    """Network client tool"""
+    """Network client tool
+
+    With --multi-client or --port-count the tool has no transport layer of its
+    own. It provides a socket server instead and creates a client transport
+    layer for each accepted connection, see MdfuClientServer.
+    """
+    CLIENT_TRANSPORTS = {"serial": UartTransport, "spi": SpiTransportClient, "i2c": I2cTransportClient}
+
     def __init__(self, tool_args): #pylint: disable=super-init-not-called
         """Network client tool initialization
 
@@ -104,19 +241,43 @@ class NetworkClientTool(NetworkTool):
         """
         self.logger = logging.getLogger(__name__)
         args = self._parse_args(tool_args)
+        options = self._socket_options(args)
+        self.transport = None
+        self.server = None
+        self.client_info = ClientInfo(Version("0.0.0"), args.buffer_count, args.buffer_size, 10, {}, 0.01)
+        self.profile = client_profiles[args.profile]
+        if args.port_count < 1:
+            raise ValueError("Port count must be at least one")
 
-        if args.transport == "serial":
-            mac = MacFactory.get_socket_host_mac(host=args.host, port=args.port, timeout=1)
+        if args.multi_client or args.port_count > 1:
+            if args.transport not in self.CLIENT_TRANSPORTS:
+                raise ValueError(f"Invalid transport {args.transport}")
+            self.transport_class = self.CLIENT_TRANSPORTS[args.transport]
+            self.server = MacSocketServer(args.host, range(args.port, args.port + args.port_count),
+                                          timeout=1 if args.transport == "serial" else 2,
+                                          packet=args.transport != "serial", options=options)
+        elif args.transport == "serial":
+            mac = MacFactory.get_socket_host_mac(host=args.host, port=args.port, timeout=1, options=options)
             self.transport = UartTransport(mac=mac)
         elif args.transport == "spi":
-            mac = MacSocketPacketHost(args.host, args.port, timeout=2)
+            mac = MacSocketPacketHost(args.host, args.port, timeout=2, options=options)
             self.transport = SpiTransportClient(mac=mac)
         elif args.transport == "i2c":
-            mac = MacSocketPacketHost(args.host, args.port, timeout=2)
+            mac = MacSocketPacketHost(args.host, args.port, timeout=2, options=options)
             self.transport = I2cTransportClient(mac=mac)
         else:
             raise ValueError(f"Invalid transport {args.transport}")
 
+    def create_transport(self, mac):
+        """Create the client transport layer for a connection of the socket server
+
+        :param mac: Connection MAC layer
+        :type mac: MacSocketConnection
+        :return: Transport layer
+        :rtype: Transport
+        """
+        return self.transport_class(mac=mac)
+
 if __name__ == "__main__":
     tool = NetworkTool(["--host", "localhost", "--port", "5558", "--transport", "serial"])
     print(tool.usage_help)
@@ -1,8 +1,10 @@
 """Simulator tool"""
 import textwrap
+from packaging.version import Version
 from pymdfu.mac import MacFactory
+from pymdfu.mdfu import ClientInfo
 from pymdfu.tools import Tool, ToolArgumentParser
-from pymdfu.pymdfuclient import MdfuClient
+from pymdfu.pymdfuclient import MdfuClient, client_profiles
 from pymdfu.transport import Transport
 from pymdfu.transport.uart_transport import UartTransport
 from pymdfu.transport.i2c_transport import I2cTransport, I2cTransportClient
@@ -50,7 +52,8 @@ class SimulatorTool(Tool, Transport):
         else:
             raise ValueError(f"Invalid transport layer {args.transport}")
 
-        self.client = MdfuClient(transport_client)
+        client_info = ClientInfo(Version("0.0.0"), args.buffer_count, args.buffer_size, 10, {}, 0.01)
+        self.client = MdfuClient(transport_client, client_info=client_info, profile=client_profiles[args.profile])
 
     @staticmethod
     def _parse_args(tool_args):
@@ -67,11 +70,28 @@ class SimulatorTool(Tool, Transport):
             choices=["serial", "i2c", "spi"],
             default="serial"
         )
+        parser.add_argument("--buffer-size",
+            type=int,
+            help="Client command buffer size",
+            default=128
+        )
+        parser.add_argument("--buffer-count",
+            type=int,
+            help="Number of client command buffers",
+            default=1
+        )
+        parser.add_argument("--profile",
+            type=str,
+            help="Client timing profile",
+            choices=list(client_profiles),
+            default="none"
+        )
         return parser.parse_args(tool_args)
 
     @classmethod
     def usage_help(cls):
-        return "[--transport <transport] [--mac <mac>]"
+        return "[--transport <transport] [--mac <mac>] [--buffer-size <size>] [--buffer-count <count>] "\
+            "[--profile <profile>]"
 
     @classmethod
     def tool_help(cls):
@@ -89,6 +109,15 @@ class SimulatorTool(Tool, Transport):
                             MAC layer slection. Valid options are socketpair, bytes and packet.
                             The packet based MAC layer must be used for i2c and spi transport.
                             Default is bytes.
+            --buffer-size <size>
+                            Maximum MDFU packet data length the client reports. Default is 128.
+            --buffer-count <count>
+                            Number of command buffers the client reports. Default is 1.
+            --profile <profile>
+                            Client timing profile. Valid options are none, where commands
+                            are executed immediately, and flash, which models the command
+                            latency, flash erase and write times and the command buffers
+                            of a microcontroller. Default is none.
         """)
 
     def list_connected(self):
@@ -111,8 +140,32 @@ class SimulatorTool(Tool, Transport):
         """
         return self.transport.mac
 
+    @property
+    def counters(self):
+        """Transport layer counters
+
+        :return: Byte counters and response timing of the transport layer
+        :rtype: TransportCounters
+        """
+        return self.transport.counters
+
     def write(self, data):
         self.transport.write(data)
 
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for the transport layer
+
+        :return: Transport class
+        :rtype: type
+        """
+        return self.transport.frame_encoder
+
+    def write_frame(self, frame):
+        self.transport.write_frame(frame)
+
+    def write_vectored(self, buffers):
+        self.transport.write_vectored(buffers)
+
     def read(self,timeout):
         return self.transport.read(timeout)
@@ -1,28 +1,79 @@
 """Tools manager for MDFU host application
 """
 import platform
-from pymdfu.tools.nedbg import NedbgTool
-from pymdfu.tools.serial_generic import SerialTool
-from pymdfu.tools.mcp2221a import Mcp2221aTool
-from pymdfu.tools.network import NetworkTool, NetworkClientTool
-from pymdfu.tools.simulator import SimulatorTool
-from pymdfu.tools.mcp2210 import Mcp2210Tool
-from pymdfu.tools.aardvark import AardvarkTool
+from collections.abc import Mapping
+from importlib import import_module
 
-supported_tools = {'serial': SerialTool, 'simulator': SimulatorTool, 'network': NetworkTool,
-                    'mcp2221a': Mcp2221aTool, 'nedbg': NedbgTool, 'mcp2210': Mcp2210Tool,
-                    'aardvark': AardvarkTool}
+class ToolRegistry(Mapping):
+    """Lazy tool registry
 
-supported_client_tools = {'serial': SerialTool, 'network': NetworkClientTool}
+    Maps tool names to tool classes. A tool module is only imported when its
+    class is looked up, so that tool specific dependencies (e.g. USB adapter
+    libraries) are not loaded for other tools. Membership tests and iteration
+    over the tool names don't import any tool module.
+    """
+    def __init__(self, tools):
+        """Class initialization
+
+        :param tools: Tool name to "module:class" mapping
+        :type tools: dict
+        """
+        self._tools = dict(tools)
+        self._classes = {}
+
+    def __getitem__(self, tool_name):
+        try:
+            return self._classes[tool_name]
+        except KeyError:
+            pass
+        module_name, class_name = self._tools[tool_name].split(":")
+        tool_class = getattr(import_module(module_name), class_name)
+        self._classes[tool_name] = tool_class
+        return tool_class
+
+    def __setitem__(self, tool_name, tool):
+        """Register a tool
+
+        :param tool_name: Tool name
+        :type tool_name: str
+        :param tool: Tool class or "module:class" reference
+        :type tool: class or str
+        """
+        if isinstance(tool, str):
+            self._tools[tool_name] = tool
+            self._classes.pop(tool_name, None)
+        else:
+            self._tools[tool_name] = f"{tool.__module__}:{tool.__name__}"
+            self._classes[tool_name] = tool
+
+    def __contains__(self, tool_name):
+        return tool_name in self._tools
+
+    def __iter__(self):
+        return iter(self._tools)
+
+    def __len__(self):
+        return len(self._tools)
+
+supported_tools = ToolRegistry({
+    'serial': "pymdfu.tools.serial_generic:SerialTool",
+    'simulator': "pymdfu.tools.simulator:SimulatorTool",
+    'network': "pymdfu.tools.network:NetworkTool",
+    'mcp2221a': "pymdfu.tools.mcp2221a:Mcp2221aTool",
+    'nedbg': "pymdfu.tools.nedbg:NedbgTool",
+    'mcp2210': "pymdfu.tools.mcp2210:Mcp2210Tool",
+    'aardvark': "pymdfu.tools.aardvark:AardvarkTool"})
+
+supported_client_tools = ToolRegistry({
+    'serial': "pymdfu.tools.serial_generic:SerialTool",
+    'network': "pymdfu.tools.network:NetworkClientTool"})
 
 os_type = platform.system()
 if os_type == "Windows":
     pass
 if os_type == "Linux":
-    from pymdfu.tools.linux_i2c import LinuxI2cTool
-    from pymdfu.tools.linux_spi import LinuxSpiTool
-    supported_tools['linux-i2c'] = LinuxI2cTool
-    supported_tools['linux-spi'] = LinuxSpiTool
+    supported_tools['linux-i2c'] = "pymdfu.tools.linux_i2c:LinuxI2cTool"
+    supported_tools['linux-spi'] = "pymdfu.tools.linux_spi:LinuxSpiTool"
 elif os_type == "Darwin":
     pass
 
@@ -46,9 +97,7 @@ class ToolFactory():
         try:
             tool = supported_tools[tool_name](tool_args)
         except KeyError as exc:
-            tool_list = ""
-            for name,_ in supported_tools.items():
-                tool_list += f", {name}"
+            tool_list = ", ".join(supported_tools)
             raise ValueError(f'Tool "{tool_name}" is not in supported tools list {tool_list} ') from exc
         return tool
 
@@ -70,9 +119,7 @@ class ToolFactory():
         try:
             tool = supported_client_tools[tool_name](tool_args)
         except KeyError as exc:
-            tool_list = ""
-            for name,_ in supported_client_tools.items():
-                tool_list += f", {name}"
+            tool_list = ", ".join(supported_client_tools)
             raise ValueError(f'Tool "{tool_name}" is not in supported tools list {tool_list} ') from exc
         return tool
 
@@ -89,9 +136,7 @@ class ToolFactory():
         try:
             tool = supported_tools[tool_name]
         except KeyError as exc:
-            tool_list = ""
-            for name,_ in supported_tools.items():
-                tool_list += f", {name}"
+            tool_list = ", ".join(supported_tools)
             raise ValueError(f'Tool "{tool_name}" is not in supported tools list {tool_list} ') from exc
         return tool
 
@@ -108,8 +153,6 @@ class ToolFactory():
         try:
             tool = supported_client_tools[tool_name]
         except KeyError as exc:
-            tool_list = ""
-            for name,_ in supported_client_tools.items():
-                tool_list += f", {name}"
+            tool_list = ", ".join(supported_client_tools)
             raise ValueError(f'Tool "{tool_name}" is not in supported tools list {tool_list} ') from exc
         return tool
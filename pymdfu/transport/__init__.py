@@ -1,10 +1,88 @@
 """Transport interface for MDFU
 """
 import abc
+from pymdfu.utils import calculate_checksum
 
 class TransportError(Exception):
     """Generic transport exception"""
 
+class TransportCounters():
+    """Transport layer byte counters and response timing
+
+    Updated by the transport layers on each write and read so that the MDFU
+    protocol layer can collect session statistics.
+    """
+    __slots__ = ("tx_bytes", "rx_bytes", "response_start")
+
+    def __init__(self):
+        """Class initialization"""
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        # time.perf_counter_ns() value when the first byte of the last response was received
+        self.response_start = None
+
+    def reset(self):
+        """Reset all counters"""
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.response_start = None
+
+class FrameTemplate():
+    """Transport frame of an MDFU command packet without sequence number
+
+    Holds the encoded frame up to the frame check sequence for a packet with
+    sequence field zero. The sequence field and the frame check sequence, which
+    covers the sequence field, are filled in when the frame is sent, so the same
+    template can be sent with any sequence number without encoding the packet
+    again.
+    """
+    __slots__ = ("encoder", "head", "sequence_offset", "checksum_sum")
+
+    def __init__(self, encoder, head, sequence_offset, checksum_sum):
+        """Class initialization
+
+        :param encoder: Transport class that encoded the frame
+        :type encoder: Transport class with frame_head and frame_tail class methods
+        :param head: Encoded frame up to the frame check sequence
+        :type head: bytes
+        :param sequence_offset: Offset of the packet sequence field in the head
+        :type sequence_offset: int
+        :param checksum_sum: 16-bit sum of the packet with sequence field zero
+        :type checksum_sum: int
+        """
+        self.encoder = encoder
+        self.head = head
+        self.sequence_offset = sequence_offset
+        self.checksum_sum = checksum_sum
+
+    @classmethod
+    def create(cls, encoder, packet):
+        """Create a frame template
+
+        :param encoder: Transport class that encodes the frame
+        :type encoder: Transport class with frame_head and frame_tail class methods
+        :param packet: MDFU command packet with sequence field zero
+        :type packet: Bytes like object
+        :return: Frame template
+        :rtype: FrameTemplate
+        """
+        head, sequence_offset = encoder.frame_head(packet)
+        return cls(encoder, bytes(head), sequence_offset, ~calculate_checksum(packet) & 0xffff)
+
+    def frame(self, sequence_field):
+        """Create the frame for a sequence field
+
+        :param sequence_field: Packet sequence field, must not contain the sync flag
+        :type sequence_field: int
+        :return: Transport frame
+        :rtype: bytearray
+        """
+        frame = bytearray(self.head)
+        frame[self.sequence_offset] = sequence_field
+        check_sequence = ~(self.checksum_sum + sequence_field) & 0xffff
+        frame += self.encoder.frame_tail(check_sequence.to_bytes(2, byteorder="little"))
+        return frame
+
 class Transport(object, metaclass=abc.ABCMeta):
     """Abstract class for transport interface definition
 
@@ -32,3 +110,54 @@ class Transport(object, metaclass=abc.ABCMeta):
     def mac(self):
         """MAC layer"""
         raise NotImplementedError('To use this base class the mac property must be implemented')
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for this transport
+
+        None if the transport does not support sending pre-encoded frames with write_frame.
+        """
+        return None
+    def write_frame(self, frame):
+        """Write an encoded frame created from a frame template
+
+        Frame templates are only created for transports with a frame_encoder, by
+        default the encoded frame is written to the MAC layer as is.
+        """
+        self.mac.write(frame)
+    def write_vectored(self, buffers):
+        """Write a MDFU packet given as several buffers, e.g. header and payload
+
+        Transports that can frame the buffers without joining them override this
+        method, by default the buffers are joined and written with write.
+        """
+        self.write(b"".join(buffers))
+
+class AsyncTransport(object, metaclass=abc.ABCMeta):
+    """Abstract class for asynchronous transport interface definition
+
+    Same interface as Transport but with coroutines for all I/O operations.
+
+    :raises NotImplementedError: Exception when interface implementation does not
+    follow interface specification
+    """
+    @abc.abstractmethod
+    async def open(self):
+        """Open transport"""
+        raise NotImplementedError('users must define open to use this base class')
+    @abc.abstractmethod
+    async def close(self):
+        """Close transport"""
+        raise NotImplementedError('users must define close to use this base class')
+    @abc.abstractmethod
+    async def read(self, timeout):
+        """Read from transport layer"""
+        raise NotImplementedError('users must define read to use this base class')
+    @abc.abstractmethod
+    async def write(self, data):
+        """Write to transport layer"""
+        raise NotImplementedError('users must define write to use this base class')
+    @property
+    @abc.abstractmethod
+    def mac(self):
+        """MAC layer"""
+        raise NotImplementedError('To use this base class the mac property must be implemented')
@@ -0,0 +1,377 @@
+"""Asynchronous transport layers
+
+asyncio based variants of the UART, SPI and I2C transport layers. They share the
+frame encoding and decoding with the synchronous transport layers.
+"""
+import asyncio
+import time
+from logging import getLogger
+from pymdfu.transport import AsyncTransport, TransportError, TransportCounters
+from pymdfu.transport.uart_transport import Frame, FRAME_START_CODE_BYTES, FRAME_END_CODE_BYTES
+from pymdfu.transport.spi_transport import SpiTransport
+from pymdfu.transport.i2c_transport import I2cTransport
+from pymdfu.transport.polling import PollingScheduler
+from pymdfu.mac.exceptions import MacError, MacI2cNackError
+from pymdfu.utils import LazyHex
+
+class AsyncUartTransport(AsyncTransport):
+    """Asynchronous UART transport layer
+
+    Uses the same frame encoding as UartTransport.
+    """
+    # Maximum number of bytes requested from the MAC layer per read
+    READ_SIZE = 4096
+
+    def __init__(self, mac, timeout=5):
+        """ Class initialization
+
+        :param mac: Asynchronous MAC layer
+        :type mac: Instance of an asynchronous MAC layer e.g. AsyncMacSocketClient
+        :param timeout: Communication timeout in seconds, defaults to 5
+        :type timeout: int, optional
+        """
+        self.timeout = timeout
+        self.com = mac
+        # Received data that was not yet consumed by a frame
+        self.rx_buf = bytearray()
+        self.counters = TransportCounters()
+        self.logger = getLogger(__name__)
+
+    async def open(self):
+        """Open transport
+        """
+        self.rx_buf.clear()
+        try:
+            await self.com.open()
+        except MacError as exc:
+            self.logger.error("Opening Mac failed: %s", exc)
+            raise TransportError(exc) from exc
+
+    async def close(self):
+        """Close transport
+        """
+        await self.com.close()
+
+    @property
+    def mac(self):
+        """MAC layer
+
+        :return: MAC layer used in the transport layer
+        :rtype: Asynchronous MAC
+        """
+        return self.com
+
+    async def write(self, data):
+        """Send MDFU command packet to client
+
+        :param data: MDFU packet
+        :type data: bytes
+        """
+        frame_bytes = Frame(data).to_bytes()
+        self.logger.debug("Sending frame -> %s", LazyHex(frame_bytes))
+        try:
+            await self.com.write(frame_bytes)
+            self.counters.tx_bytes += len(frame_bytes)
+        except (MacError, OSError) as exc:
+            raise TransportError(exc) from exc
+
+    async def read(self, timeout=None):
+        """Receive a MDFU status packet
+
+        :param timeout: Timeout for the read operation in seconds, defaults to None
+        which uses the timeout set during class initialization
+        :type timeout: float, optional
+        :raises TransportError: Upon timeout, checksum error or MAC error
+        :return: MDFU status packet
+        :rtype: bytes
+        """
+        try:
+            frame = await asyncio.wait_for(self._read_frame(), timeout if timeout else self.timeout)
+        except asyncio.TimeoutError as exc:
+            msg = "Timeout while waiting for frame."
+            self.logger.debug(msg)
+            raise TransportError(msg) from exc
+        except (MacError, OSError) as exc:
+            raise TransportError(exc) from exc
+
+        self.logger.debug("Received a frame <- 0x%s", LazyHex(frame))
+        try:
+            frame = Frame.from_bytes(frame)
+        except ValueError as exc:
+            self.logger.error("Invalid frame: %s", exc)
+            raise TransportError(exc) from exc
+        return frame.packet
+
+    async def _read_frame(self):
+        """Read a frame
+
+        :return: Frame including start and end code
+        :rtype: bytearray
+        """
+        # Discard everything until we get the start code
+        await self._read_until(FRAME_START_CODE_BYTES)
+        self.counters.response_start = time.perf_counter_ns()
+        frame = bytearray(FRAME_START_CODE_BYTES)
+        frame += await self._read_until(FRAME_END_CODE_BYTES)
+        return frame
+
+    async def _read_until(self, pattern):
+        """Read from MAC layer until pattern is detected
+
+        :param pattern: Pattern to detect
+        :type pattern: bytes
+        :return: Data read including the pattern
+        :rtype: bytearray
+        """
+        search_start = 0
+        while True:
+            index = self.rx_buf.find(pattern, search_start)
+            if index >= 0:
+                end = index + len(pattern)
+                data = self.rx_buf[:end]
+                del self.rx_buf[:end]
+                return data
+            search_start = max(0, len(self.rx_buf) - len(pattern) + 1)
+            data = await self.com.read(self.READ_SIZE)
+            self.counters.rx_bytes += len(data)
+            self.rx_buf += data
+
+class AsyncSpiTransport(AsyncTransport):
+    """Asynchronous SPI transport layer
+
+    Uses the same frame encoding as SpiTransport and is intended for the
+    network packet MAC (AsyncMacSocketPacketClient).
+    """
+    def __init__(self, mac, timeout=5, polling_interval=0.001):
+        """ Class initialization
+
+        :param mac: Asynchronous packet based MAC layer
+        :type mac: AsyncMacSocketPacketClient
+        :param timeout: Communication timeout in seconds, defaults to 5
+        :type timeout: int, optional
+        :param polling_interval: Maximum time in seconds between polls for a client response,
+        defaults to 0.001
+        :type polling_interval: float, optional
+        """
+        self.com = mac
+        self.timeout = timeout
+        self.polling_interval = polling_interval
+        self.polling = PollingScheduler(max_interval=polling_interval)
+        self.counters = TransportCounters()
+        self.logger = getLogger(__name__)
+
+    async def open(self):
+        """Open transport
+        """
+        try:
+            await self.com.open()
+        except MacError as exc:
+            self.logger.error("Opening Mac failed: %s", exc)
+            raise TransportError(exc) from exc
+
+    async def close(self):
+        """Close transport
+        """
+        await self.com.close()
+
+    @property
+    def mac(self):
+        """MAC layer
+
+        :return: MAC layer used in the transport layer
+        :rtype: Asynchronous MAC
+        """
+        return self.com
+
+    async def write(self, data):
+        """Send MDFU command packet to client
+
+        :param data: MDFU packet
+        :type data: bytes
+        """
+        frame = SpiTransport.create_write_frame(data)
+        self.logger.debug("Sending write frame -> 0x%s", LazyHex(frame))
+        try:
+            response = await self.spi_transaction(frame)
+            self.logger.debug("Received response 0x%s", LazyHex(response))
+        except (MacError, OSError) as exc:
+            raise TransportError(exc) from exc
+
+    async def read(self, timeout=None):
+        """Receive a MDFU status packet
+
+        :param timeout: Timeout for the read operation in seconds, defaults to None
+        which uses the timeout set during class initialization
+        :type timeout: float, optional
+        :raises TransportError: Upon timeout, invalid frames or MAC error
+        :return: MDFU status packet
+        :rtype: bytes
+        """
+        timeout = timeout if timeout else self.timeout
+        try:
+            return await asyncio.wait_for(self._read_response(self.polling.start(timeout)), timeout)
+        except asyncio.TimeoutError as exc:
+            raise TransportError("Timeout while waiting for response from client.") from exc
+        except (MacError, OSError) as exc:
+            raise TransportError(exc) from exc
+
+    async def _read_response(self, poll):
+        """Poll for response length and read the response
+
+        :param poll: Poll schedule for the response
+        :type poll: ResponsePoll
+        :return: MDFU status packet
+        :rtype: bytes
+        """
+        frame = SpiTransport.create_read_frame(SpiTransport.RESPONSE_LENGTH_SIZE + SpiTransport.CHECKSUM_SIZE)
+        while True:
+            # Sleeping also gives other tasks on the event loop a chance to run between polls
+            await asyncio.sleep(poll.next_delay())
+            self.logger.debug("Sending read frame -> 0x%s", LazyHex(frame))
+            buf = await self.spi_transaction(frame)
+            data_size = SpiTransport.parse_response_length(buf)
+            if data_size is not None:
+                self.counters.response_start = time.perf_counter_ns()
+                self.logger.debug("Received status response <- 0x%s", LazyHex(buf))
+                break
+            self.logger.debug("Received no response from client")
+        poll.done()
+
+        dummy_read = SpiTransport.create_read_frame(data_size)
+        self.logger.debug("Sending read frame -> 0x%s", LazyHex(dummy_read))
+        frame = await self.spi_transaction(dummy_read)
+        self.logger.debug("Received frame <- 0x%s", LazyHex(frame))
+        return SpiTransport.parse_response(frame)
+
+    async def spi_transaction(self, data):
+        """Perform a SPI transaction
+
+        :param data: Data to send
+        :type data: bytes, bytearray
+        :raises MacError: When the response length does not match the request length
+        :return: Data returned from SPI client
+        :rtype: bytes, bytearray
+        """
+        await self.com.write(data)
+        response = await self.com.read(len(data))
+        if len(data) != len(response):
+            raise MacError(f"SPI transaction returned {len(response)} bytes but expected {len(data)}")
+        self.counters.tx_bytes += len(data)
+        self.counters.rx_bytes += len(response)
+        return response
+
+class AsyncI2cTransport(AsyncTransport):
+    """Asynchronous I2C transport layer
+
+    Uses the same frame encoding as I2cTransport and is intended for the
+    network packet MAC (AsyncMacSocketPacketClient).
+    """
+    def __init__(self, mac, timeout=5, polling_interval=0.001):
+        """ Class initialization
+
+        :param mac: Asynchronous packet based MAC layer
+        :type mac: AsyncMacSocketPacketClient
+        :param timeout: Communication timeout in seconds, defaults to 5
+        :type timeout: int, optional
+        :param polling_interval: Maximum time in seconds between polls for a client response,
+        defaults to 0.001
+        :type polling_interval: float, optional
+        """
+        self.timeout = timeout
+        self.com = mac
+        self.polling = PollingScheduler(max_interval=polling_interval)
+        self.counters = TransportCounters()
+        self.logger = getLogger(__name__)
+
+    async def open(self):
+        """Open transport
+        """
+        try:
+            await self.com.open()
+        except MacError as exc:
+            self.logger.error("Opening Mac failed: %s", exc)
+            raise TransportError(exc) from exc
+
+    async def close(self):
+        """Close transport
+        """
+        await self.com.close()
+
+    @property
+    def mac(self):
+        """MAC layer
+
+        :return: MAC layer used in the transport layer
+        :rtype: Asynchronous MAC
+        """
+        return self.com
+
+    async def write(self, data):
+        """Send MDFU command packet to client
+
+        :param data: MDFU packet
+        :type data: bytes
+        """
+        frame = I2cTransport.create_frame(data)
+        self.logger.debug("Sending frame -> 0x%s", LazyHex(frame))
+        try:
+            await self.com.write(frame)
+            self.counters.tx_bytes += len(frame)
+        except (MacError, OSError) as exc:
+            raise TransportError(exc) from exc
+        except MacI2cNackError as exc:
+            # A NACK on write is a recoverable error, see I2cTransport.write
+            self.logger.debug("I2C Transport: %s", exc)
+
+    async def read(self, timeout=None):
+        """Receive a MDFU status packet
+
+        :param timeout: Timeout for the read operation in seconds, defaults to None
+        which uses the timeout set during class initialization
+        :type timeout: float, optional
+        :raises TransportError: Upon timeout, invalid frames or MAC error
+        :return: MDFU status packet
+        :rtype: bytes
+        """
+        timeout = timeout if timeout else self.timeout
+        try:
+            return await asyncio.wait_for(self._read_response(self.polling.start(timeout)), timeout)
+        except asyncio.TimeoutError as exc:
+            raise TransportError("Timeout while waiting for response from client.") from exc
+        except (MacError, OSError) as exc:
+            raise TransportError(exc) from exc
+
+    async def _read_response(self, poll):
+        """Poll for response length and response frame
+
+        :param poll: Poll schedule for the response
+        :type poll: ResponsePoll
+        :return: MDFU status packet
+        :rtype: bytes
+        """
+        while True:
+            await asyncio.sleep(poll.next_delay())
+            try:
+                buf = await self.com.read(I2cTransport.RSP_LENGTH_FRAME_LENGTH)
+                self.counters.rx_bytes += len(buf)
+                size = I2cTransport.parse_response_length_frame(buf)
+                if size is not None:
+                    self.counters.response_start = time.perf_counter_ns()
+                    self.logger.debug("Received response length frame <- 0x%s", LazyHex(buf))
+                    break
+                self.logger.debug("Received client busy frame <- 0x%s", LazyHex(buf))
+            except MacI2cNackError:
+                pass # Continue polling when client NACKs
+        poll.done()
+        while True:
+            try:
+                frame = await self.com.read(size + I2cTransport.FRAME_TYPE_LENGTH)
+                self.counters.rx_bytes += len(frame)
+                packet = I2cTransport.parse_response_frame(frame, size)
+                if packet is not None:
+                    self.logger.debug("Received response <- 0x%s", LazyHex(frame))
+                    return packet
+                self.logger.debug("Received client busy frame <- 0x%s", LazyHex(frame))
+            except MacI2cNackError:
+                pass # Continue polling when client NACKs
+            await asyncio.sleep(poll.next_delay())
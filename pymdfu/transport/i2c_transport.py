@@ -1,10 +1,13 @@
 """I2C transport layer
 """
+import time
 from logging import getLogger
-from pymdfu.transport import Transport, TransportError
+from pymdfu.transport import Transport, TransportError, TransportCounters
+from pymdfu.transport.polling import PollingScheduler
 from pymdfu.timeout import Timer
 from pymdfu.mac.exceptions import MacError, MacI2cNackError
-from pymdfu.utils import calculate_checksum
+from pymdfu.mac.mac import write_vectored
+from pymdfu.utils import calculate_checksum, calculate_checksum_vectored, LazyHex
 
 class I2cTransport(Transport):
     """ Transport layer for I2C
@@ -15,16 +18,21 @@ class I2cTransport(Transport):
     FRAME_TYPE_LENGTH = 1
     RSP_LENGTH_FRAME_LENGTH = 5
 
-    def __init__(self, mac, timeout=5):
+    def __init__(self, mac, timeout=5, polling_interval=0.1):
         """ Class initialization
 
         :param mac: MAC layer for i2c bus access
         :type mac: Classes that implement the MAC layer interface
         :param timeout: Communication timeout in seconds, defaults to 5
         :type timeout: int, optional
+        :param polling_interval: Maximum time in seconds between polls for a client response,
+        defaults to 0.1
+        :type polling_interval: float, optional
         """
         self.timeout = timeout
         self.com = mac
+        self.counters = TransportCounters()
+        self.polling = PollingScheduler(max_interval=polling_interval)
         self.logger = getLogger(__name__)
 
     # Support 'with ... as ...' construct
@@ -35,17 +43,19 @@ class I2cTransport(Transport):
         if self.com:
             self.com.close()
 
-    def create_frame(self, packet):
+    @staticmethod
+    def create_frame(packet):
         """Create a transport frame
 
         :param packet: MDFU packet
         :type packet: Bytes
         :return: Transport frame
-        :rtype: Bytes
+        :rtype: bytearray
         """
-        check_sequence = calculate_checksum(packet)
-        check_sequence = check_sequence.to_bytes(2, byteorder="little")
-        frame = packet + check_sequence
+        # Encode the frame in place instead of concatenating its parts
+        frame = bytearray(len(packet) + 2)
+        frame[:-2] = packet
+        frame[-2:] = calculate_checksum(packet).to_bytes(2, byteorder="little")
         return frame
 
     def open(self):
@@ -71,16 +81,74 @@ class I2cTransport(Transport):
         """
         return self.com
 
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for this transport
+
+        :return: Transport class
+        :rtype: type
+        """
+        return type(self)
+
+    @classmethod
+    def frame_head(cls, packet):
+        """Encode a frame up to the frame check sequence
+
+        :param packet: MDFU packet
+        :type packet: Bytes like object
+        :return: Encoded frame head and offset of the packet sequence field in it
+        :rtype: tuple(bytes, int)
+        """
+        return bytes(packet), 0
+
+    @classmethod
+    def frame_tail(cls, check_sequence):
+        """Encode the end of a frame
+
+        :param check_sequence: Frame check sequence
+        :type check_sequence: bytes
+        :return: Frame check sequence
+        :rtype: bytes
+        """
+        return check_sequence
+
     def write(self, data):
         """Send MDFU command packet to client
 
+        The packet and the frame check sequence are passed to the MAC layer as
+        separate buffers instead of being joined into a frame.
+
         :param data: MDFU packet
         :type data: bytes
         """
-        frame = self.create_frame(data)
-        self.logger.debug("Sending frame -> 0x%s", frame.hex())
+        self.write_vectored((data,))
+
+    def write_vectored(self, buffers):
+        """Send MDFU command packet given as several buffers to client
+
+        :param buffers: MDFU packet split into buffers
+        :type buffers: Sequence of bytes like objects
+        """
+        self._write_buffers((*buffers, calculate_checksum_vectored(buffers).to_bytes(2, byteorder="little")))
+
+    def write_frame(self, frame):
+        """Send an encoded frame to client
+
+        :param frame: Transport frame
+        :type frame: Bytes like object
+        """
+        self._write_buffers((frame,))
+
+    def _write_buffers(self, buffers):
+        """Send a frame to client
+
+        :param buffers: Transport frame split into buffers
+        :type buffers: tuple(Bytes like object)
+        """
+        self.logger.debug("Sending frame -> 0x%s", LazyHex(buffers))
         try:
-            self.com.write(frame)
+            write_vectored(self.com, buffers)
+            self.counters.tx_bytes += sum(len(buffer) for buffer in buffers)
         except MacError as exc:
             raise TransportError(exc) from exc
         except MacI2cNackError as exc:
@@ -103,27 +171,22 @@ class I2cTransport(Transport):
         :return: MDFU status packet
         :rtype: bytes
         """
-        timer = Timer(timeout if timeout else self.timeout)
-        buf = None
+        timeout = timeout if timeout else self.timeout
+        timer = Timer(timeout)
+        poll = self.polling.start(timeout)
         # Poll for response length
         while True:
+            poll.wait(timer)
             try:
                 buf = self.com.read(self.RSP_LENGTH_FRAME_LENGTH)
                 if buf:
-                    if self.RSP_LENGTH_FRAME_LENGTH != len(buf):
-                        raise TransportError("Unexpected frame returned while polling for " +
-                            f"client response size. Got frame with length {len(buf)} but" +
-                            f"expected {self.RSP_LENGTH_FRAME_LENGTH}")
-                    if self.RSP_FRAME_TYPE_LENGTH[0] == buf[0]:
-                        self.logger.debug("Received response length frame <- 0x%s", buf.hex())
-                        size = int.from_bytes(buf[1:3], byteorder="little")
-                        checksum = int.from_bytes(buf[3:5], byteorder="little")
-                        calculated_checksum = calculate_checksum(buf[1:3])
-                        if checksum != calculated_checksum:
-                            raise TransportError("I2C transport checksum mismatch")
+                    self.counters.rx_bytes += len(buf)
+                    size = self.parse_response_length_frame(buf)
+                    if size is not None:
+                        self.counters.response_start = time.perf_counter_ns()
+                        self.logger.debug("Received response length frame <- 0x%s", LazyHex(buf))
                         break
-                    else:
-                        self.logger.debug("Received client busy frame <- 0x%s", buf.hex())
+                    self.logger.debug("Received client busy frame <- 0x%s", LazyHex(buf))
             except MacI2cNackError:
                 pass # Continue polling when client NACKs
             except MacError as exc:
@@ -131,39 +194,78 @@ class I2cTransport(Transport):
 
             if timer.expired():
                 raise TransportError("Timeout while waiting for response from client.")
+        poll.done()
 
-        # Poll for response
+        # Poll for response, the client has the response ready after reporting its length
+        # so the first poll is done immediately.
         while True:
             try:
-                frame_size = size + self.FRAME_TYPE_LENGTH
-                frame = self.com.read(frame_size)
-                if frame is not None and frame_size == len(frame):
-                    if self.RSP_FRAME_TYPE_RESPONSE[0] == frame[0]:
-                        self.logger.debug("Received response <- 0x%s", frame.hex())
-                        frame = frame[self.FRAME_TYPE_LENGTH:] # remove frame type code
-                        frame_checksum = int.from_bytes(frame[-2:], byteorder="little")
-                        packet = frame[:-2]
-
-                        calculated_checksum = calculate_checksum(packet)
-
-                        if frame_checksum != calculated_checksum:
-                            self.logger.error("I2C transport checksum mismatch")
-                            raise TransportError("I2C transport checksum mismatch")
-                        break
-                    else:
-                        self.logger.debug("Received client busy frame <- 0x%s", frame.hex())
-                else:
-                    if frame:
-                        raise TransportError("Unexpected response frame returned from client with frame size" +
-                            f"{len(frame)} (expected {frame_size}) and frame type {hex(frame[0])} " +
-                            f"(expected 0x{self.RSP_FRAME_TYPE_RESPONSE.hex()})")
-                    raise TransportError("No response frame returned from MAC layer")
+                frame = self.com.read(size + self.FRAME_TYPE_LENGTH)
+                if frame:
+                    self.counters.rx_bytes += len(frame)
+                packet = self.parse_response_frame(frame, size)
+                if packet is not None:
+                    self.logger.debug("Received response <- 0x%s", LazyHex(frame))
+                    break
+                self.logger.debug("Received client busy frame <- 0x%s", LazyHex(frame))
             except MacI2cNackError:
                 pass # Continue polling when client NACKs
             except MacError as exc:
                 raise TransportError(exc) from exc
             if timer.expired():
                 raise TransportError("Timeout while waiting for response from client.")
+            poll.wait(timer)
+        return packet
+
+    @classmethod
+    def parse_response_length_frame(cls, buf):
+        """Parse a response length frame
+
+        :param buf: Frame received from the client
+        :type buf: Bytes like object
+        :raises TransportError: For an unexpected frame length or a checksum mismatch
+        :return: Response size or None if the client is busy
+        :rtype: int or None
+        """
+        if cls.RSP_LENGTH_FRAME_LENGTH != len(buf):
+            raise TransportError("Unexpected frame returned while polling for " +
+                f"client response size. Got frame with length {len(buf)} but" +
+                f"expected {cls.RSP_LENGTH_FRAME_LENGTH}")
+        if cls.RSP_FRAME_TYPE_LENGTH[0] != buf[0]:
+            return None
+        size = int.from_bytes(buf[1:3], byteorder="little")
+        checksum = int.from_bytes(buf[3:5], byteorder="little")
+        if checksum != calculate_checksum(buf[1:3]):
+            raise TransportError("I2C transport checksum mismatch")
+        return size
+
+    @classmethod
+    def parse_response_frame(cls, frame, size):
+        """Parse a response frame
+
+        :param frame: Frame received from the client
+        :type frame: Bytes like object
+        :param size: Response size from the response length frame
+        :type size: int
+        :raises TransportError: For an unexpected frame or a checksum mismatch
+        :return: MDFU packet or None if the client is busy
+        :rtype: Bytes like object or None
+        """
+        frame_size = size + cls.FRAME_TYPE_LENGTH
+        if frame is None or frame_size != len(frame):
+            if frame:
+                raise TransportError("Unexpected response frame returned from client with frame size" +
+                    f"{len(frame)} (expected {frame_size}) and frame type {hex(frame[0])} " +
+                    f"(expected 0x{cls.RSP_FRAME_TYPE_RESPONSE.hex()})")
+            raise TransportError("No response frame returned from MAC layer")
+        if cls.RSP_FRAME_TYPE_RESPONSE[0] != frame[0]:
+            return None
+        frame = frame[cls.FRAME_TYPE_LENGTH:] # remove frame type code
+        frame_checksum = int.from_bytes(frame[-2:], byteorder="little")
+        packet = frame[:-2]
+        if frame_checksum != calculate_checksum(packet):
+            getLogger(__name__).error("I2C transport checksum mismatch")
+            raise TransportError("I2C transport checksum mismatch")
         return packet
 
 class I2cTransportClient(Transport):
@@ -262,10 +364,10 @@ class I2cTransportClient(Transport):
         # 2) Response frame
         # so we issue two writes here
         frame = self.create_response_length_frame(len(data))
-        self.logger.debug("Sending response length frame -> 0x%s", frame.hex())
+        self.logger.debug("Sending response length frame -> 0x%s", LazyHex(frame))
         self.com.write(frame)
         frame = self.create_response_frame(data)
-        self.logger.debug("Sending response frame -> 0x%s", frame.hex())
+        self.logger.debug("Sending response frame -> 0x%s", LazyHex(frame))
         self.com.write(frame)
 
     def read(self, timeout=None):
@@ -0,0 +1,136 @@
+"""Adaptive response polling for transports where the host polls the client
+"""
+import time
+from ..timeout import Timer, sleep_until
+
+class PollingScheduler():
+    """Schedule response polls based on past response times
+
+    The first poll for a response is delayed to shortly before the response is
+    expected, based on the average response time of previous commands with the
+    same timeout, and limited to a fraction of the command timeout. Polls that
+    find no response are first repeated immediately, since a poll transaction
+    takes some bus time itself, and then followed by polls with exponentially
+    increasing intervals up to a maximum interval.
+
+    Response times are tracked per command timeout, since the host passes the
+    client's command specific timeout to the transport for every read.
+    """
+    def __init__(self, min_interval=0.0001, max_interval=0.1, backoff=2.0, margin=0.8, weight=0.25,
+                 immediate_polls=2):
+        """Class initialization
+
+        :param min_interval: Interval in seconds after the immediate polls, defaults to 0.0001
+        :type min_interval: float, optional
+        :param max_interval: Maximum interval in seconds between polls, defaults to 0.1
+        :type max_interval: float, optional
+        :param backoff: Factor the interval grows with after each poll without response,
+        defaults to 2.0
+        :type backoff: float, optional
+        :param margin: Fraction of the expected response time to wait before the first poll,
+        defaults to 0.8
+        :type margin: float, optional
+        :param weight: Weight of the last response time in the response time average,
+        defaults to 0.25
+        :type weight: float, optional
+        :param immediate_polls: Number of polls without delay after the first poll without
+        response, defaults to 2
+        :type immediate_polls: int, optional
+        """
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.margin = margin
+        self.weight = weight
+        self.immediate_polls = immediate_polls
+        # Command timeout -> average response time in seconds
+        self.response_times = {}
+
+    def start(self, timeout):
+        """Start polling for a response
+
+        :param timeout: Command timeout in seconds
+        :type timeout: float
+        :return: Poll schedule for the response
+        :rtype: ResponsePoll
+        """
+        first_delay = min(self.margin * self.response_times.get(timeout, 0.0), timeout / 2)
+        # Sleeping shorter than the minimum interval costs more than polling right away
+        if first_delay < self.min_interval:
+            first_delay = 0.0
+        return ResponsePoll(self, timeout, first_delay)
+
+    def record(self, timeout, response_time):
+        """Add a response time to the response time average
+
+        :param timeout: Command timeout in seconds
+        :type timeout: float
+        :param response_time: Time in seconds until the response was received
+        :type response_time: float
+        """
+        try:
+            average = self.response_times[timeout]
+            self.response_times[timeout] = average + self.weight * (response_time - average)
+        except KeyError:
+            self.response_times[timeout] = response_time
+
+class ResponsePoll():
+    """Poll schedule for a single response"""
+    def __init__(self, scheduler, timeout, first_delay):
+        """Class initialization
+
+        :param scheduler: Scheduler that created the poll
+        :type scheduler: PollingScheduler
+        :param timeout: Command timeout in seconds
+        :type timeout: float
+        :param first_delay: Delay in seconds before the first poll
+        :type first_delay: float
+        """
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.start_time = time.perf_counter()
+        self.delay = first_delay
+        self.interval = scheduler.min_interval
+        self.polls = 0
+        # Time of the last poll that found no response
+        self.last_miss = self.start_time
+
+    def next_delay(self):
+        """Get the delay before the next poll
+
+        :return: Delay in seconds
+        :rtype: float
+        """
+        delay = self.delay
+        if self.polls:
+            self.last_miss = time.perf_counter()
+        self.polls += 1
+        if self.polls <= self.scheduler.immediate_polls:
+            self.delay = 0.0
+        else:
+            self.delay = self.interval
+            self.interval = min(self.interval * self.scheduler.backoff, self.scheduler.max_interval)
+        return delay
+
+    def wait(self, timer=None):
+        """Block until the next poll is due
+
+        :param timer: Read timeout timer, the wait ends at the latest when it expires
+        :type timer: Timer, optional
+        """
+        delay = self.next_delay()
+        if delay > 0:
+            deadline = Timer(delay).deadline
+            if timer is not None:
+                deadline = min(deadline, timer.deadline)
+            sleep_until(deadline)
+
+    def done(self):
+        """Record the response time after the response was received
+
+        The response became available between the last poll without response and
+        the successful poll. The midpoint is recorded so that polls which
+        overshoot the response time lower the estimate for the next response.
+        """
+        now = time.perf_counter()
+        self.scheduler.record(self.timeout, (self.last_miss + now) / 2 - self.start_time)
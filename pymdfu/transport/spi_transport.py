@@ -1,10 +1,13 @@
 """SPI transport layer
 """
+import time
 from logging import getLogger
-from pymdfu.transport import Transport, TransportError
+from pymdfu.transport import Transport, TransportError, TransportCounters
+from pymdfu.transport.polling import PollingScheduler
 from pymdfu.timeout import Timer
 from pymdfu.mac.exceptions import MacError
-from pymdfu.utils import calculate_checksum
+from pymdfu.mac.mac import write_vectored
+from pymdfu.utils import calculate_checksum, calculate_checksum_vectored, LazyHex
 
 class SpiTransport(Transport):
     """Transport implementation for SPI
@@ -14,6 +17,7 @@ class SpiTransport(Transport):
     CLIENT_RSP_PREFIX_START = 1
     CLIENT_RESP_PREFIX_SIZE = 4
     FRAME_TYPE_CMD = 0x11
+    FRAME_TYPE_CMD_BYTES = bytes([FRAME_TYPE_CMD])
     FRAME_TYPE_RSP_RETRIEVAL = 0x55
     CHECKSUM_SIZE = 2
     CHECKSUM_START = 6
@@ -24,10 +28,24 @@ class SpiTransport(Transport):
     """ Transport layer for SPI
     """
     def __init__(self, mac, timeout=5, polling_interval=0.1):
+        """ Class initialization
+
+        :param mac: MAC layer for SPI bus access
+        :type mac: Classes that implement the MAC layer interface
+        :param timeout: Communication timeout in seconds, defaults to 5
+        :type timeout: int, optional
+        :param polling_interval: Maximum time in seconds between polls for a client response,
+        defaults to 0.1
+        :type polling_interval: float, optional
+        """
         self.com = mac
         self.timeout = timeout
         self.polling_interval = polling_interval
+        self.polling = PollingScheduler(max_interval=polling_interval)
+        self.counters = TransportCounters()
         self.logger = getLogger(__name__)
+        # Receive buffer for response length polls, reused for every poll
+        self._poll_buf = bytearray(len(self.create_read_frame(self.RESPONSE_LENGTH_SIZE + self.CHECKSUM_SIZE)))
 
     def open(self):
         """Open transport
@@ -52,17 +70,75 @@ class SpiTransport(Transport):
         """
         return self.com
 
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for this transport
+
+        :return: Transport class
+        :rtype: type
+        """
+        return type(self)
+
+    @classmethod
+    def frame_head(cls, packet):
+        """Encode a write frame up to the frame check sequence
+
+        :param packet: MDFU packet
+        :type packet: Bytes like object
+        :return: Encoded frame head and offset of the packet sequence field in it
+        :rtype: tuple(bytes, int)
+        """
+        return bytes([cls.FRAME_TYPE_CMD]) + packet, 1
+
+    @classmethod
+    def frame_tail(cls, check_sequence):
+        """Encode the end of a write frame
+
+        :param check_sequence: Frame check sequence
+        :type check_sequence: bytes
+        :return: Frame check sequence
+        :rtype: bytes
+        """
+        return check_sequence
+
     def write(self, data):
         """Send MDFU command packet to client
 
+        The frame type, the packet and the frame check sequence are passed to the
+        MAC layer as separate buffers instead of being joined into a frame.
+
         :param data: MDFU packet
         :type data: bytes
         """
-        frame = self.create_write_frame(data)
-        self.logger.debug("Sending write frame -> 0x%s", frame.hex())
+        self.write_vectored((data,))
+
+    def write_vectored(self, buffers):
+        """Send MDFU command packet given as several buffers to client
+
+        :param buffers: MDFU packet split into buffers
+        :type buffers: Sequence of bytes like objects
+        """
+        check_sequence = calculate_checksum_vectored(buffers).to_bytes(self.CHECKSUM_SIZE, byteorder="little")
+        self._write_buffers((self.FRAME_TYPE_CMD_BYTES, *buffers, check_sequence))
+
+    def write_frame(self, frame):
+        """Send an encoded write frame to client
+
+        :param frame: Transport frame
+        :type frame: Bytes like object
+        """
+        self._write_buffers((frame,))
+
+    def _write_buffers(self, buffers):
+        """Send a write frame to client
+
+        :param buffers: Transport frame split into buffers
+        :type buffers: tuple(Bytes like object)
+        """
+        self.logger.debug("Sending write frame -> 0x%s", LazyHex(buffers))
         try:
-            response = self.spi_transaction(frame)
-            self.logger.debug("Received response 0x%s", response.hex())
+            response = self._spi_transaction(buffers)
+            self.logger.debug("Received response 0x%s", LazyHex(response))
         except MacError as exc:
             raise TransportError(exc) from exc
 
@@ -75,25 +151,20 @@ class SpiTransport(Transport):
         :return: MDFU status packet
         :rtype: bytes
         """
-        timer = Timer(timeout if timeout else self.timeout)
+        timeout = timeout if timeout else self.timeout
+        timer = Timer(timeout)
+        poll = self.polling.start(timeout)
+        frame = self.create_read_frame(self.RESPONSE_LENGTH_SIZE + self.CHECKSUM_SIZE)
 
         while True:
+            poll.wait(timer)
             try:
-                frame = self.create_read_frame(self.RESPONSE_LENGTH_SIZE + self.CHECKSUM_SIZE)
-                self.logger.debug("Sending read frame -> 0x%s", frame.hex())
-                buf = self.spi_transaction(frame)
-
-                if buf[self.CLIENT_RSP_PREFIX_START:self.CLIENT_RESP_PREFIX_SIZE] == self.CLIENT_RSP_LEN_PREFIX:
-                    self.logger.debug("Received status response <- 0x%s", buf.hex())
-                    data_size = int.from_bytes(buf[self.CLIENT_RESP_PREFIX_SIZE:self.CLIENT_RESP_PREFIX_SIZE +
-                                                   self.RESPONSE_LENGTH_SIZE], byteorder="little")
-                    checksum = int.from_bytes(buf[self.CHECKSUM_START:self.CHECKSUM_START + self.CHECKSUM_SIZE],
-                                              byteorder="little")
-                    calculated_checksum = calculate_checksum(
-                        buf[self.CLIENT_RESP_PREFIX_SIZE:self.CLIENT_RESP_PREFIX_SIZE + self.CHECKSUM_SIZE])
-                    if checksum != calculated_checksum:
-                        self.logger.error("SPI transport checksum mismatch")
-                        raise TransportError("SPI transport checksum mismatch")
+                self.logger.debug("Sending read frame -> 0x%s", LazyHex(frame))
+                buf = self.spi_transaction(frame, self._poll_buf)
+                data_size = self.parse_response_length(buf)
+                if data_size is not None:
+                    self.counters.response_start = time.perf_counter_ns()
+                    self.logger.debug("Received status response <- 0x%s", LazyHex(buf))
                     break
                 self.logger.debug("Received no response from client")
             except MacError as exc:
@@ -101,53 +172,115 @@ class SpiTransport(Transport):
 
             if timer.expired():
                 raise TransportError("Timeout while waiting for response from client.")
+        poll.done()
 
         try:
             dummy_read = self.create_read_frame(data_size)
-            self.logger.debug("Sending read frame -> 0x%s", dummy_read.hex())
+            self.logger.debug("Sending read frame -> 0x%s", LazyHex(dummy_read))
             frame = self.spi_transaction(dummy_read)
-            self.logger.debug("Received frame <- 0x%s", frame.hex())
-            frame_checksum = int.from_bytes(frame[-self.CHECKSUM_SIZE:], byteorder="little")
-            packet = frame[self.CLIENT_RESP_PREFIX_SIZE:-self.CHECKSUM_SIZE]
-            if frame[self.CLIENT_RSP_PREFIX_START:self.CLIENT_RESP_PREFIX_SIZE] != self.CLIENT_RSP_PREFIX:
-                raise TransportError("Received no response from client")
-
-            calculated_checksum = calculate_checksum(packet)
-            if frame_checksum != calculated_checksum:
-                self.logger.error("SPI transport checksum mismatch")
-                raise TransportError("SPI transport checksum mismatch")
+            self.logger.debug("Received frame <- 0x%s", LazyHex(frame))
+            packet = self.parse_response(frame)
         except MacError as exc:
             raise TransportError(exc) from exc
         return packet
 
-    def spi_transaction(self, data):
+    @classmethod
+    def parse_response_length(cls, buf):
+        """Parse the client reply to a response length read frame
+
+        :param buf: Data returned from the client
+        :type buf: Bytes like object
+        :raises TransportError: For a checksum mismatch
+        :return: Response size or None if the client has no response ready
+        :rtype: int or None
+        """
+        if buf[cls.CLIENT_RSP_PREFIX_START:cls.CLIENT_RESP_PREFIX_SIZE] != cls.CLIENT_RSP_LEN_PREFIX:
+            return None
+        data_size = int.from_bytes(buf[cls.CLIENT_RESP_PREFIX_SIZE:cls.CLIENT_RESP_PREFIX_SIZE +
+                                       cls.RESPONSE_LENGTH_SIZE], byteorder="little")
+        checksum = int.from_bytes(buf[cls.CHECKSUM_START:cls.CHECKSUM_START + cls.CHECKSUM_SIZE],
+                                  byteorder="little")
+        calculated_checksum = calculate_checksum(
+            buf[cls.CLIENT_RESP_PREFIX_SIZE:cls.CLIENT_RESP_PREFIX_SIZE + cls.CHECKSUM_SIZE])
+        if checksum != calculated_checksum:
+            getLogger(__name__).error("SPI transport checksum mismatch")
+            raise TransportError("SPI transport checksum mismatch")
+        return data_size
+
+    @classmethod
+    def parse_response(cls, frame):
+        """Parse the client reply to a response read frame
+
+        :param frame: Data returned from the client
+        :type frame: Bytes like object
+        :raises TransportError: When the frame contains no response or for a checksum mismatch
+        :return: MDFU packet
+        :rtype: Bytes like object
+        """
+        frame_checksum = int.from_bytes(frame[-cls.CHECKSUM_SIZE:], byteorder="little")
+        packet = frame[cls.CLIENT_RESP_PREFIX_SIZE:-cls.CHECKSUM_SIZE]
+        if frame[cls.CLIENT_RSP_PREFIX_START:cls.CLIENT_RESP_PREFIX_SIZE] != cls.CLIENT_RSP_PREFIX:
+            raise TransportError("Received no response from client")
+        if frame_checksum != calculate_checksum(packet):
+            getLogger(__name__).error("SPI transport checksum mismatch")
+            raise TransportError("SPI transport checksum mismatch")
+        return packet
+
+    def spi_transaction(self, data, buf=None):
         """Perform a SPI transaction
 
         :param data: Data to send
         :type data: bytes, bytearray
+        :param buf: Buffer of the same size as data that receives the data returned
+        from the SPI client if the MAC layer supports readinto, defaults to None
+        :type buf: bytearray, optional
         :return: Data returned from SPI client
         :rtype: bytes, bytearray
         """
-        self.com.write(data)
-        response = self.com.read(len(data))
-        assert(len(data) == len(response))
+        return self._spi_transaction((data,), buf)
+
+    def _spi_transaction(self, buffers, buf=None):
+        """Perform a SPI transaction with data from several buffers
+
+        :param buffers: Data to send
+        :type buffers: tuple(Bytes like object)
+        :param buf: Buffer that receives the data returned from the SPI client if
+        the MAC layer supports readinto, defaults to None
+        :type buf: bytearray, optional
+        :return: Data returned from SPI client
+        :rtype: bytes, bytearray
+        """
+        size = sum(len(buffer) for buffer in buffers)
+        write_vectored(self.com, buffers)
+        if buf is not None and hasattr(self.com, "readinto"):
+            received = self.com.readinto(buf)
+            response = buf
+        else:
+            response = self.com.read(size)
+            received = len(response)
+        assert(size == received)
+        self.counters.tx_bytes += size
+        self.counters.rx_bytes += received
         return response
 
-    def create_write_frame(self, packet):
+    @classmethod
+    def create_write_frame(cls, packet):
         """Create a transport write frame
 
         :param packet: MDFU packet
         :type packet: bytes, bytearray
         :return: Transport frame
-        :rtype: bytes
+        :rtype: bytearray
         """
-        check_sequence = calculate_checksum(packet)
-        check_sequence = check_sequence.to_bytes(self.CHECKSUM_SIZE, byteorder="little")
-
-        frame = bytes([self.FRAME_TYPE_CMD]) + packet + check_sequence
+        # Encode the frame in place instead of concatenating its parts
+        frame = bytearray(1 + len(packet) + cls.CHECKSUM_SIZE)
+        frame[0] = cls.FRAME_TYPE_CMD
+        frame[1:-cls.CHECKSUM_SIZE] = packet
+        frame[-cls.CHECKSUM_SIZE:] = calculate_checksum(packet).to_bytes(cls.CHECKSUM_SIZE, byteorder="little")
         return frame
 
-    def create_read_frame(self, data_size):
+    @classmethod
+    def create_read_frame(cls, data_size):
         """Create a transport read frame
 
         :param data_size: Length of the data to be read
@@ -157,7 +290,7 @@ class SpiTransport(Transport):
         """
         # Read command and three dummy bytes to get the four bytes "MDFU" prefix back,
         # then shift data_size dummy bytes to get response.
-        frame = bytes([self.FRAME_TYPE_RSP_RETRIEVAL, 0, 0, 0]) + bytes(data_size )
+        frame = bytes([cls.FRAME_TYPE_RSP_RETRIEVAL, 0, 0, 0]) + bytes(data_size )
         return frame
 
 class SpiTransportClient(Transport):
@@ -217,7 +350,7 @@ class SpiTransportClient(Transport):
         frame = bytes(1) + self.CLIENT_RSP_LEN_PREFIX + length + checksum
 
         cmd = self.com.read()
-        self.logger.debug("Client received frame <- 0x%s", cmd.hex())
+        self.logger.debug("Client received frame <- 0x%s", LazyHex(cmd))
 
         # If transaction length is not what we expect just return the requested length with zero bytes
         # and raise an error later.
@@ -227,7 +360,7 @@ class SpiTransportClient(Transport):
         else:
             self.com.write(frame)
 
-        self.logger.debug("Client sent frame -> 0x%s", frame.hex())
+        self.logger.debug("Client sent frame -> 0x%s", LazyHex(frame))
 
         # TODO according to the spec, if a command was received instead of response retrieval
         # we would need to store this frame here, abort, and later provide the frame to the client through the
@@ -243,8 +376,8 @@ class SpiTransportClient(Transport):
         frame = bytes(1) + self.CLIENT_RSP_PREFIX + data + check_sequence
         cmd = self.com.read()
         self.com.write(frame)
-        self.logger.debug("Client sent frame -> 0x%s", frame.hex())
-        self.logger.debug("Client received frame <- 0x%s", cmd.hex())
+        self.logger.debug("Client sent frame -> 0x%s", LazyHex(frame))
+        self.logger.debug("Client received frame <- 0x%s", LazyHex(cmd))
 
         if cmd[0] != self.FRAME_TYPE_RSP_RETRIEVAL:
             raise TransportError(f"Expected read transaction but got {cmd[0]}")
@@ -267,8 +400,8 @@ class SpiTransportClient(Transport):
                 if frame and len(frame) > 0:
                     response = bytearray(len(frame))
                     self.com.write(response) # send back dummy bytes
-                    self.logger.debug("Client received frame <- 0x%s", frame.hex())
-                    self.logger.debug("Client sent frame -> 0x%s", response.hex())
+                    self.logger.debug("Client received frame <- 0x%s", LazyHex(frame))
+                    self.logger.debug("Client sent frame -> 0x%s", LazyHex(response))
                     if len(frame) < (self.MIN_SPI_FRAME_SIZE):
                         raise TransportError("SPI frame is too small. Should contain at least 5 bytes.")
                     if frame[0] == self.FRAME_TYPE_CMD:
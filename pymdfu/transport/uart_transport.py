@@ -1,10 +1,11 @@
 """UART transport layer
 """
+import time
 from logging import getLogger
-from pymdfu.transport import Transport, TransportError
+from pymdfu.transport import Transport, TransportError, TransportCounters
 from pymdfu.timeout import Timer
 from pymdfu.mac.exceptions import MacError
-from pymdfu.utils import calculate_checksum
+from pymdfu.utils import calculate_checksum, calculate_checksum_vectored, LazyHex
 
 FRAME_START_CODE = 0x56
 FRAME_END_CODE = 0x9E
@@ -12,6 +13,15 @@ ESCAPE_SEQ_CODE = 0xCC
 FRAME_START_ESC_SEQ = bytes([ESCAPE_SEQ_CODE, ~FRAME_START_CODE & 0xff])
 FRAME_END_ESC_SEQ = bytes([ESCAPE_SEQ_CODE, ~FRAME_END_CODE & 0xff])
 ESCAPE_SEQ_ESC_SEQ = bytes([ESCAPE_SEQ_CODE, ~ESCAPE_SEQ_CODE & 0xff])
+FRAME_START_CODE_BYTES = bytes([FRAME_START_CODE])
+FRAME_END_CODE_BYTES = bytes([FRAME_END_CODE])
+ESCAPE_SEQ_CODE_BYTES = bytes([ESCAPE_SEQ_CODE])
+# Lookup table for the byte following an escape code -> decoded byte
+ESCAPE_SEQ_DECODING = {
+    ~FRAME_START_CODE & 0xff: FRAME_START_CODE,
+    ~FRAME_END_CODE & 0xff: FRAME_END_CODE,
+    ~ESCAPE_SEQ_CODE & 0xff: ESCAPE_SEQ_CODE
+}
 
 class Frame():
     """UART transport frame
@@ -39,25 +49,26 @@ class Frame():
         :return: Decoded payload
         :rtype: bytearray
         """
-        decoded_data = bytearray()
-        escape_code = False
-        for byte in data:
-            if not escape_code:
-                if byte == ESCAPE_SEQ_CODE:
-                    escape_code = True
-                else:
-                    decoded_data.append(byte)
+        # Each part after the first one starts with the escaped byte of an escape sequence
+        parts = bytes(data).split(ESCAPE_SEQ_CODE_BYTES)
+        decoded_data = bytearray(parts[0])
+        last = len(parts) - 1
+        for i in range(1, len(parts)):
+            part = parts[i]
+            if not part:
+                # An escape code at the end of the payload is ignored
+                if i == last:
+                    break
+                # Two consecutive escape codes
+                byte = ESCAPE_SEQ_CODE
             else:
-                if byte == (~FRAME_START_CODE & 0xFF):
-                    decoded_data.append(FRAME_START_CODE)
-                elif byte == (~FRAME_END_CODE & 0xFF):
-                    decoded_data.append(FRAME_END_CODE)
-                elif byte == (~ESCAPE_SEQ_CODE & 0xFF):
-                    decoded_data.append(ESCAPE_SEQ_CODE)
-                else:
-                    raise ValueError(f"Decoding of escape sequence failed: "
-                            f"Got unkown escape sequence 0x{ESCAPE_SEQ_CODE:02x}{byte:02x}")
-                escape_code = False
+                byte = part[0]
+            try:
+                decoded_data.append(ESCAPE_SEQ_DECODING[byte])
+            except KeyError as exc:
+                raise ValueError(f"Decoding of escape sequence failed: "
+                        f"Got unkown escape sequence 0x{ESCAPE_SEQ_CODE:02x}{byte:02x}") from exc
+            decoded_data += memoryview(part)[1:]
         return decoded_data
 
     @staticmethod
@@ -71,17 +82,10 @@ class Frame():
         :return: Encoded frame payload
         :rtype: bytearray
         """
-        encoded_data = bytearray()
-        for byte in data:
-            if byte == FRAME_START_CODE:
-                encoded_data += FRAME_START_ESC_SEQ
-            elif byte == FRAME_END_CODE:
-                encoded_data += FRAME_END_ESC_SEQ
-            elif byte == ESCAPE_SEQ_CODE:
-                encoded_data += ESCAPE_SEQ_ESC_SEQ
-            else:
-                encoded_data.append(byte)
-        return encoded_data
+        # The escape code must be replaced first since the other escape sequences contain it
+        encoded_data = bytearray(data).replace(ESCAPE_SEQ_CODE_BYTES, ESCAPE_SEQ_ESC_SEQ)
+        encoded_data = encoded_data.replace(FRAME_START_CODE_BYTES, FRAME_START_ESC_SEQ)
+        return encoded_data.replace(FRAME_END_CODE_BYTES, FRAME_END_ESC_SEQ)
 
     def to_bytes(self):
         """Convert frame into bytes
@@ -91,7 +95,7 @@ class Frame():
         """
         check_sequence = calculate_checksum(self.packet).to_bytes(2, byteorder="little")
         frame_payload = self.encode_payload(self.packet + check_sequence)
-        frame = bytes([FRAME_START_CODE]) + frame_payload + bytes([FRAME_END_CODE])
+        frame = FRAME_START_CODE_BYTES + frame_payload + FRAME_END_CODE_BYTES
         return frame
 
     @classmethod
@@ -130,10 +134,13 @@ class UartTransport(Transport):
         """
         self.timeout = timeout
         self.com = mac
+        # Received data that was not yet consumed by a frame
+        self.rx_buf = bytearray()
+        self.counters = TransportCounters()
         self.logger = getLogger(__name__)
 
     def __del__(self):
-        if self.com:
+        if self.com is not None:
             self.com.close()
 
     # Support 'with ... as ...' construct
@@ -141,12 +148,13 @@ class UartTransport(Transport):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if self.com:
+        if self.com is not None:
             self.com.close()
 
     def open(self):
         """Open transport
         """
+        self.rx_buf.clear()
         try:
             self.com.open()
         except MacError as exc:
@@ -167,16 +175,70 @@ class UartTransport(Transport):
         """
         return self.com
 
+    @property
+    def frame_encoder(self):
+        """Transport class that encodes frame templates for this transport
+
+        :return: Transport class
+        :rtype: type
+        """
+        return type(self)
+
+    @classmethod
+    def frame_head(cls, packet):
+        """Encode a frame up to the frame check sequence
+
+        The sequence field of a packet without sync flag is never escaped so it
+        can be replaced in the encoded frame.
+
+        :param packet: MDFU packet
+        :type packet: Bytes like object
+        :return: Encoded frame head and offset of the packet sequence field in it
+        :rtype: tuple(bytes, int)
+        """
+        return FRAME_START_CODE_BYTES + Frame.encode_payload(packet), len(FRAME_START_CODE_BYTES)
+
+    @classmethod
+    def frame_tail(cls, check_sequence):
+        """Encode the end of a frame
+
+        :param check_sequence: Frame check sequence
+        :type check_sequence: bytes
+        :return: Encoded frame check sequence and frame end code
+        :rtype: bytes
+        """
+        return Frame.encode_payload(check_sequence) + FRAME_END_CODE_BYTES
+
     def write(self, data):
         """Send MDFU command packet to client
 
         :param data: MDFU packet
         :type data: bytes
         """
-        frame = Frame(data)
-        frame_bytes = frame.to_bytes()
-        self.logger.debug("Sending frame -> %s", frame_bytes.hex())
-        self.com.write(frame_bytes)
+        self.write_frame(Frame(data).to_bytes())
+
+    def write_vectored(self, buffers):
+        """Send MDFU command packet given as several buffers to client
+
+        The buffers are joined only once, together with the frame check sequence,
+        when the frame payload is encoded.
+
+        :param buffers: MDFU packet split into buffers
+        :type buffers: Sequence of bytes like objects
+        """
+        check_sequence = calculate_checksum_vectored(buffers).to_bytes(2, byteorder="little")
+        frame_payload = Frame.encode_payload(b"".join((*buffers, check_sequence)))
+        self.write_frame(FRAME_START_CODE_BYTES + frame_payload + FRAME_END_CODE_BYTES)
+
+    def write_frame(self, frame):
+        """Send an encoded frame to client
+
+        :param frame: Transport frame
+        :type frame: Bytes like object
+        """
+        self.logger.debug("Sending frame -> %s", LazyHex(frame))
+        self.com.write(frame)
+        self.counters.tx_bytes += len(frame)
 
     def read(self, timeout=None):
         """Receive a MDFU status packet
@@ -190,6 +252,7 @@ class UartTransport(Transport):
         try:
             # Discard everything until we get the start code
             self.read_until([FRAME_START_CODE], timer)
+            self.counters.response_start = time.perf_counter_ns()
         except TimeoutError:
             msg = "Timeout while waiting for frame start code."
             self.logger.debug(msg)
@@ -203,7 +266,7 @@ class UartTransport(Transport):
             self.logger.debug(msg)
             raise TransportError(msg) from TimeoutError
 
-        self.logger.debug("Received a frame <- 0x%s", frame.hex())
+        self.logger.debug("Received a frame <- 0x%s", LazyHex(frame))
         try:
             frame = Frame.from_bytes(frame)
         except ValueError as exc:
@@ -215,7 +278,8 @@ class UartTransport(Transport):
         """Read from interface until pattern is detected
 
         Reads data until the provided pattern is detected. All data, including the
-        pattern will be returned.
+        pattern will be returned. Data received after the pattern is kept in the
+        receive buffer for the next read.
 
         :param pattern: Pattern to detect
         :type pattern: Bytes like object
@@ -225,20 +289,34 @@ class UartTransport(Transport):
         :return: Data read including the pattern
         :rtype: bytearray
         """
-        pattern_detected = False
-        data = bytearray()
-        while not pattern_detected and not timer.expired():
-            for i, pattern_piece in enumerate(pattern):
-                buf = self.com.read(1)
-                if len(buf) == 0:
-                    # Either no data available yet or timeout in MAC layer, let's try again
-                    continue
-                data.append(buf[0])
-                if buf[0] != pattern_piece:
-                    break
-                if i == (len(pattern) - 1):
-                    pattern_detected = True
-
-        if timer.expired():
-            raise TimeoutError("Timeout while waiting for frame start/end pattern")
-        return data
+        pattern = bytes(pattern)
+        search_start = 0
+        while True:
+            index = self.rx_buf.find(pattern, search_start)
+            if index >= 0:
+                end = index + len(pattern)
+                data = self.rx_buf[:end]
+                del self.rx_buf[:end]
+                return data
+            # Continue searching where a pattern could start that was not fully received yet
+            search_start = max(0, len(self.rx_buf) - len(pattern) + 1)
+            if timer.expired():
+                raise TimeoutError("Timeout while waiting for frame start/end pattern")
+            self._receive()
+
+    def _receive(self):
+        """Receive data from MAC layer into the receive buffer
+
+        Reads all data the MAC layer has available. If the MAC layer does not report
+        the number of available bytes, or none are available, a single byte is read
+        which blocks up to the MAC layer timeout.
+        """
+        try:
+            available = len(self.com)
+        except TypeError:
+            # MAC does not provide the number of available bytes
+            available = 0
+        data = self.com.read(available if available > 0 else 1)
+        if data:
+            self.rx_buf += data
+            self.counters.rx_bytes += len(data)
@@ -1,4 +1,6 @@
 """Utilities"""
+import sys
+from array import array
 from enum import Enum
 
 def si_postfix_unit_to_int(si_unit):
@@ -50,8 +52,32 @@ class EnumDescription(int, Enum):
         """Enum description property"""
         return self._description_
 
-def calculate_checksum(data):
-    """Calculate checksum
+class LazyHex():
+    """Hex representation of binary data for log messages
+
+    The hex string is only created when the log message is formatted, so passing
+    a LazyHex to a disabled log level does not convert the data.
+
+    Example:
+        logger.debug("Sending frame -> 0x%s", LazyHex(frame))
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        """Class initialization
+
+        :param data: Binary data, the buffers of a tuple or list are concatenated
+        :type data: Bytes like object, tuple or list
+        """
+        self.data = data
+
+    def __str__(self):
+        if isinstance(self.data, (tuple, list)):
+            return "".join(buffer.hex() for buffer in self.data)
+        return self.data.hex()
+
+def calculate_checksum_reference(data):
+    """Calculate checksum (reference implementation)
 
     The checksum is a two's complement addition (integer addition)
     of 16-bit values in little-endian byte order. If the data is an
@@ -59,6 +85,9 @@ def calculate_checksum(data):
     calculating the checksum. Data passed into this function will not
     be modified when adding the padding byte.
 
+    This is a straightforward implementation of the checksum algorithm that
+    serves as reference and fallback for calculate_checksum.
+
     :param data: Input data for checksum calculation
     :type data: Bytes like object
     :return: 16bit checksum
@@ -70,3 +99,58 @@ def calculate_checksum(data):
     for i in range(0, len(padded_payload), 2):
         checksum += (padded_payload[i + 1] << 8) | padded_payload[i]
     return (~checksum) & 0xffff
+
+def calculate_checksum(data):
+    """Calculate checksum
+
+    The checksum is a two's complement addition (integer addition)
+    of 16-bit values in little-endian byte order. If the data is an
+    uneven number of bytes a padding zero byte is added at the end before
+    calculating the checksum. Data passed into this function will not
+    be modified.
+
+    The 16-bit values are summed up directly from a memoryview of the data
+    without copying it. For objects that do not support the buffer protocol
+    the reference implementation is used.
+
+    :param data: Input data for checksum calculation
+    :type data: Bytes like object
+    :return: 16bit checksum
+    :rtype: int
+    """
+    try:
+        view = memoryview(data).cast("B")
+    except TypeError:
+        return calculate_checksum_reference(data)
+    size = len(view)
+    even_size = size & ~1
+    if sys.byteorder == "little":
+        checksum = sum(view[:even_size].cast("H"))
+    else:
+        words = array("H", view[:even_size])
+        words.byteswap()
+        checksum = sum(words)
+    if size & 1:
+        # Last byte is the low byte of a word with a zero padding byte
+        checksum += view[-1]
+    return (~checksum) & 0xffff
+
+def calculate_checksum_vectored(buffers):
+    """Calculate the checksum of the concatenation of several buffers
+
+    The checksums of the buffers are combined without joining the buffers as
+    long as all buffers except the last one have an even number of bytes,
+    otherwise the buffers are joined first.
+
+    :param buffers: Input data for checksum calculation
+    :type buffers: Sequence of bytes like objects
+    :return: 16bit checksum
+    :rtype: int
+    """
+    checksum = 0
+    last = len(buffers) - 1
+    for i, buffer in enumerate(buffers):
+        if len(buffer) & 1 and i != last:
+            return calculate_checksum(b"".join(buffers))
+        checksum += ~calculate_checksum(buffer) & 0xffff
+    return (~checksum) & 0xffff